@@ -2,6 +2,7 @@
 """Demonstration of Project Kisan Agent using Agent Development Kit"""
 from agents.kisan_agent import prompt
 from google.adk.agents import Agent
+from agents.kisan_agent.callbacks import compact_history
 from agents.kisan_agent.sub_agents.government_schemes_agent.agent import scheme_agent
 from agents.kisan_agent.sub_agents.market_analyzer_agent.agent import market_agent
 from agents.kisan_agent.sub_agents.plant_health_support_agent.agent import disease_agent
@@ -13,6 +14,7 @@ root_agent = Agent(
     name="root_agent",
     description="",
     instruction=prompt.ROOT_AGENT_INSTR,
+    before_model_callback=compact_history,
     sub_agents=[
         scheme_agent,
         market_agent,
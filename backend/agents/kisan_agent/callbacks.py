@@ -0,0 +1,74 @@
+"""
+ADK callbacks shared by the Kisan root agent and its sub-agents.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from config.settings import settings
+from services.history_compactor import gemini_summarize, get_history_compactor, summary_text
+
+logger = logging.getLogger(__name__)
+
+
+def _content_to_message(content: types.Content) -> Dict[str, Any]:
+    """Flatten an ADK content into a compactor message."""
+    texts = []
+    turn_start = content.role == "user"
+    for part in content.parts or []:
+        if part.text:
+            texts.append(part.text)
+        elif part.function_call:
+            texts.append(f"[tool call {part.function_call.name}({part.function_call.args})]")
+        elif part.function_response:
+            texts.append(f"[tool result {part.function_response.name}: {part.function_response.response}]")
+            turn_start = False
+        elif part.inline_data or part.file_data:
+            texts.append("[image]")
+    return {"role": content.role or "user", "content": "\n".join(texts), "turn_start": turn_start}
+
+
+async def compact_history(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """
+    Before-model callback that replaces older turns with a rolling summary.
+
+    The summary for each agent is kept in session state under
+    `history_summary:<agent name>` and recomputed only when the aged-out
+    messages cross HISTORY_SUMMARY_TRIGGER_TOKENS. The summary is prepended to
+    the first kept user turn, so user and model turns keep alternating.
+    """
+    if not settings.HISTORY_COMPACTION_ENABLED or not llm_request.contents:
+        return None
+
+    compactor = get_history_compactor()
+    state_key = f"history_summary:{callback_context.agent_name}"
+    contents: List[types.Content] = list(llm_request.contents)
+    messages = [_content_to_message(content) for content in contents]
+
+    state = callback_context.state.get(state_key) or {}
+    if compactor.needs_summary(messages, state):
+        state = await compactor.update_summary(messages, state, gemini_summarize)
+        callback_context.state[state_key] = state
+
+    covered = state.get("summarized_count", 0)
+    if not covered or covered > len(contents) or not state.get("summary"):
+        return None
+
+    _, stats = compactor.compact(messages, state)
+    summary = types.Part(text=summary_text(state["summary"]))
+    kept = contents[covered:]
+    if kept and kept[0].role == "user":
+        kept[0] = types.Content(role="user", parts=[summary, *(kept[0].parts or [])])
+    else:
+        kept.insert(0, types.Content(role="user", parts=[summary]))
+    llm_request.contents = kept
+    logger.info(f"History compacted for {callback_context.agent_name}: {stats['full_tokens']} -> "
+                f"{stats['prompt_tokens']} tokens ({stats['saved_tokens']} saved)")
+    return None
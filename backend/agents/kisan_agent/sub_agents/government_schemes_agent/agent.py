@@ -6,6 +6,7 @@ from dotenv import load_dotenv
 from google.adk.tools.agent_tool import AgentTool
 from google.adk.tools import google_search
 from agents.kisan_agent.sub_agents.government_schemes_agent import prompt
+from agents.kisan_agent.callbacks import compact_history
 
 # Import Qdrant RAG tool
 try:
@@ -46,6 +47,7 @@ Always cite the source documents when providing information.
 # --- Google Search Agent ---
 search_agent = Agent(
     name="google_search_agent",
+    before_model_callback=compact_history,
     model="gemini-2.0-flash",
     description="Agent to answer questions using Google Search related to farmer agricultural scheme queries.",
     instruction=prompt.google_search_prompt,
@@ -58,6 +60,7 @@ if QDRANT_AVAILABLE:
     rag_agent = Agent(
         model='gemini-2.5-flash',
         name='qdrant_rag_agent',
+        before_model_callback=compact_history,
         description="An agent that answers questions about agricultural government schemes using the Qdrant vector database corpus.",
         instruction=rag_retrieval_agent_prompt,
         tools=[qdrant_rag_tool]
@@ -72,6 +75,7 @@ if rag_agent:
 scheme_agent = Agent(
     model='gemini-2.5-flash',
     name="Govt_Agricultural_Scheme_Agent", 
+    before_model_callback=compact_history,
     description="This is the main government scheme retriever agent that provides the final information (with portal links) from both google search and RAG retriever tools.",
     instruction="""
         You are an AI assistant that is the main government scheme retriever agent. Your task is to provide the final information on user query from both google search and RAG retriever tools.
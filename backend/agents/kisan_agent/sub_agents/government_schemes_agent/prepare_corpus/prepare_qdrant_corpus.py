@@ -2,12 +2,20 @@
 Prepare Qdrant Corpus for Government Schemes
 
 This script loads PDF documents and indexes them in Qdrant vector database.
+Runs are incremental: point ids are derived from the file name and chunk
+content, and a manifest of indexed chunk hashes per PDF lets later runs embed
+only new or changed chunks and delete the ones that disappeared. Use --full to
+re-index everything.
 """
 
+import argparse
+import hashlib
+import json
 import os
 import sys
+import uuid
 from pathlib import Path
-from typing import List
+from typing import Iterator, List
 from dotenv import load_dotenv
 
 # Add backend to path
@@ -16,7 +24,9 @@ sys.path.insert(0, str(backend_path))
 
 load_dotenv(backend_path / ".env")
 
+from config.settings import settings
 from services.qdrant_service import get_qdrant_service
+from services.scheme_metadata import extract_scheme_metadata
 
 # Try to import pypdf for PDF processing
 try:
@@ -31,6 +41,7 @@ DOCUMENTS_DIR = Path(__file__).parent / "documents"
 COLLECTION_NAME = os.getenv("QDRANT_COLLECTION_NAME", "government_schemes")
 CHUNK_SIZE = 512
 CHUNK_OVERLAP = 100
+MANIFEST_PATH = Path(__file__).parent / "index_manifest.json"
 
 
 def extract_text_from_pdf(pdf_path: Path) -> str:
@@ -95,55 +106,209 @@ def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVE
     return chunks
 
 
-def process_pdf_files(documents_dir: Path) -> List[dict]:
+def file_sha256(path: Path) -> str:
+    """Hash a file's contents in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_hash(chunk: str) -> str:
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+
+def chunk_point_id(source: str, content_hash: str) -> str:
+    """Deterministic point id for a chunk of a source file."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"kisanvaani:{source}:{content_hash}"))
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> dict:
     """
-    Process all PDF files in the documents directory.
+    Load the index manifest.
+    
+    The manifest records, per collection, the embedding model and for each PDF
+    its size, mtime, content hash and the hashes of its indexed chunks.
+    """
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(manifest: dict, path: Path = MANIFEST_PATH):
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def pdf_documents(pdf_path: Path) -> List[dict]:
+    """
+    Extract and chunk one PDF into documents with content-derived ids.
+    
+    Identical chunks within a file map to the same point and are kept once.
+    """
+    text = extract_text_from_pdf(pdf_path)
+    if not text:
+        print(f"  No text extracted from {pdf_path.name}")
+        return []
+    
+    chunks = chunk_text(text)
+    print(f"  Extracted {len(chunks)} chunks")
+    
+    documents = {}
+    for i, chunk in enumerate(chunks):
+        content_hash = chunk_hash(chunk)
+        documents.setdefault(content_hash, {
+            "id": chunk_point_id(pdf_path.name, content_hash),
+            "text": chunk,
+            "source": pdf_path.name,
+            "metadata": {
+                "filename": pdf_path.name,
+                "chunk_index": i,
+                "total_chunks": len(chunks),
+                "content_hash": content_hash,
+                **extract_scheme_metadata(chunk, pdf_path.name)
+            }
+        })
+    return list(documents.values())
+
+
+def iter_pdf_documents(documents_dir: Path) -> Iterator[dict]:
+    """
+    Yield document chunks from every PDF file in the documents directory.
+    
+    PDFs are read one at a time, so only one file's text is in memory while
+    the chunks are being indexed.
     
     Args:
         documents_dir: Path to directory containing PDF files
         
-    Returns:
-        List of document dictionaries ready for indexing
+    Yields:
+        Document dictionaries ready for indexing
     """
-    documents = []
-    doc_id = 0
-    
     if not documents_dir.exists():
         print(f"Documents directory not found: {documents_dir}")
-        return documents
+        return
     
-    pdf_files = list(documents_dir.glob("*.pdf"))
+    pdf_files = sorted(documents_dir.glob("*.pdf"))
     print(f"Found {len(pdf_files)} PDF files in {documents_dir}")
     
     for pdf_path in pdf_files:
         print(f"\nProcessing: {pdf_path.name}")
+        yield from pdf_documents(pdf_path)
+
+
+def process_pdf_files(documents_dir: Path) -> List[dict]:
+    """
+    Process all PDF files in the documents directory.
+    
+    Args:
+        documents_dir: Path to directory containing PDF files
         
-        text = extract_text_from_pdf(pdf_path)
-        if not text:
-            print(f"  No text extracted from {pdf_path.name}")
-            continue
-        
-        chunks = chunk_text(text)
-        print(f"  Extracted {len(chunks)} chunks")
-        
-        for i, chunk in enumerate(chunks):
-            documents.append({
-                "id": doc_id,
-                "text": chunk,
-                "source": pdf_path.name,
-                "metadata": {
-                    "filename": pdf_path.name,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks)
-                }
-            })
-            doc_id += 1
-    
-    return documents
+    Returns:
+        List of document dictionaries ready for indexing
+    """
+    return list(iter_pdf_documents(documents_dir))
+
+
+def print_progress(report: dict):
+    """Print ingestion progress after each batch."""
+    print(f"   {report['indexed']} indexed, {report['failed']} failed "
+          f"({report['docs_per_sec']:.1f} docs/s)")
+
+
+def sync_documents(qdrant_service, documents_dir: Path, collection_name: str, manifest: dict) -> dict:
+    """
+    Bring the collection in line with the PDFs on disk.
+    
+    PDFs whose size and mtime (or, failing that, content hash) match the
+    manifest are skipped without being read. Changed PDFs are re-chunked and
+    only chunks whose hash is not in the manifest are embedded; chunks that
+    disappeared, and all chunks of deleted PDFs, are removed from Qdrant.
+    The manifest is updated in place.
+    
+    Returns:
+        Summary with `skipped`, `changed`, `removed_files`, `new_chunks`,
+        `deleted_chunks` and the ingestion `report`
+    """
+    state = manifest.setdefault(collection_name, {})
+    embedding_model = qdrant_service.embedder.model
+    if state.get("embedding_model") != embedding_model:
+        # Vectors from another model are not comparable; re-embed everything
+        state.clear()
+        state["embedding_model"] = embedding_model
+    files = state.setdefault("files", {})
+    
+    pdf_files = sorted(documents_dir.glob("*.pdf")) if documents_dir.exists() else []
+    print(f"Found {len(pdf_files)} PDF files in {documents_dir}")
+    summary = {"skipped": 0, "changed": 0, "removed_files": 0, "new_chunks": 0, "deleted_chunks": 0}
+    stale_ids = []
+    pending = {}  # point id -> (filename, chunk hash)
+    
+    for name in set(files) - {pdf_path.name for pdf_path in pdf_files}:
+        print(f"\nRemoved: {name}")
+        stale_ids.extend(chunk_point_id(name, h) for h in files.pop(name)["chunks"])
+        summary["removed_files"] += 1
+    
+    def changed_documents() -> Iterator[dict]:
+        for pdf_path in pdf_files:
+            stat = pdf_path.stat()
+            entry = files.get(pdf_path.name)
+            if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                summary["skipped"] += 1
+                continue
+            sha = file_sha256(pdf_path)
+            if entry and entry["sha256"] == sha:
+                entry["mtime"] = stat.st_mtime
+                summary["skipped"] += 1
+                continue
+            
+            print(f"\nProcessing: {pdf_path.name}")
+            summary["changed"] += 1
+            documents = pdf_documents(pdf_path)
+            current = {doc["metadata"]["content_hash"] for doc in documents}
+            previous = set(entry["chunks"]) if entry else set()
+            stale_ids.extend(chunk_point_id(pdf_path.name, h) for h in previous - current)
+            # Chunks already indexed stay in the manifest; new ones are added once upserted
+            files[pdf_path.name] = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "sha256": sha,
+                "chunks": sorted(previous & current),
+            }
+            for doc in documents:
+                if doc["metadata"]["content_hash"] not in previous:
+                    pending[doc["id"]] = (pdf_path.name, doc["metadata"]["content_hash"])
+                    yield doc
+    
+    report = qdrant_service.ingest_documents(changed_documents(), collection_name, progress=print_progress)
+    failed = set(report["failed_ids"])
+    for point_id, (name, content_hash) in pending.items():
+        if point_id in failed:
+            # Force a re-read next run so the failed chunks are retried
+            files[name]["mtime"] = files[name]["sha256"] = None
+        else:
+            files[name]["chunks"].append(content_hash)
+    for name in {name for name, _ in pending.values()}:
+        files[name]["chunks"].sort()
+    
+    if stale_ids and qdrant_service.delete_points(stale_ids, collection_name):
+        summary["deleted_chunks"] = len(stale_ids)
+    summary["new_chunks"] = report["indexed"]
+    summary["report"] = report
+    return summary
 
 
 def main():
     """Main function to prepare Qdrant corpus."""
+    parser = argparse.ArgumentParser(description="Index government scheme PDFs into Qdrant")
+    parser.add_argument("--full", action="store_true",
+                        help="Recreate the collection, ignore the manifest and re-index every PDF")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("Preparing Qdrant Corpus for Government Schemes")
     print("=" * 60)
@@ -161,29 +326,41 @@ def main():
     
     # Create collection
     print(f"\n2. Creating collection: {COLLECTION_NAME}")
+    if args.full:
+        qdrant_service.delete_collection(COLLECTION_NAME)
     qdrant_service.create_collection(COLLECTION_NAME)
+    if settings.HYBRID_SEARCH_ENABLED and not qdrant_service._is_hybrid(COLLECTION_NAME):
+        print("   Collection has no BM25 sparse field; search is dense-only until rebuilt with --full")
     
-    # Process PDF documents
-    print(f"\n3. Processing PDF documents from: {DOCUMENTS_DIR}")
-    documents = process_pdf_files(DOCUMENTS_DIR)
-    
-    if not documents:
-        print("   No documents to index!")
-        return
+    manifest = load_manifest()
+    if args.full or not qdrant_service.get_collection_info(COLLECTION_NAME).get("points_count"):
+        # A fresh (or in-memory) collection has none of the manifest's chunks
+        manifest.pop(COLLECTION_NAME, None)
     
-    print(f"\n   Total documents to index: {len(documents)}")
+    # Index new and changed PDF chunks, delete removed ones
+    print(f"\n3. Syncing PDF documents from: {DOCUMENTS_DIR}")
+    summary = sync_documents(qdrant_service, DOCUMENTS_DIR, COLLECTION_NAME, manifest)
+    if not qdrant_service.use_memory:
+        save_manifest(manifest)
+    report = summary["report"]
     
-    # Add documents to Qdrant
-    print(f"\n4. Adding documents to Qdrant...")
-    success = qdrant_service.add_documents(documents, COLLECTION_NAME)
+    print(f"\n4. {summary['changed']} PDFs changed, {summary['skipped']} unchanged, "
+          f"{summary['removed_files']} removed")
+    print(f"   {summary['new_chunks']} chunks indexed in {report['seconds']:.1f}s "
+          f"({report['docs_per_sec']:.1f} docs/s), {summary['deleted_chunks']} deleted")
+    if report["failed"]:
+        print(f"   {report['failed']} chunks failed to index and will be retried on the next run")
     
-    if success:
-        # Get collection info
-        info = qdrant_service.get_collection_info(COLLECTION_NAME)
-        print(f"\n5. Collection info:")
-        print(f"   - Name: {info.get('name')}")
-        print(f"   - Points count: {info.get('points_count')}")
-        print(f"   - Status: {info.get('status')}")
+    # Get collection info
+    info = qdrant_service.get_collection_info(COLLECTION_NAME)
+    print(f"\n5. Collection info:")
+    print(f"   - Name: {info.get('name')}")
+    print(f"   - Points count: {info.get('points_count')}")
+    print(f"   - Status: {info.get('status')}")
+    if qdrant_service.embedder.cache is not None:
+        stats = qdrant_service.embedder.cache.stats()
+        print(f"   - Embedding cache hit rate: {stats['hit_rate']:.1%} "
+              f"({stats['memory_hits'] + stats['disk_hits']} cached, {stats['misses']} embedded)")
     
     print("\n" + "=" * 60)
     print("Corpus preparation complete!")
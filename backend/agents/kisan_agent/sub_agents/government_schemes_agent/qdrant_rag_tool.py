@@ -2,7 +2,11 @@
 Qdrant RAG Tool for Government Schemes Agent
 
 This module provides a RAG retrieval tool that uses Qdrant vector database
-for retrieving relevant government scheme information.
+for retrieving relevant government scheme information. The tool is async so
+lookups from concurrent chats share the event loop instead of blocking it.
+Searches are restricted to the farmer's state (plus central schemes) using
+the location in the session state. With reranking enabled, a larger
+candidate set is reranked and only the best few chunks reach the prompt.
 """
 
 import os
@@ -17,15 +21,19 @@ sys.path.insert(0, str(backend_path))
 
 load_dotenv()
 
-from google.adk.tools import FunctionTool
+from google.adk.tools import FunctionTool, ToolContext
+
+from config.settings import settings
 
 # Qdrant configuration
 QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
 COLLECTION_NAME = os.getenv("QDRANT_COLLECTION_NAME", "government_schemes")
+DEFAULT_TOP_K = 5
 
 # Lazy import of qdrant service to avoid circular imports
 _qdrant_service = None
+_async_qdrant_service = None
 
 
 def _get_qdrant_service():
@@ -41,10 +49,62 @@ def _get_qdrant_service():
     return _qdrant_service
 
 
-def retrieve_government_schemes(
+def _get_async_qdrant_service():
+    """Lazy load the async Qdrant service."""
+    global _async_qdrant_service
+    if _async_qdrant_service is None:
+        try:
+            from services.qdrant_service import get_async_qdrant_service
+            _async_qdrant_service = get_async_qdrant_service()
+        except Exception as e:
+            print(f"Error loading async Qdrant service: {e}")
+            return None
+    return _async_qdrant_service
+
+
+def _format_results(query: str, results: List[dict]) -> str:
+    """Format search results for the agent."""
+    if not results:
+        return (
+            f"No relevant scheme information found in the corpus for query: '{query}'. "
+            "Consider using Google Search for more recent or specific information. "
+            "Default portal for Karnataka schemes: https://raitamitra.karnataka.gov.in/english"
+        )
+    
+    formatted_results = []
+    formatted_results.append(f"Found {len(results)} relevant documents for: '{query}'\n")
+    formatted_results.append("-" * 50)
+    
+    for i, result in enumerate(results, 1):
+        formatted_results.append(f"\n**Document {i}** (Relevance score: {result['score']:.3f})")
+        formatted_results.append(f"Source: {result['source']}")
+        formatted_results.append(f"Content:\n{result['text']}")
+        formatted_results.append("-" * 50)
+    
+    formatted_results.append(
+        "\nNote: For the most current information, verify on official government portals."
+    )
+    
+    return "\n".join(formatted_results)
+
+
+def _farmer_state(tool_context: Optional[ToolContext]) -> str:
+    """The farmer's state from the session state set up by create_initial_dict."""
+    if tool_context is None:
+        return ""
+    farmer_info = tool_context.state.get("farmer_info") or {}
+    location = farmer_info.get("location") or {}
+    return tool_context.state.get("state") or location.get("state") or ""
+
+
+async def retrieve_government_schemes(
     query: str,
-    top_k: int = 5,
-    score_threshold: float = 0.5
+    top_k: int = 0,
+    score_threshold: float = 0.5,
+    state: str = "",
+    category: str = "",
+    language: str = "",
+    tool_context: Optional[ToolContext] = None
 ) -> str:
     """
     Retrieve relevant government agricultural scheme information from the Qdrant vector database.
@@ -56,14 +116,22 @@ def retrieve_government_schemes(
         query: The search query describing what scheme information you're looking for.
                Examples: "subsidy for organic farming", "PM Kisan scheme benefits",
                "irrigation assistance Karnataka"
-        top_k: Number of most relevant documents to retrieve (default: 5)
-        score_threshold: Minimum similarity score for results (default: 0.5)
+        top_k: Number of most relevant documents to retrieve (default: 0, meaning
+               3 when results are reranked, otherwise 5)
+        score_threshold: Minimum semantic similarity score (default: 0.5); exact
+                         matches on scheme names and codes are kept regardless
+        state: Indian state to restrict results to, plus central schemes
+               (default: the farmer's state from their profile)
+        category: Optional scheme category: income_support, insurance, credit,
+                  irrigation, mechanization, inputs, organic, horticulture,
+                  livestock, fisheries, market or solar
+        language: Optional document language code ("en", "hi", "kn")
     
     Returns:
         A formatted string containing relevant government scheme information
         from the corpus, or a message indicating no results were found.
     """
-    qdrant_service = _get_qdrant_service()
+    qdrant_service = _get_async_qdrant_service()
     
     if qdrant_service is None:
         return (
@@ -72,37 +140,34 @@ def retrieve_government_schemes(
             "For now, use Google Search to find scheme information."
         )
     
+    if top_k <= 0:
+        top_k = settings.RERANK_TOP_K if qdrant_service.reranker is not None else DEFAULT_TOP_K
+    
+    filters = {
+        "state": state or _farmer_state(tool_context),
+        "categories": category,
+        "language": language,
+    }
+    
     try:
-        results = qdrant_service.search(
+        results = await qdrant_service.search(
             query=query,
             collection_name=COLLECTION_NAME,
             top_k=top_k,
-            score_threshold=score_threshold
+            score_threshold=score_threshold,
+            filters=filters
         )
-        
-        if not results:
-            return (
-                f"No relevant scheme information found in the corpus for query: '{query}'. "
-                "Consider using Google Search for more recent or specific information. "
-                "Default portal for Karnataka schemes: https://raitamitra.karnataka.gov.in/english"
+        if not results and not state and filters["state"]:
+            # The profile state may not be covered by the corpus; search everywhere
+            results = await qdrant_service.search(
+                query=query,
+                collection_name=COLLECTION_NAME,
+                top_k=top_k,
+                score_threshold=score_threshold,
+                filters={**filters, "state": ""}
             )
         
-        # Format results
-        formatted_results = []
-        formatted_results.append(f"Found {len(results)} relevant documents for: '{query}'\n")
-        formatted_results.append("-" * 50)
-        
-        for i, result in enumerate(results, 1):
-            formatted_results.append(f"\n**Document {i}** (Relevance: {result['score']:.2%})")
-            formatted_results.append(f"Source: {result['source']}")
-            formatted_results.append(f"Content:\n{result['text']}")
-            formatted_results.append("-" * 50)
-        
-        formatted_results.append(
-            "\nNote: For the most current information, verify on official government portals."
-        )
-        
-        return "\n".join(formatted_results)
+        return _format_results(query, results)
         
     except Exception as e:
         return (
@@ -6,6 +6,7 @@ from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from agents.kisan_agent.sub_agents.market_analyzer_agent.tools import scrape_agmarknet_trigger
 from agents.kisan_agent.sub_agents.market_analyzer_agent import prompt
+from agents.kisan_agent.callbacks import compact_history
 from google.genai import types
 # Load environment variables from .env file
 from dotenv import load_dotenv
@@ -16,6 +17,7 @@ load_dotenv()
 sub_market_agent = Agent(
     model="gemini-2.5-flash",
     name="commodity_price",
+    before_model_callback=compact_history,
     description="An agent that can scrap govt website and extract commodity prices in real time for all places",
     disallow_transfer_to_parent=True,
     disallow_transfer_to_peers=True,
@@ -29,6 +31,7 @@ sub_market_agent = Agent(
 search_agent = Agent(
     model="gemini-2.5-flash",
     name="google_search",
+    before_model_callback=compact_history,
     description="An agent which will perform google search on user query to extract prices for nearby places.",
     disallow_transfer_to_parent=True,
     disallow_transfer_to_peers=True,
@@ -42,6 +45,7 @@ search_agent = Agent(
 market_agent = Agent(
     model = "gemini-2.5-flash",
     name="market_reserach_agent",
+    before_model_callback=compact_history,
     description="This is main market analyzer angent.",
     instruction = prompt.MARKET_ANALYZER_INSTRUCTION,
     tools = [ 
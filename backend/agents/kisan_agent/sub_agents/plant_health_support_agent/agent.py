@@ -2,6 +2,7 @@ from google.adk.agents import Agent
 from google.adk.tools.agent_tool import AgentTool
 from google.genai.types import GenerateContentConfig
 from agents.kisan_agent.sub_agents.plant_health_support_agent import prompt
+from agents.kisan_agent.callbacks import compact_history
 from agents.kisan_agent.sub_agents.plant_health_support_agent.tools import _load_precreated_user_profile
 from agents.kisan_agent.sub_agents.plant_health_support_agent.sub_agents.plant_disease_detection_agent.agent import plant_specialised_disease_detector_agent
 from agents.kisan_agent.sub_agents.plant_health_support_agent.sub_agents.plant_treatment_plant_agent.agent import plant_treatment_plan_generator_agent
@@ -13,6 +14,7 @@ from agents.kisan_agent.sub_agents.plant_health_support_agent.sub_agents.plant_t
 disease_agent = Agent(
     model="gemini-2.5-flash",
     name="plant_health_support_agent",
+    before_model_callback=compact_history,
     description="""A Plant Health Support Agent that using the services of multiple sub agents for helping farmers identify and manage plant diseases using images and descriptions of symptoms. It provides actionable advice on treatment and prevention.""",
     instruction=prompt.PLANT_HEALTH_SUPPORT_AGENT_INSTRUCTION,
     tools=[
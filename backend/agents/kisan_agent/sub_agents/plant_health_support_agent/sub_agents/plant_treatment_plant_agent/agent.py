@@ -2,10 +2,12 @@ from google.adk.agents import Agent
 from google.adk.tools.agent_tool import AgentTool
 from google.genai.types import GenerateContentConfig
 from agents.kisan_agent.sub_agents.plant_health_support_agent.sub_agents.plant_treatment_plant_agent import prompt
+from agents.kisan_agent.callbacks import compact_history
 
 plant_treatment_plan_generator_agent = Agent(
     model="gemini-2.5-flash",
     name="plant_treatment_plan_generator_agent",
+    before_model_callback=compact_history,
     description="""
     A specialized agent for generating treatment plans for identified plant diseases. It takes into account the specific disease, the plant type, and the local farming practices to create a tailored treatment plan.
     """,
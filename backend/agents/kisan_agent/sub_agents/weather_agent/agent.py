@@ -3,6 +3,7 @@
 from google.adk.agents import Agent
 #from agents.kisan_agent.sub_agents.weather_agent.tool import get_current_weather
 from agents.kisan_agent.sub_agents.weather_agent.tool import get_current_weather
+from agents.kisan_agent.callbacks import compact_history
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
@@ -14,6 +15,7 @@ load_dotenv()
 weather_agent = Agent(
     model="gemini-2.5-flash",
     name="weather_search_Agent",
+    before_model_callback=compact_history,
     description="An agent providing current weather",
     instruction=""",
     You have been provided with current weather of city, and weather forecast of next 1 week. Collate and analyse this entire data and summarize a crisp weather report for
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark Qdrant collection profiles (fast / balanced / accurate).
+
+For each profile, builds a collection from the same vectors on a Qdrant
+server (QDRANT_HOST/QDRANT_PORT or QDRANT_URL; embedded and in-memory Qdrant
+ignore HNSW and quantization), waits for indexing to finish and reports:
+
+  build s       upload + optimization until the collection is green
+  RAM/disk MB   estimated vector + HNSW graph footprint
+  p50/p99 ms    search latency with the profile's search parameters
+  recall@k      overlap with exact (brute-force) search on the same collection
+
+Vectors come from the scheme corpus (embedded through the embedding cache) or,
+with --synthetic N, from N clustered random unit vectors.
+
+Usage:
+    python benchmarks/bench_collection_profiles.py [--synthetic 20000] [--queries 200] [--top-k 5]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend directory to path to import our modules
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from qdrant_client.models import PointStruct, SearchParams
+
+from services.collection_profiles import COLLECTION_PROFILES, estimated_memory_bytes, search_params
+from services.qdrant_service import QdrantService
+
+DOCUMENTS_DIR = (
+    Path(__file__).resolve().parent.parent
+    / "agents/kisan_agent/sub_agents/government_schemes_agent/prepare_corpus/documents"
+)
+
+
+def synthetic_vectors(count: int, dimension: int, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors around a few hundred cluster centres, like topical chunks."""
+    centres = rng.normal(size=(max(1, count // 50), dimension))
+    vectors = centres[rng.integers(len(centres), size=count)] + 0.5 * rng.normal(size=(count, dimension))
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def corpus_vectors(service: QdrantService) -> np.ndarray:
+    sys.path.append(str(DOCUMENTS_DIR.parent))
+    from prepare_qdrant_corpus import iter_pdf_documents
+
+    texts = [doc["text"] for doc in iter_pdf_documents(DOCUMENTS_DIR)]
+    if not texts:
+        raise SystemExit(f"No PDF chunks in {DOCUMENTS_DIR}; use --synthetic N")
+    return np.asarray(service.get_embeddings(texts), dtype=np.float32)
+
+
+def wait_until_indexed(service: QdrantService, collection: str, timeout: float = 600):
+    started = time.time()
+    while time.time() - started < timeout:
+        info = service.client.get_collection(collection_name=collection)
+        if info.status.value == "green" and (info.indexed_vectors_count or 0) >= (info.points_count or 0):
+            return
+        time.sleep(0.5)
+
+
+def run_profile(service: QdrantService, name: str, vectors: np.ndarray, queries: np.ndarray, top_k: int):
+    collection = f"bench_profile_{name}"
+    service.delete_collection(collection)
+    service.embedding_dimension = vectors.shape[1]
+
+    started = time.perf_counter()
+    service.create_collection(collection, profile=name)
+    service.client.upload_points(
+        collection_name=collection,
+        points=(PointStruct(id=i, vector=vector.tolist()) for i, vector in enumerate(vectors)),
+        batch_size=256,
+        parallel=2,
+        wait=True,
+    )
+    wait_until_indexed(service, collection)
+    build_seconds = time.perf_counter() - started
+
+    profile = COLLECTION_PROFILES[name]
+    latencies = []
+    recalls = []
+    for query in queries.tolist():
+        exact = service.client.query_points(
+            collection_name=collection, query=query, limit=top_k, search_params=SearchParams(exact=True)
+        ).points
+        started = time.perf_counter()
+        approximate = service.client.query_points(
+            collection_name=collection, query=query, limit=top_k, search_params=search_params(profile)
+        ).points
+        latencies.append(time.perf_counter() - started)
+        expected = {point.id for point in exact}
+        recalls.append(len(expected & {point.id for point in approximate}) / max(1, len(expected)))
+
+    memory = estimated_memory_bytes(profile, len(vectors), vectors.shape[1])
+    service.delete_collection(collection)
+    return {
+        "profile": name,
+        "build_s": build_seconds,
+        "ram_mb": memory["ram"] / 1048576,
+        "disk_mb": memory["disk"] / 1048576,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1000,
+        "recall": float(np.mean(recalls)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Qdrant collection profiles")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic vectors instead of the corpus")
+    parser.add_argument("--dimension", type=int, default=768, help="Synthetic vector dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per profile")
+    parser.add_argument("--top-k", type=int, default=5, help="Results per query")
+    parser.add_argument("--profiles", nargs="+", default=list(COLLECTION_PROFILES), choices=list(COLLECTION_PROFILES))
+    args = parser.parse_args()
+
+    service = QdrantService()
+    if service.use_memory or service.local_path:
+        raise SystemExit("A Qdrant server is required; embedded Qdrant has no HNSW or quantization")
+
+    rng = np.random.default_rng(7)
+    vectors = synthetic_vectors(args.synthetic, args.dimension, rng) if args.synthetic else corpus_vectors(service)
+    # Queries: perturbed copies of stored vectors
+    queries = vectors[rng.integers(len(vectors), size=args.queries)] + 0.05 * rng.normal(size=(args.queries, vectors.shape[1]))
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {args.queries} queries, top_k={args.top_k}")
+
+    print(f"{'profile':<10}{'build s':>9}{'RAM MB':>9}{'disk MB':>9}{'p50 ms':>9}{'p99 ms':>9}{f'recall@{args.top_k}':>11}")
+    for name in args.profiles:
+        result = run_profile(service, name, vectors, queries, args.top_k)
+        print(
+            f"{result['profile']:<10}{result['build_s']:>9.1f}{result['ram_mb']:>9.1f}{result['disk_mb']:>9.1f}"
+            f"{result['p50_ms']:>9.2f}{result['p99_ms']:>9.2f}{result['recall']:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
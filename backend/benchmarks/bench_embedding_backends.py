@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark embedding backends: Google embedding API vs. local CPU model.
+
+For each backend, embeds a bulk set of scheme-like passages in English, Hindi
+and Kannada through BatchEmbedder (the indexing path, without the embedding
+cache) and then single queries one at a time (the search path). Reports the
+model's dimension, bulk throughput (texts/sec) and query latency (p50/p99).
+Model loading happens before the timings start.
+
+Backends that are unavailable (no GOOGLE_API_KEY, fastembed not installed)
+are skipped.
+
+Usage:
+    python benchmarks/bench_embedding_backends.py [--texts 512] [--queries 100] [--backends google local]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add backend directory to path to import our modules
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from services.embeddings import EMBEDDING_BACKENDS, create_batch_embedder, create_embedding_backend
+
+PASSAGES = [
+    "PM-KISAN provides income support of Rs 6000 per year to small and marginal farmer families.",
+    "Drip and sprinkler irrigation systems are subsidised under Per Drop More Crop of PMKSY.",
+    "Kisan Credit Card holders get short-term crop loans at a subvented interest rate of 4 percent.",
+    "प्रधानमंत्री फसल बीमा योजना के तहत किसानों को प्राकृतिक आपदा से फसल नुकसान पर बीमा मिलता है।",
+    "मृदा स्वास्थ्य कार्ड योजना में किसानों को मिट्टी की जांच और उर्वरक की सलाह दी जाती है।",
+    "ಕೃಷಿ ಯಂತ್ರೋಪಕರಣಗಳ ಖರೀದಿಗೆ ಕರ್ನಾಟಕ ಸರ್ಕಾರ ರೈತರಿಗೆ ಸಹಾಯಧನ ನೀಡುತ್ತದೆ.",
+    "ಹನಿ ನೀರಾವರಿ ಘಟಕ ಅಳವಡಿಸಲು ಸಣ್ಣ ರೈತರಿಗೆ ಶೇಕಡ 90 ರಷ್ಟು ಸಬ್ಸಿಡಿ ಲಭ್ಯವಿದೆ.",
+]
+
+QUERIES = [
+    "drip irrigation subsidy",
+    "फसल बीमा कैसे मिलेगा",
+    "ಟ್ರ್ಯಾಕ್ಟರ್ ಸಬ್ಸಿಡಿ ಯೋಜನೆ",
+    "pm kisan installment",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(name: str, texts: int, queries: int):
+    if name == "google":
+        if not os.getenv("GOOGLE_API_KEY"):
+            return None, "GOOGLE_API_KEY not set"
+        import google.generativeai as genai
+
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    try:
+        backend = create_embedding_backend(name)
+    except Exception as e:
+        return None, str(e)
+    embedder = create_batch_embedder(backend, use_cache=False)
+    # Loads the local model / opens the API connection outside the timings
+    embedder.embed(["warm up"], task_type="retrieval_query")
+    dimension = embedder.dimension
+
+    passages = [f"{PASSAGES[i % len(PASSAGES)]} ({i})" for i in range(texts)]
+    started = time.perf_counter()
+    embedder.embed(passages)
+    bulk_seconds = time.perf_counter() - started
+
+    latencies = []
+    for i in range(queries):
+        started = time.perf_counter()
+        embedder.embed([f"{QUERIES[i % len(QUERIES)]} {i}"], task_type="retrieval_query")
+        latencies.append(time.perf_counter() - started)
+
+    return {
+        "backend": name,
+        "model": backend.model,
+        "dimension": dimension,
+        "texts_per_sec": texts / bulk_seconds,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument("--texts", type=int, default=512, help="Passages embedded in bulk")
+    parser.add_argument("--queries", type=int, default=100, help="Single-text queries")
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=list(EMBEDDING_BACKENDS))
+    args = parser.parse_args()
+
+    print(f"{'backend':<8}{'model':<36}{'dim':>6}{'texts/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for name in args.backends:
+        result, reason = run(name, args.texts, args.queries)
+        if result is None:
+            print(f"{name:<8}skipped: {reason}")
+            continue
+        print(
+            f"{result['backend']:<8}{result['model']:<36}{result['dimension']:>6}"
+            f"{result['texts_per_sec']:>10.1f}{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
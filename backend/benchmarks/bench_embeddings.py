@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark corpus indexing throughput: one embedding request per chunk vs.
+batched, concurrent requests.
+
+Indexes synthetic chunks through QdrantService.add_documents into an
+in-memory Qdrant, with a fake embedder that sleeps for a configurable
+round-trip per request (plus a small per-text cost) and optionally fails a
+fraction of requests to exercise the retry path. Reports chunks/sec.
+
+Usage:
+    python benchmarks/bench_embeddings.py [--chunks 2000] [--rtt-ms 120] [--failure-rate 0.02]
+"""
+
+import argparse
+import hashlib
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add backend directory to path to import our modules
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from services.embeddings import BatchEmbedder
+from services.qdrant_service import QdrantService
+
+DIMENSION = 768
+
+
+class FakeEmbedder:
+    """Embedding API stand-in with simulated latency and transient failures."""
+
+    def __init__(self, rtt_seconds: float, per_text_seconds: float, failure_rate: float):
+        self.rtt_seconds = rtt_seconds
+        self.per_text_seconds = per_text_seconds
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, texts, task_type):
+        time.sleep(self.rtt_seconds + self.per_text_seconds * len(texts))
+        with self._lock:
+            self.requests += 1
+            if random.random() < self.failure_rate:
+                self.failures += 1
+                raise RuntimeError("429 Resource exhausted")
+        return [self._vector(text) for text in texts]
+
+    @staticmethod
+    def _vector(text):
+        rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+        return [rng.uniform(-1, 1) for _ in range(DIMENSION)]
+
+
+def run(label: str, chunks: int, fake: FakeEmbedder, batch_size: int, concurrency: int, rpm: float):
+    embedder = BatchEmbedder(
+        embed_batch=fake,
+        batch_size=batch_size,
+        concurrency=concurrency,
+        requests_per_minute=rpm,
+        max_retries=5,
+        retry_base_seconds=0.05,
+    )
+    service = QdrantService(use_memory=True, embedder=embedder)
+    service.create_collection("bench")
+    documents = [
+        {"id": i, "text": f"Scheme chunk {i}: eligibility, benefits and how to apply.", "source": "bench.pdf"}
+        for i in range(chunks)
+    ]
+
+    started = time.perf_counter()
+    if not service.add_documents(documents, "bench"):
+        raise SystemExit(f"{label}: indexing failed")
+    elapsed = time.perf_counter() - started
+
+    return {
+        "mode": label,
+        "requests": fake.requests,
+        "failures": fake.failures,
+        "chunks_per_sec": chunks / elapsed,
+        "elapsed_s": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched embedding generation")
+    parser.add_argument("--chunks", type=int, default=2000, help="Chunks to index")
+    parser.add_argument("--serial-chunks", type=int, default=200, help="Chunks for the one-request-per-chunk run")
+    parser.add_argument("--rtt-ms", type=float, default=120.0, help="Simulated request round-trip")
+    parser.add_argument("--per-text-ms", type=float, default=1.0, help="Simulated cost per text in a request")
+    parser.add_argument("--failure-rate", type=float, default=0.02, help="Fraction of requests that fail")
+    parser.add_argument("--batch-size", type=int, default=100, help="Texts per request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent requests")
+    parser.add_argument("--rpm", type=float, default=1500, help="Requests per minute limit")
+    args = parser.parse_args()
+
+    runs = [
+        ("serial", args.serial_chunks, 1, 1),
+        ("batched", args.chunks, args.batch_size, 1),
+        ("batched+concurrent", args.chunks, args.batch_size, args.concurrency),
+    ]
+    print(f"{'mode':<20}{'chunks':>8}{'requests':>10}{'failed':>8}{'chunks/s':>11}{'total s':>10}")
+    for label, chunks, batch_size, concurrency in runs:
+        fake = FakeEmbedder(args.rtt_ms / 1000, args.per_text_ms / 1000, args.failure_rate)
+        result = run(label, chunks, fake, batch_size, concurrency, args.rpm)
+        print(
+            f"{result['mode']:<20}{chunks:>8}{result['requests']:>10}{result['failures']:>8}"
+            f"{result['chunks_per_sec']:>11.1f}{result['elapsed_s']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark Firestore conversation logging: per-document writes vs. the
+write-behind buffer.
+
+Drives StorageTools.save_conversation / save_user_context the way the chat
+flow does, against an in-memory Firestore stand-in that sleeps for a
+configurable round-trip per commit. Reports per-request write latency (p50/p99)
+and end-to-end document throughput including the final flush.
+
+Usage:
+    python benchmarks/bench_firestore_writes.py [--requests 2000] [--concurrency 50] [--rtt-ms 25]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+# Add backend directory to path to import our modules
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config.settings import settings
+from services import firestore_writer
+from services.firestore_writer import WriteBehindBuffer
+from services.storage_tools import StorageTools
+
+
+class FakeFirestore:
+    """Minimal Firestore client surface with simulated commit latency."""
+
+    def __init__(self, rtt_seconds: float, per_op_seconds: float):
+        self.rtt_seconds = rtt_seconds
+        self.per_op_seconds = per_op_seconds
+        self.documents = {}
+        self.commits = 0
+        self._lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def _write(self, ops):
+        time.sleep(self.rtt_seconds + self.per_op_seconds * len(ops))
+        with self._lock:
+            self.commits += 1
+            for key, data, merge in ops:
+                existing = self.documents.get(key, {}) if merge else {}
+                self.documents[key] = {**existing, **data}
+
+
+class FakeCollection:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def document(self, document_id=None):
+        return FakeDocument(self.client, self.name, document_id or uuid.uuid4().hex)
+
+
+class FakeDocument:
+    def __init__(self, client, collection, document_id):
+        self.client = client
+        self.id = document_id
+        self.key = (collection, document_id)
+
+    def set(self, data, merge=False):
+        self.client._write([(self.key, data, merge)])
+
+    def get(self):
+        time.sleep(self.client.rtt_seconds)
+        return FakeSnapshot(self.client.documents.get(self.key))
+
+
+class FakeSnapshot:
+    def __init__(self, data):
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data or {})
+
+
+class FakeBatch:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def set(self, doc_ref, data, merge=False):
+        self.ops.append((doc_ref.key, data, merge))
+
+    def commit(self):
+        self.client._write(self.ops)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(mode: str, requests: int, concurrency: int, users: int, client: FakeFirestore):
+    tools = StorageTools.__new__(StorageTools)
+    tools.firestore_client = client
+    tools.bucket_name = settings.UPLOAD_BUCKET
+
+    buffer = None
+    if mode == "write-behind":
+        settings.FIRESTORE_WRITE_BEHIND = True
+        buffer = WriteBehindBuffer(
+            client,
+            max_ops=settings.FIRESTORE_BATCH_MAX_OPS,
+            flush_interval_seconds=settings.FIRESTORE_FLUSH_INTERVAL_SECONDS,
+        )
+        firestore_writer._write_behind_buffer = buffer
+        await buffer.start()
+
+    defer = None if buffer is not None else False
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def chat_turn(i: int):
+        user_id = f"farmer-{i % users}"
+        async with semaphore:
+            started = time.perf_counter()
+            await tools.save_conversation(user_id, {
+                "user_message": f"question {i}",
+                "ai_response": f"answer {i}",
+            }, defer=defer)
+            await tools.save_user_context(user_id, {"last_query": f"question {i}"}, defer=defer)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(chat_turn(i) for i in range(requests)))
+    if buffer is not None:
+        await buffer.stop()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "documents": len(client.documents),
+        "commits": client.commits,
+        "docs_per_sec": len(client.documents) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "elapsed_s": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Firestore write-behind batching")
+    parser.add_argument("--requests", type=int, default=2000, help="Chat turns to log")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent chat turns")
+    parser.add_argument("--users", type=int, default=200, help="Distinct user_context documents")
+    parser.add_argument("--rtt-ms", type=float, default=25.0, help="Simulated commit round-trip")
+    parser.add_argument("--per-op-us", type=float, default=50.0, help="Simulated cost per write in a commit")
+    args = parser.parse_args()
+
+    print(f"{'mode':<14}{'docs':>8}{'commits':>9}{'docs/s':>11}{'p50 ms':>10}{'p99 ms':>10}{'total s':>10}")
+    for mode in ("direct", "write-behind"):
+        client = FakeFirestore(args.rtt_ms / 1000, args.per_op_us / 1_000_000)
+        result = asyncio.run(run(mode, args.requests, args.concurrency, args.users, client))
+        print(
+            f"{result['mode']:<14}{result['documents']:>8}{result['commits']:>9}"
+            f"{result['docs_per_sec']:>11.1f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+            f"{result['elapsed_s']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
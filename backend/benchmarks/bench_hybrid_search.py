@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark dense-only vs. hybrid (dense + BM25, RRF-fused) scheme search.
+
+Builds a synthetic scheme corpus in two in-memory Qdrant collections, one
+without and one with the BM25 sparse field, and runs two query sets:
+
+  code      a scheme code plus a few topic words ("PMKSY-042 drip subsidy")
+  topic     topic words only
+
+The fake dense encoder embeds lowercase topic words and ignores codes, the
+way real embedding models treat out-of-vocabulary acronyms, so the code
+queries show what the sparse leg adds. Reports recall@k and p50 search
+latency per mode.
+
+Usage:
+    python benchmarks/bench_hybrid_search.py [--docs 2000] [--queries 300] [--top-k 5]
+"""
+
+import argparse
+import hashlib
+import math
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add backend directory to path to import our modules
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config.settings import settings
+from services.embeddings import BatchEmbedder
+from services.qdrant_service import QdrantService
+
+DIMENSION = 768
+PREFIXES = ["PMKSY", "PMFBY", "KCC", "PMKISAN", "SMAM", "RKVY", "NMSA", "MIDH", "PKVY", "NFSM"]
+VOCABULARY = (
+    "subsidy irrigation farmers loan insurance crop seed fertilizer drip organic credit pension "
+    "tractor solar pump storage market dairy fisheries horticulture sprinkler soil testing "
+    "warehouse cooperative women youth training machinery livestock poultry bamboo rainfed"
+).split()
+
+
+def dense_embed(texts, task_type):
+    """Hashing bag-of-words over lowercase vocabulary words; codes are ignored."""
+    vectors = []
+    for text in texts:
+        vector = [0.0] * DIMENSION
+        for word in text.split():
+            if word.islower() and word.isalpha():
+                seed = int.from_bytes(hashlib.sha256(word.encode()).digest()[:8], "big")
+                rng = random.Random(seed)
+                for _ in range(8):
+                    vector[rng.randrange(DIMENSION)] += rng.choice((-1.0, 1.0))
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        vectors.append([v / norm for v in vector])
+    return vectors
+
+
+def build_corpus(docs: int, rng: random.Random):
+    corpus = []
+    for i in range(docs):
+        code = f"{PREFIXES[i % len(PREFIXES)]}-{i:04d}"
+        words = rng.sample(VOCABULARY, 12)
+        corpus.append({
+            "id": i,
+            "code": code,
+            "words": words,
+            "text": f"Scheme {code}: {' '.join(words)}",
+            "source": "synthetic.pdf",
+        })
+    return corpus
+
+
+def build_queries(corpus, queries: int, rng: random.Random):
+    sample = rng.sample(corpus, min(queries, len(corpus)))
+    return {
+        "code": [(f"{doc['code']} {' '.join(rng.sample(doc['words'], 2))}", doc["id"]) for doc in sample],
+        "topic": [(" ".join(rng.sample(doc["words"], 6)), doc["id"]) for doc in sample],
+    }
+
+
+def evaluate(service: QdrantService, collection: str, queries, top_k: int, score_threshold: float):
+    hits = 0
+    latencies = []
+    for query, expected in queries:
+        started = time.perf_counter()
+        results = service.search(query, collection, top_k=top_k, score_threshold=score_threshold)
+        latencies.append(time.perf_counter() - started)
+        hits += any(result["id"] == expected for result in results)
+    return hits / len(queries), statistics.median(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dense-only vs hybrid scheme search")
+    parser.add_argument("--docs", type=int, default=2000, help="Synthetic scheme chunks")
+    parser.add_argument("--queries", type=int, default=300, help="Queries per query set")
+    parser.add_argument("--top-k", type=int, default=5, help="Results per query")
+    parser.add_argument("--score-threshold", type=float, default=0.5, help="Dense score threshold")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = build_corpus(args.docs, rng)
+    query_sets = build_queries(corpus, args.queries, rng)
+
+    embedder = BatchEmbedder(embed_batch=dense_embed, requests_per_minute=0)
+    service = QdrantService(use_memory=True, embedder=embedder)
+    # Measure every search, not cache hits
+    service.search_cache = None
+    documents = [{key: doc[key] for key in ("id", "text", "source")} for doc in corpus]
+
+    for collection, hybrid in (("dense", False), ("hybrid", True)):
+        settings.HYBRID_SEARCH_ENABLED = hybrid
+        service.create_collection(collection)
+        service.add_documents(documents, collection)
+    settings.HYBRID_SEARCH_ENABLED = True
+
+    print(f"{'mode':<8}{'queries':<8}{f'recall@{args.top_k}':>11}{'p50 ms':>9}")
+    for collection in ("dense", "hybrid"):
+        for name, queries in query_sets.items():
+            recall, p50 = evaluate(service, collection, queries, args.top_k, args.score_threshold)
+            print(f"{collection:<8}{name:<8}{recall:>11.3f}{p50:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
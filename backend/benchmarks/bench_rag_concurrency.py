@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark RAG lookups from concurrent chats: blocking QdrantService.search vs.
+AsyncQdrantService.search.
+
+Each simulated chat awaits a model call, runs one scheme lookup (query
+embedding + vector search, each with a simulated network round-trip) and
+awaits a second model call, all on one event loop, the way sync and async ADK
+tools run. A heartbeat task measures how long the loop is blocked. Reports
+wall time, lookup latency (p50/p99) and the worst event-loop stall.
+
+Usage:
+    python benchmarks/bench_rag_concurrency.py [--chats 50] [--embed-ms 80] [--search-ms 30]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add backend directory to path to import our modules
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config.settings import settings
+from services.collection_profiles import get_profile
+from services.embeddings import BatchEmbedder
+from services.qdrant_service import AsyncQdrantService, QdrantService
+
+DIMENSION = 768
+
+
+class FakeClient:
+    """Blocking Qdrant client with a simulated search round-trip."""
+
+    def __init__(self, rtt_seconds: float):
+        self.rtt_seconds = rtt_seconds
+
+    def search(self, **kwargs):
+        time.sleep(self.rtt_seconds)
+        return []
+
+
+class FakeAsyncClient(FakeClient):
+    async def search(self, **kwargs):
+        await asyncio.sleep(self.rtt_seconds)
+        return []
+
+    async def close(self):
+        pass
+
+
+def fake_embedders(rtt_seconds: float):
+    def embed(texts, task_type):
+        time.sleep(rtt_seconds)
+        return [[0.1] * DIMENSION for _ in texts]
+
+    async def aembed(texts, task_type):
+        await asyncio.sleep(rtt_seconds)
+        return [[0.1] * DIMENSION for _ in texts]
+
+    return embed, aembed
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(mode: str, chats: int, embed_seconds: float, search_seconds: float, llm_seconds: float):
+    embed, aembed = fake_embedders(embed_seconds)
+    embedder = BatchEmbedder(embed_batch=embed, aembed_batch=aembed, requests_per_minute=0)
+    # The fake clients only model search latency
+    settings.HYBRID_SEARCH_ENABLED = False
+    if mode == "sync":
+        service = QdrantService.__new__(QdrantService)
+        service.client = FakeClient(search_seconds)
+        service.embedder = embedder
+        service.profile = get_profile()
+        service.reranker = None
+    else:
+        service = AsyncQdrantService(client=FakeAsyncClient(search_seconds), embedder=embedder)
+    # Measure every lookup, not cache hits
+    service.search_cache = None
+
+    latencies = []
+    stalls = [0.0]
+    running = True
+
+    async def heartbeat(interval: float = 0.005):
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            stalls[0] = max(stalls[0], time.perf_counter() - started - interval)
+
+    async def chat(i: int):
+        await asyncio.sleep(llm_seconds)
+        started = time.perf_counter()
+        query = f"irrigation subsidy question {i}"
+        if mode == "sync":
+            service.search(query)
+        else:
+            await service.search(query)
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(llm_seconds)
+
+    monitor = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    await asyncio.gather(*(chat(i) for i in range(chats)))
+    elapsed = time.perf_counter() - started
+    running = False
+    await monitor
+
+    return {
+        "mode": mode,
+        "elapsed_s": elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_stall_ms": stalls[0] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async RAG lookups under concurrency")
+    parser.add_argument("--chats", type=int, default=50, help="Concurrent chats")
+    parser.add_argument("--embed-ms", type=float, default=80.0, help="Simulated embedding round-trip")
+    parser.add_argument("--search-ms", type=float, default=30.0, help="Simulated Qdrant search round-trip")
+    parser.add_argument("--llm-ms", type=float, default=200.0, help="Simulated model call before/after the lookup")
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'total s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max stall ms':>15}")
+    for mode in ("sync", "async"):
+        result = asyncio.run(run(mode, args.chats, args.embed_ms / 1000, args.search_ms / 1000, args.llm_ms / 1000))
+        print(
+            f"{result['mode']:<8}{result['elapsed_s']:>10.2f}{result['p50_ms']:>10.1f}"
+            f"{result['p99_ms']:>10.1f}{result['max_stall_ms']:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
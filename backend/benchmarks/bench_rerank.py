@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cross-encoder rerank stage.
+
+Reranks synthetic candidate sets the way AsyncQdrantService.search does
+(RERANK_CANDIDATES chunks per query, scored in batches off the event loop)
+and reports, per load level (concurrent queries):
+
+  p50/p99 ms    rerank latency per query, skipped queries included
+  reranked      queries scored by the cross-encoder
+  skipped       queries that fell back to retrieval order (busy or over budget)
+  cached        repeated queries answered from the rerank cache
+
+With fastembed installed, --model scores with a real cross-encoder on CPU;
+otherwise a stand-in scorer costs --pair-ms per (query, chunk) pair.
+
+Usage:
+    python benchmarks/bench_rerank.py [--queries 200] [--candidates 30] [--concurrency 1 4 16]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add backend directory to path to import our modules
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config.settings import settings
+from services.metrics import metrics
+from services.reranker import CrossEncoderScorer, Reranker
+
+WORDS = (
+    "subsidy irrigation farmers loan insurance crop seed fertilizer drip organic credit pension "
+    "tractor solar pump storage market dairy fisheries horticulture sprinkler soil testing"
+).split()
+
+
+def simulated_scorer(pair_seconds: float):
+    def score_batch(query, texts):
+        # CPU-bound like a real model: holds the core for the whole batch
+        deadline = time.perf_counter() + pair_seconds * len(texts)
+        while time.perf_counter() < deadline:
+            pass
+        query_words = set(query.split())
+        return [len(query_words & set(text.split())) + random.random() for text in texts]
+
+    return score_batch
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def counts():
+    snapshot = metrics.snapshot().get("rerank_requests_total", {})
+    totals = {"reranked": 0, "skipped": 0, "cached": 0}
+    for labels, value in snapshot.items():
+        for result in totals:
+            if f'result="{result}"' in labels:
+                totals[result] += value
+    return totals
+
+
+async def run(reranker: Reranker, queries: int, candidates: int, concurrency: int, repeat: float, rng: random.Random):
+    distinct = [" ".join(rng.sample(WORDS, 3)) for _ in range(queries)]
+    workload = [rng.choice(distinct[:max(1, i)]) if rng.random() < repeat else distinct[i] for i in range(queries)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    before = counts()
+
+    async def one(query: str):
+        results = [
+            {"id": f"{query}:{i}", "text": " ".join(rng.choices(WORDS, k=40)), "score": 1 - i / candidates, "source": ""}
+            for i in range(candidates)
+        ]
+        async with semaphore:
+            started = time.perf_counter()
+            await reranker.arerank(query, results, settings.RERANK_TOP_K)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(query) for query in workload))
+    after = counts()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        **{result: int(after[result] - before[result]) for result in after},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cross-encoder reranking under load")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per load level")
+    parser.add_argument("--candidates", type=int, default=settings.RERANK_CANDIDATES, help="Chunks reranked per query")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Concurrent queries")
+    parser.add_argument("--repeat", type=float, default=0.3, help="Fraction of queries repeating an earlier one")
+    parser.add_argument("--pair-ms", type=float, default=2.0, help="Simulated scoring cost per pair")
+    parser.add_argument("--model", default="", help="Real cross-encoder (e.g. RERANK_MODEL), needs fastembed")
+    args = parser.parse_args()
+
+    if args.model:
+        scorer = CrossEncoderScorer(args.model, settings.RERANK_BATCH_SIZE)
+        scorer("warm up", ["load the model"])
+    else:
+        scorer = simulated_scorer(args.pair_ms / 1000)
+
+    print(f"{args.candidates} candidates -> top {settings.RERANK_TOP_K}, "
+          f"budget {settings.RERANK_LATENCY_BUDGET_MS:.0f} ms, {settings.RERANK_MAX_CONCURRENT} concurrent reranks")
+    print(f"{'load':>5}{'p50 ms':>9}{'p99 ms':>9}{'reranked':>10}{'skipped':>9}{'cached':>8}")
+    for concurrency in args.concurrency:
+        reranker = Reranker(
+            scorer,
+            batch_size=settings.RERANK_BATCH_SIZE,
+            latency_budget_ms=settings.RERANK_LATENCY_BUDGET_MS,
+            max_concurrent=settings.RERANK_MAX_CONCURRENT,
+            cache_size=settings.RERANK_CACHE_SIZE,
+        )
+        result = asyncio.run(run(reranker, args.queries, args.candidates, concurrency, args.repeat, random.Random(7)))
+        print(f"{concurrency:>5}{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+              f"{result['reranked']:>10}{result['skipped']:>9}{result['cached']:>8}")
+
+
+if __name__ == "__main__":
+    main()
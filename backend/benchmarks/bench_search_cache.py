@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark the search cache on a repetitive query workload.
+
+Indexes synthetic scheme chunks into an in-memory Qdrant and replays queries
+drawn from a Zipf distribution (a few queries like "pm kisan" dominate, as in
+real traffic), with a fake embedder that sleeps for a simulated API
+round-trip. Runs the workload with the cache off and on; with --ingest-every
+N, a small batch is re-ingested every N queries, bumping the collection's
+content version. Queries alternate between two score thresholds so the
+embedding tier shows up separately from the result tier.
+
+Reports p50/p99 search latency, embedding calls and result/embedding hit
+rates.
+
+Usage:
+    python benchmarks/bench_search_cache.py [--queries 2000] [--distinct 300] [--ingest-every 500]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add backend directory to path to import our modules
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from services.embeddings import BatchEmbedder
+from services.qdrant_service import QdrantService
+from services.search_cache import SearchCache
+
+DIMENSION = 768
+WORDS = (
+    "subsidy irrigation farmers loan insurance crop seed fertilizer drip organic credit pension "
+    "tractor solar pump storage market dairy fisheries horticulture sprinkler soil testing"
+).split()
+
+
+def fake_embedder(rtt_seconds: float, calls: list):
+    def embed(texts, task_type):
+        time.sleep(rtt_seconds)
+        calls.append(len(texts))
+        vectors = []
+        for text in texts:
+            rng = random.Random(text.lower())
+            vectors.append([rng.uniform(-1, 1) for _ in range(DIMENSION)])
+        return vectors
+
+    return embed
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(cached: bool, args, documents, workload):
+    calls = []
+    embedder = BatchEmbedder(embed_batch=fake_embedder(args.embed_ms / 1000, calls), requests_per_minute=0)
+    service = QdrantService(use_memory=True, embedder=embedder)
+    service.reranker = None
+    service.search_cache = SearchCache() if cached else None
+    service.create_collection("bench")
+    service.add_documents(documents, "bench")
+    calls.clear()
+
+    latencies = []
+    for i, query in enumerate(workload):
+        if args.ingest_every and i and i % args.ingest_every == 0:
+            service.add_documents(documents[:10], "bench")
+        started = time.perf_counter()
+        service.search(query, "bench", top_k=5, score_threshold=0.0 if i % 2 else 0.1)
+        latencies.append(time.perf_counter() - started)
+
+    result = {
+        "mode": "cache" if cached else "no cache",
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "embed_calls": len(calls),
+        "result_hits": 0.0,
+        "embedding_hits": 0.0,
+    }
+    if cached:
+        result["result_hits"] = service.search_cache.results.hit_rate
+        result["embedding_hits"] = service.search_cache.embeddings.hit_rate
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the version-aware search cache")
+    parser.add_argument("--docs", type=int, default=2000, help="Synthetic scheme chunks")
+    parser.add_argument("--queries", type=int, default=2000, help="Queries replayed")
+    parser.add_argument("--distinct", type=int, default=300, help="Distinct queries in the workload")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of query popularity")
+    parser.add_argument("--embed-ms", type=float, default=80.0, help="Simulated embedding round-trip")
+    parser.add_argument("--ingest-every", type=int, default=500, help="Re-ingest (bump version) every N queries; 0 = never")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    documents = [{"id": i, "text": " ".join(rng.choices(WORDS, k=30)), "source": "synthetic.pdf"} for i in range(args.docs)]
+    distinct = [" ".join(rng.sample(WORDS, 3)) for _ in range(args.distinct)]
+    weights = [1 / (rank + 1) ** args.zipf for rank in range(args.distinct)]
+    # Same query in different case/spacing still hits the cache
+    workload = [
+        query.upper() if rng.random() < 0.1 else query
+        for query in rng.choices(distinct, weights=weights, k=args.queries)
+    ]
+
+    print(f"{'mode':<10}{'p50 ms':>9}{'p99 ms':>9}{'embeds':>8}{'result hits':>13}{'embed hits':>12}")
+    for cached in (False, True):
+        result = run(cached, args, documents, workload)
+        print(f"{result['mode']:<10}{result['p50_ms']:>9.2f}{result['p99_ms']:>9.2f}{result['embed_calls']:>8}"
+              f"{result['result_hits']:>13.1%}{result['embedding_hits']:>12.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark bringing up a node's scheme collection: re-embedding the corpus
+vs. restoring a snapshot.
+
+Indexes synthetic chunks into embedded on-disk Qdrant with a fake embedder
+that sleeps for a simulated API round-trip per batch, exports a snapshot,
+then restores it into a fresh storage directory. Reports time and embedding
+calls for each path and the snapshot size, and checks that a search on the
+restored collection returns the same hits.
+
+Usage:
+    python benchmarks/bench_snapshot_bootstrap.py [--chunks 5000] [--rtt-ms 120]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend directory to path to import our modules
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from services.embeddings import BatchEmbedder
+from services.qdrant_service import QdrantService
+
+DIMENSION = 768
+WORDS = (
+    "subsidy irrigation farmers loan insurance crop seed fertilizer drip organic credit pension "
+    "tractor solar pump storage market dairy fisheries horticulture sprinkler soil testing"
+).split()
+
+
+def fake_embedder(rtt_seconds: float, calls: list):
+    def embed(texts, task_type):
+        time.sleep(rtt_seconds)
+        calls.append(len(texts))
+        vectors = []
+        for text in texts:
+            rng = random.Random(text)
+            vectors.append([rng.uniform(-1, 1) for _ in range(DIMENSION)])
+        return vectors
+
+    return embed
+
+
+def open_service(path: str, rtt_seconds: float, calls: list) -> QdrantService:
+    embedder = BatchEmbedder(
+        embed_batch=fake_embedder(rtt_seconds, calls), requests_per_minute=0, model="bench-embedder",
+        dimension=DIMENSION
+    )
+    service = QdrantService(embedder=embedder, local_path=path)
+    service.search_cache = None
+    return service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark snapshot restore vs re-embedding")
+    parser.add_argument("--chunks", type=int, default=5000, help="Synthetic scheme chunks")
+    parser.add_argument("--rtt-ms", type=float, default=120.0, help="Simulated embedding round-trip per batch")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    documents = [
+        {"id": i, "text": " ".join(rng.choices(WORDS, k=60)), "source": "synthetic.pdf"}
+        for i in range(args.chunks)
+    ]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        snapshot = os.path.join(workdir, "government_schemes.snapshot.gz")
+
+        calls = []
+        source = open_service(os.path.join(workdir, "source"), args.rtt_ms / 1000, calls)
+        started = time.perf_counter()
+        source.create_collection("bench")
+        source.add_documents(documents, "bench")
+        build_seconds = time.perf_counter() - started
+        build_calls = len(calls)
+
+        started = time.perf_counter()
+        source.export_snapshot(snapshot, "bench")
+        export_seconds = time.perf_counter() - started
+        expected = [hit["id"] for hit in source.search("drip irrigation subsidy", "bench", score_threshold=0.0)]
+        source.close()
+
+        calls = []
+        target = open_service(os.path.join(workdir, "target"), args.rtt_ms / 1000, calls)
+        started = time.perf_counter()
+        restored = target.import_snapshot(snapshot, "bench")
+        restore_seconds = time.perf_counter() - started
+        restore_calls = len(calls)
+        actual = [hit["id"] for hit in target.search("drip irrigation subsidy", "bench", score_threshold=0.0)]
+        target.close()
+
+        print(f"{'path':<12}{'seconds':>9}{'embed calls':>13}")
+        print(f"{'re-embed':<12}{build_seconds:>9.1f}{build_calls:>13}")
+        print(f"{'restore':<12}{restore_seconds:>9.1f}{restore_calls:>13}")
+        print(f"snapshot: {restored} points, {os.path.getsize(snapshot) / 1048576:.1f} MB, "
+              f"exported in {export_seconds:.1f}s; same search hits: {expected == actual}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,16 @@ class Settings:
     
     # Storage Configuration
     UPLOAD_BUCKET: str = os.getenv("UPLOAD_BUCKET", "kisan-uploads-bucket")
+    STORAGE_EMULATOR_HOST: str = os.getenv("STORAGE_EMULATOR_HOST", "")  # e.g. http://localhost:4443 (fake-gcs-server)
+    SIGNED_URL_TTL_SECONDS: int = int(os.getenv("SIGNED_URL_TTL_SECONDS", "604800"))  # 7 days (V4 maximum)
+    SIGNED_UPLOAD_TTL_SECONDS: int = int(os.getenv("SIGNED_UPLOAD_TTL_SECONDS", "900"))
+    
+    # Storage backend: "gcp" (Cloud Storage + Firestore) or "local" (filesystem + SQLite)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "gcp").lower()
+    LOCAL_STORAGE_PATH: str = os.getenv("LOCAL_STORAGE_PATH", "local_storage")
+    LOCAL_DOCUMENT_DB: str = os.getenv("LOCAL_DOCUMENT_DB", "local_storage/documents.db")
+    LOCAL_STORAGE_BASE_URL: str = os.getenv("LOCAL_STORAGE_BASE_URL", "http://localhost:8084")  # Public URL of this API
+    LOCAL_STORAGE_SECRET: str = os.getenv("LOCAL_STORAGE_SECRET", "")  # Signs local URLs; set when running several workers
     
     # Firebase Configuration
     FIREBASE_PROJECT_ID: str = os.getenv("FIREBASE_PROJECT_ID", "")
@@ -33,6 +43,13 @@ class Settings:
     GEMINI_MAX_TOKENS: int = int(os.getenv("GEMINI_MAX_TOKENS", "8192"))
     GEMINI_TOP_P: float = float(os.getenv("GEMINI_TOP_P", "0.8"))
     
+    # Rolling history summarization (recent messages verbatim, older ones summarized; opt-in)
+    HISTORY_COMPACTION_ENABLED: bool = os.getenv("HISTORY_COMPACTION_ENABLED", "false").lower() == "true"
+    HISTORY_KEEP_MESSAGES: int = int(os.getenv("HISTORY_KEEP_MESSAGES", "6"))
+    HISTORY_SUMMARY_TRIGGER_TOKENS: int = int(os.getenv("HISTORY_SUMMARY_TRIGGER_TOKENS", "1500"))
+    HISTORY_SUMMARY_MODEL: str = os.getenv("HISTORY_SUMMARY_MODEL", "gemini-2.5-flash")
+    HISTORY_SUMMARY_MAX_TOKENS: int = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "512"))
+    
     # App Configuration
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
     HOST: str = os.getenv("HOST", "0.0.0.0")
@@ -48,6 +65,38 @@ class Settings:
     RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
     RATE_LIMIT_BURST: int = int(os.getenv("RATE_LIMIT_BURST", "10"))
     
+    # Image normalization before Gemini and storage (orient, strip metadata, downsize, re-encode)
+    NORMALIZE_IMAGES: bool = os.getenv("NORMALIZE_IMAGES", "true").lower() == "true"
+    IMAGE_MAX_DIMENSION: int = int(os.getenv("IMAGE_MAX_DIMENSION", "1536"))
+    IMAGE_QUALITY: int = int(os.getenv("IMAGE_QUALITY", "85"))
+    IMAGE_OUTPUT_MIME_TYPE: str = os.getenv("IMAGE_OUTPUT_MIME_TYPE", "image/jpeg")  # or image/webp
+    
+    # Reuse diagnoses for near-duplicate images (pHash + dHash within a Hamming distance)
+    IMAGE_DEDUP_ENABLED: bool = os.getenv("IMAGE_DEDUP_ENABLED", "true").lower() == "true"
+    IMAGE_DEDUP_DB: str = os.getenv("IMAGE_DEDUP_DB", "image_dedup.db")
+    IMAGE_DEDUP_MAX_DISTANCE: int = int(os.getenv("IMAGE_DEDUP_MAX_DISTANCE", "6"))  # bits out of 64
+    IMAGE_DEDUP_MAX_ENTRIES: int = int(os.getenv("IMAGE_DEDUP_MAX_ENTRIES", "5000"))
+    IMAGE_DEDUP_TTL_SECONDS: float = float(os.getenv("IMAGE_DEDUP_TTL_SECONDS", "2592000"))  # 30 days
+    
+    # Background persistence queue (Firestore writes after the response)
+    PERSISTENCE_DEFER_WRITES: bool = os.getenv("PERSISTENCE_DEFER_WRITES", "true").lower() == "true"
+    PERSISTENCE_QUEUE_SIZE: int = int(os.getenv("PERSISTENCE_QUEUE_SIZE", "1000"))
+    PERSISTENCE_WORKERS: int = int(os.getenv("PERSISTENCE_WORKERS", "4"))
+    PERSISTENCE_MAX_RETRIES: int = int(os.getenv("PERSISTENCE_MAX_RETRIES", "5"))
+    PERSISTENCE_RETRY_BASE_SECONDS: float = float(os.getenv("PERSISTENCE_RETRY_BASE_SECONDS", "0.5"))
+    PERSISTENCE_SPILL_PATH: str = os.getenv("PERSISTENCE_SPILL_PATH", "persistence_spill.jsonl")
+    
+    # Firestore write-behind buffer (conversation logs and user context, committed in batches).
+    # Opt-in: buffered writes live only in process memory until the next flush, so a crash loses them
+    FIRESTORE_WRITE_BEHIND: bool = os.getenv("FIRESTORE_WRITE_BEHIND", "false").lower() == "true"
+    FIRESTORE_BATCH_MAX_OPS: int = int(os.getenv("FIRESTORE_BATCH_MAX_OPS", "500"))  # Firestore maximum
+    FIRESTORE_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("FIRESTORE_FLUSH_INTERVAL_SECONDS", "1.0"))
+    
+    # Read-through caches (REDIS_URL enables a tier shared between workers; needs the redis package)
+    USER_CONTEXT_CACHE_SIZE: int = int(os.getenv("USER_CONTEXT_CACHE_SIZE", "10000"))
+    USER_CONTEXT_CACHE_TTL_SECONDS: float = float(os.getenv("USER_CONTEXT_CACHE_TTL_SECONDS", "300"))
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
+    
     # Logging & Monitoring
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     ENABLE_METRICS: bool = os.getenv("ENABLE_METRICS", "true").lower() == "true"
@@ -57,13 +106,81 @@ class Settings:
     QDRANT_PORT: int = int(os.getenv("QDRANT_PORT", "6333"))
     QDRANT_URL: str = os.getenv("QDRANT_URL", "")  # For Qdrant Cloud
     QDRANT_API_KEY: str = os.getenv("QDRANT_API_KEY", "")  # For Qdrant Cloud
+    QDRANT_EMBEDDED: bool = os.getenv("QDRANT_EMBEDDED", "false").lower() == "true"  # skip the server, use QDRANT_LOCAL_PATH
+    QDRANT_LOCAL_PATH: str = os.getenv("QDRANT_LOCAL_PATH", "qdrant_local")  # embedded on-disk storage (also the fallback)
+    QDRANT_SNAPSHOT_PATH: str = os.getenv("QDRANT_SNAPSHOT_PATH", "")  # restored into an empty collection at startup
     QDRANT_COLLECTION_NAME: str = os.getenv("QDRANT_COLLECTION_NAME", "government_schemes")
+    QDRANT_META_COLLECTION: str = os.getenv("QDRANT_META_COLLECTION", "kisanvaani_meta")  # content versions
+    QDRANT_COLLECTION_PROFILE: str = os.getenv("QDRANT_COLLECTION_PROFILE", "balanced")  # fast, balanced, accurate
+    QDRANT_UPSERT_BATCH_SIZE: int = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "256"))
+    QDRANT_UPSERT_PARALLEL: int = int(os.getenv("QDRANT_UPSERT_PARALLEL", "4"))
+    QDRANT_UPSERT_MAX_RETRIES: int = int(os.getenv("QDRANT_UPSERT_MAX_RETRIES", "3"))
+    QDRANT_UPSERT_RETRY_BASE_SECONDS: float = float(os.getenv("QDRANT_UPSERT_RETRY_BASE_SECONDS", "1.0"))
+    QDRANT_UPSERT_RETRY_MAX_SECONDS: float = float(os.getenv("QDRANT_UPSERT_RETRY_MAX_SECONDS", "30"))  # backoff cap
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "google")  # google, local
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "models/embedding-001")
+    LOCAL_EMBEDDING_MODEL: str = os.getenv("LOCAL_EMBEDDING_MODEL", "intfloat/multilingual-e5-large")  # any fastembed model
+    LOCAL_EMBEDDING_BATCH_SIZE: int = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32"))
+    LOCAL_EMBEDDING_THREADS: int = int(os.getenv("LOCAL_EMBEDDING_THREADS", "0"))  # 0 = all cores
+    LOCAL_EMBEDDING_CACHE_DIR: str = os.getenv("LOCAL_EMBEDDING_CACHE_DIR", "")  # model download dir
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))  # batchEmbedContents limit
+    EMBEDDING_CONCURRENCY: int = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+    EMBEDDING_REQUESTS_PER_MINUTE: float = float(os.getenv("EMBEDDING_REQUESTS_PER_MINUTE", "1500"))
+    EMBEDDING_MAX_RETRIES: int = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+    EMBEDDING_CACHE_ENABLED: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_DB: str = os.getenv("EMBEDDING_CACHE_DB", "embedding_cache.db")
+    EMBEDDING_CACHE_MEMORY_SIZE: int = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "20000"))
+    HYBRID_SEARCH_ENABLED: bool = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+    HYBRID_PREFETCH_MULTIPLIER: int = int(os.getenv("HYBRID_PREFETCH_MULTIPLIER", "4"))  # candidates per leg = top_k * this
+    BM25_K1: float = float(os.getenv("BM25_K1", "1.2"))
+    BM25_B: float = float(os.getenv("BM25_B", "0.75"))
+    BM25_AVG_DOC_LENGTH: float = float(os.getenv("BM25_AVG_DOC_LENGTH", "80"))  # terms in a 512-char chunk
+    RERANK_ENABLED: bool = os.getenv("RERANK_ENABLED", "false").lower() == "true"  # needs fastembed
+    RERANK_MODEL: str = os.getenv("RERANK_MODEL", "jinaai/jina-reranker-v2-base-multilingual")
+    RERANK_CANDIDATES: int = int(os.getenv("RERANK_CANDIDATES", "30"))  # chunks fetched from Qdrant before reranking
+    RERANK_TOP_K: int = int(os.getenv("RERANK_TOP_K", "3"))  # chunks the scheme tool returns after reranking
+    RERANK_BATCH_SIZE: int = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+    RERANK_LATENCY_BUDGET_MS: float = float(os.getenv("RERANK_LATENCY_BUDGET_MS", "300"))
+    RERANK_MAX_CONCURRENT: int = int(os.getenv("RERANK_MAX_CONCURRENT", "2"))
+    RERANK_CACHE_SIZE: int = int(os.getenv("RERANK_CACHE_SIZE", "512"))
+    RERANK_CACHE_TTL_SECONDS: float = float(os.getenv("RERANK_CACHE_TTL_SECONDS", "600"))
+    SEARCH_CACHE_ENABLED: bool = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+    SEARCH_CACHE_SIZE: int = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))  # cached result lists
+    SEARCH_CACHE_EMBEDDING_SIZE: int = int(os.getenv("SEARCH_CACHE_EMBEDDING_SIZE", "4096"))  # cached query vectors
+    SEARCH_CACHE_TTL_SECONDS: float = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "300"))
+    SEARCH_CACHE_VERSION_CHECK_SECONDS: float = float(os.getenv("SEARCH_CACHE_VERSION_CHECK_SECONDS", "5"))
+    EMBEDDING_QUERY_LOG: str = os.getenv("EMBEDDING_QUERY_LOG", "")  # JSON lines of search queries, for warm-up
     
     # Speech Enhancement
     SPEECH_ENHANCEMENT: bool = os.getenv("SPEECH_ENHANCEMENT", "true").lower() == "true"
     NOISE_REDUCTION: bool = os.getenv("NOISE_REDUCTION", "true").lower() == "true"
     
+    # Default TTS audio profile when the client sends no hint ("standard", "low", "minimal")
+    DEFAULT_AUDIO_PROFILE: str = os.getenv("DEFAULT_AUDIO_PROFILE", "standard")
+    
+    # Prebuilt TTS audio packs (see prewarm_tts.py)
+    AUDIO_PACK_DIR: str = os.getenv("AUDIO_PACK_DIR", "audio_packs")
+    TTS_PREWARM_CONCURRENCY: int = int(os.getenv("TTS_PREWARM_CONCURRENCY", "4"))
+    AUDIO_PACK_BASE_URL: str = os.getenv("AUDIO_PACK_BASE_URL", LOCAL_STORAGE_BASE_URL)  # Public URL serving /audio-pack
+    
+    # Blob retention sweeper, run by sweep_blobs.py (see services/retention.py)
+    BLOB_SWEEP_BATCH_SIZE: int = int(os.getenv("BLOB_SWEEP_BATCH_SIZE", "100"))  # GCS batch request limit
+    BLOB_SWEEP_DRY_RUN: bool = os.getenv("BLOB_SWEEP_DRY_RUN", "false").lower() == "true"
+    # Reused TTS objects refresh their custom_time at most this often, so the sweeper keeps them
+    TTS_TOUCH_INTERVAL_SECONDS: float = float(os.getenv("TTS_TOUCH_INTERVAL_SECONDS", "86400"))
+    
+    @property
+    def BLOB_RETENTION_DAYS(self) -> dict:
+        """Parse BLOB_RETENTION_DAYS ({"prefix/": days}) from environment variable"""
+        default = {"tts/": 30, "uploads/audio/": 7, "uploads/images/": 30}
+        try:
+            policies = json.loads(os.getenv("BLOB_RETENTION_DAYS", ""))
+            if isinstance(policies, dict):
+                return {prefix: float(days) for prefix, days in policies.items()}
+        except (json.JSONDecodeError, TypeError, ValueError):
+            pass
+        return default
+    
     # CORS Configuration
     @property
     def ALLOWED_ORIGINS(self) -> list:
@@ -1,7 +1,9 @@
+import asyncio
 import base64
 import io
-from fastapi import FastAPI, File, Form, UploadFile, HTTPException
-from fastapi.responses import JSONResponse, StreamingResponse
+import mimetypes
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import httpx
 from pydantic import BaseModel
@@ -17,6 +19,23 @@ except Exception:
     root_agent = None
 from typing import Any
 from typing import Optional
+from config.settings import settings
+from services.audio_pack import get_audio_pack
+from services.audio_profiles import (
+    build_audio_config,
+    content_type_for,
+    profile_audio_params,
+    select_audio_profile,
+)
+from services.firestore_writer import get_write_behind_buffer
+from services.image_dedup import get_image_dedup_index, image_hashes, prompt_key
+from services.image_processing import normalize_image
+from services.metrics import BYTE_BUCKETS, metrics
+from services.persistence_queue import get_persistence_queue
+from services.qdrant_service import bootstrap_from_snapshot, close_async_qdrant_service
+from services.signed_urls import create_upload, gcs_uri, get_upload_bucket, validate_upload_key
+from services.storage_backend import is_local_backend, verify_local_url
+from services.tts_cache import TTS_CACHE_CONTROL, packed_or_synthesized
 
 # --- FastAPI App Initialization ---
 app = FastAPI(
@@ -33,23 +52,66 @@ app.add_middleware(
     allow_methods=["*"],  # Allow all methods
     allow_headers=["*"],  # Allow all headers
 )
+
+@app.on_event("startup")
+async def load_audio_pack():
+    """Memory-map the prebuilt TTS audio pack so fallback phrases skip synthesis."""
+    get_audio_pack()
+
+
+@app.on_event("startup")
+async def start_persistence_queue():
+    """Run uploads and Firestore writes in the background, after responses are sent."""
+    await get_persistence_queue().start()
+    if settings.FIRESTORE_WRITE_BEHIND:
+        await get_write_behind_buffer().start()
+
+
+@app.on_event("startup")
+async def restore_qdrant_snapshot():
+    """Restore an empty scheme collection from QDRANT_SNAPSHOT_PATH, without embedding calls."""
+    if settings.QDRANT_SNAPSHOT_PATH:
+        await asyncio.to_thread(bootstrap_from_snapshot)
+
+
+@app.on_event("shutdown")
+async def close_qdrant_client():
+    await close_async_qdrant_service()
+
+
+@app.on_event("shutdown")
+async def stop_persistence_queue():
+    """Flush buffered Firestore writes, then drain the queue; leftovers spill to disk."""
+    # Failed batch commits fall back to the queue, so flush before stopping it
+    await get_write_behind_buffer().stop()
+    await get_persistence_queue().stop()
+
+
 # --- Pydantic Models for Response ---
 class ChatResponse(BaseModel):
     text_response: str
     audio_response_base64: str
+    audio_mime_type: str = "audio/mpeg"
+    audio_profile: str = "standard"
 
 # --- Placeholder Functions for Gemini/Vertex AI ---
 
-async def recognize_speech_to_text(audio_bytes: bytes) -> str:
+async def recognize_speech_to_text(audio_bytes: bytes = None, audio_uri: str = None) -> str:
     """
     Simulates a call to the Gemini/Vertex AI Speech-to-Text API.
     In a real implementation, you would use the Google Cloud client library.
+
+    Pass `audio_uri` (gs://...) for directly uploaded recordings so the audio
+    is read by Speech-to-Text in place instead of through this process.
     """
     print("--- Sending audio to Gemini STT (Simulated) ---")
     # This is a placeholder. A real implementation would look like this:
     #    
     client = speech.SpeechClient()
-    audio = speech.RecognitionAudio(content=audio_bytes)
+    if audio_uri:
+        audio = speech.RecognitionAudio(uri=audio_uri)
+    else:
+        audio = speech.RecognitionAudio(content=audio_bytes)
     config = speech.RecognitionConfig(
         encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
         sample_rate_hertz=16000,
@@ -61,27 +123,38 @@ async def recognize_speech_to_text(audio_bytes: bytes) -> str:
     return response.results[0].alternatives[0].transcript
 
 
-async def synthesize_text_to_speech(text: str) -> bytes:
+# Voice and audio parameters of the chat endpoint's TTS (used for audio pack keys)
+API_TTS_VOICE = {"language_code": "en-US", "ssml_gender": "NEUTRAL"}
+API_AUDIO_PARAMS = {"audio_encoding": "MP3"}
+
+
+async def synthesize_text_to_speech(text: str, audio_profile: str = "standard") -> bytes:
     """
     Simulates a call to the Gemini/Vertex AI Text-to-Speech API.
     In a real implementation, you would use the Google Cloud client library.
+
+    `audio_profile` selects the output encoding (see services.audio_profiles).
+    Fixed phrases found in the prebuilt audio pack are returned without a TTS call.
     """
     print(f"--- Sending text to Gemini TTS (Simulated): '{text}' ---")
     # This is a placeholder. A real implementation would look like this:
     #
     
-    client = texttospeech.TextToSpeechClient()
-    synthesis_input = texttospeech.SynthesisInput(text=text)
-    voice = texttospeech.VoiceSelectionParams(
-        language_code="en-US", ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL
-    )
-    audio_config = texttospeech.AudioConfig(
-        audio_encoding=texttospeech.AudioEncoding.MP3
-    )
-    response = client.synthesize_speech(
-        input=synthesis_input, voice=voice, audio_config=audio_config
-    )
-    return response.audio_content
+    audio_params = profile_audio_params(audio_profile, API_AUDIO_PARAMS)
+
+    def synthesize() -> bytes:
+        client = texttospeech.TextToSpeechClient()
+        synthesis_input = texttospeech.SynthesisInput(text=text)
+        voice = texttospeech.VoiceSelectionParams(
+            language_code="en-US", ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL
+        )
+        audio_config = build_audio_config(audio_params)
+        response = client.synthesize_speech(
+            input=synthesis_input, voice=voice, audio_config=audio_config
+        )
+        return response.audio_content
+
+    return packed_or_synthesized(text, API_TTS_VOICE, audio_params, synthesize)
 
 
 # --- External API Call Function ---
@@ -89,7 +162,7 @@ try:
     from vertexai.preview import reasoning_engines  # type: ignore
 except Exception:
     reasoning_engines = None
-def run_vertex_agent_local(text:str):
+def run_vertex_agent_local(text:str, initial_state: Optional[dict] = None):
 
     final_response = ""
 
@@ -103,7 +176,8 @@ def run_vertex_agent_local(text:str):
             enable_tracing=True,
         )
 
-        session = app.create_session(user_id="u_456")
+        # Farmer profile (location, language) for tools such as the scheme search filters
+        session = app.create_session(user_id="u_456", state=initial_state or {})
 
         for event in app.stream_query(
             user_id="u_456",
@@ -123,12 +197,10 @@ def run_vertex_agent_local(text:str):
         return get_demo_response(text)
 
 
-def get_demo_response(text: str) -> str:
-    """Return a helpful demo response when the AI agent is unavailable."""
-    text_lower = text.lower()
-    
-    if any(word in text_lower for word in ['scheme', 'yojana', 'subsidy', 'pm kisan']):
-        return """🌾 **Government Schemes for Farmers**
+# Fixed demo responses served when the AI agent is unavailable
+# (prewarmed into the TTS audio pack by prewarm_tts.py)
+DEMO_RESPONSES = {
+    "schemes": """🌾 **Government Schemes for Farmers**
 
 Here are some important schemes available for farmers:
 
@@ -147,28 +219,25 @@ Here are some important schemes available for farmers:
 
 📋 For Karnataka-specific schemes, visit: https://raitamitra.karnataka.gov.in/english
 
-Note: This is a demo response. For personalized assistance, please configure valid GCP credentials."""
+Note: This is a demo response. For personalized assistance, please configure valid GCP credentials.""",
 
-    elif any(word in text_lower for word in ['weather', 'rain', 'temperature', 'forecast']):
-        return """🌤️ **Weather Information**
+    "weather": """🌤️ **Weather Information**
 
 For accurate weather forecasts for your area, please check:
 - IMD: https://mausam.imd.gov.in
 - Skymet: https://www.skymetweather.com
 
-Note: This is a demo response. Configure GCP credentials for live weather data."""
+Note: This is a demo response. Configure GCP credentials for live weather data.""",
 
-    elif any(word in text_lower for word in ['price', 'market', 'mandi', 'rate']):
-        return """📊 **Market Price Information**
+    "market": """📊 **Market Price Information**
 
 Check current agricultural commodity prices at:
 - Agmarknet: https://agmarknet.gov.in
 - eNAM: https://enam.gov.in
 
-Note: This is a demo response. Configure GCP credentials for live market data."""
+Note: This is a demo response. Configure GCP credentials for live market data.""",
 
-    elif any(word in text_lower for word in ['disease', 'pest', 'leaf', 'plant', 'crop']):
-        return """🌱 **Plant Health Assistance**
+    "plant_health": """🌱 **Plant Health Assistance**
 
 For plant disease diagnosis:
 1. Take clear photos of affected parts
@@ -179,7 +248,25 @@ Common resources:
 - ICAR Portal: https://icar.org.in
 - Plantix App for disease identification
 
-Note: This is a demo response. Configure GCP credentials for AI-powered diagnosis."""
+Note: This is a demo response. Configure GCP credentials for AI-powered diagnosis.""",
+}
+
+
+def get_demo_response(text: str) -> str:
+    """Return a helpful demo response when the AI agent is unavailable."""
+    text_lower = text.lower()
+    
+    if any(word in text_lower for word in ['scheme', 'yojana', 'subsidy', 'pm kisan']):
+        return DEMO_RESPONSES["schemes"]
+
+    elif any(word in text_lower for word in ['weather', 'rain', 'temperature', 'forecast']):
+        return DEMO_RESPONSES["weather"]
+
+    elif any(word in text_lower for word in ['price', 'market', 'mandi', 'rate']):
+        return DEMO_RESPONSES["market"]
+
+    elif any(word in text_lower for word in ['disease', 'pest', 'leaf', 'plant', 'crop']):
+        return DEMO_RESPONSES["plant_health"]
 
     else:
         return f"""🙏 **Namaskara! Welcome to KisanVaani**
@@ -202,6 +289,11 @@ Try asking about:
 """
 
 
+def is_demo_response(text: str) -> bool:
+    """Whether `text` is a fallback demo response rather than an agent answer."""
+    return "This is a demo response." in text
+
+
 def run_vertex_agent_deployed(text: str, initial_state: dict) -> str:
     if agent_engines is None:
         return f"[stub] {text}"
@@ -227,7 +319,7 @@ async def call_external_api(text: str,initial_state:dict) -> str:
     print(f"--- Calling External API with text: '{text}' ---")
     try:
         # Use local agent instead of deployed one
-        response_final = run_vertex_agent_local(text)
+        response_final = run_vertex_agent_local(text, initial_state)
         return response_final
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"External API processing failed: {exc}")
@@ -239,11 +331,55 @@ class KisanChatSchema(BaseModel):
     text: str 
     audio_file: Optional[Any]
     image: Optional[Any]
+    audio_key: Optional[str] = None  # object key from /api/uploads/sign (direct upload)
+    image_key: Optional[str] = None  # object key from /api/uploads/sign (direct upload)
     city: Optional[str] = "Bangalore"
     name: Optional[str] = ""
     country: Optional[str] = ""
     state: Optional[str] = ""
     preferred_language: Optional[str] = ""
+    audio_profile: Optional[str] = None  # "standard", "low" or "minimal"; inferred from headers if unset
+
+async def dedup_key(image_bytes: bytes, text: str, request: dict):
+    """Perceptual hashes and prompt key for diagnosis reuse, or None if hashing fails."""
+    try:
+        hashes = await asyncio.to_thread(image_hashes, image_bytes)
+    except Exception as e:
+        print(f"Warning: image hashing failed (diagnosis will not be reused): {e}")
+        return None
+    # Diagnoses are personalized, so only the same farmer may reuse one
+    user = "\n".join(request.get(field) or "" for field in ("name", "city", "state", "country"))
+    return hashes, prompt_key(text, request.get("preferred_language") or "", user)
+
+
+async def prepare_image(image_bytes: bytes, mime_type: str, text: str, request: dict):
+    """
+    Normalize an image for Gemini and compute its dedup key.
+
+    Returns:
+        (image bytes, MIME type, dedup key or None)
+    """
+    if settings.NORMALIZE_IMAGES:
+        try:
+            normalized = await asyncio.to_thread(normalize_image, image_bytes)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        image_bytes, mime_type = normalized["data"], normalized["mime_type"]
+    image_dedup = None
+    if settings.IMAGE_DEDUP_ENABLED:
+        image_dedup = await dedup_key(image_bytes, text, request)
+    return image_bytes, mime_type, image_dedup
+
+
+async def download_upload(object_key: str) -> bytes:
+    """Read a directly uploaded object, refusing ones over MAX_UPLOAD_SIZE."""
+    blob = await asyncio.to_thread(get_upload_bucket().get_blob, object_key)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Uploaded file not found.")
+    if blob.size is not None and blob.size > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail="Upload too large.")
+    return await asyncio.to_thread(blob.download_as_bytes)
+
 
 def create_initial_dict(request):
     state_init = {
@@ -264,26 +400,48 @@ def create_initial_dict(request):
     return state_init["state"]
 
 @app.post("/api/chat_endpoint")
-async def chat_endpoint(request: KisanChatSchema):
+async def chat_endpoint(request: KisanChatSchema, http_request: Request):
     """
     This endpoint handles both text and audio chat requests.
 
     - **To send text:** Use a form field named `text`.
     - **To send audio:** Upload a file to a form field named `audio_file`.
+    - **Audio quality:** Set `audio_profile`, or send the `X-Audio-Profile`,
+      `Save-Data`, `ECT` or `Downlink` headers to get smaller Opus audio on
+      slow networks.
 
     The endpoint processes the input, calls an external API, and returns
     both a text response and a synthesized audio response.
     """
     # text = "whats weather in delhi today"
     input_text = ""
+    # (hashes, prompt key) of an image eligible for diagnosis reuse
+    image_dedup = None
 
     # 1. Determine request type and get input text
     requests = request.dict()
     text = requests["text"]
     audio_file = requests["audio_file"]
     image = requests["image"]
-
-    if audio_file:
+    audio_key = requests.get("audio_key")
+    image_key = requests.get("image_key")
+
+    if audio_key:
+        print("--- Received uploaded audio key ---")
+        try:
+            audio_key = validate_upload_key(audio_key, "audio")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        try:
+            if is_local_backend():
+                # Speech-to-Text can't read local storage; send the bytes inline
+                audio_bytes = get_upload_bucket().blob(audio_key).download_as_bytes()
+                input_text = await recognize_speech_to_text(audio_bytes)
+            else:
+                input_text = await recognize_speech_to_text(audio_uri=gcs_uri(settings.UPLOAD_BUCKET, audio_key))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Speech-to-Text processing failed: {e}")
+    elif audio_file:
         print("--- Received audio file ---")
         # Handle base64 encoded audio from JSON request
         if isinstance(audio_file, str):
@@ -306,10 +464,13 @@ async def chat_endpoint(request: KisanChatSchema):
         # Handle base64 encoded image from JSON request
         if isinstance(image, str):
             # Image is already base64 encoded from frontend
-            base64_image = image
+            image_bytes = base64.b64decode(image)
         else:
             # Handle traditional file upload (if needed for compatibility)  
-            base64_image = base64.b64encode(image).decode('utf-8')
+            image_bytes = image
+        
+        image_bytes, image_mime_type, image_dedup = await prepare_image(image_bytes, "image/jpeg", text, requests)
+        base64_image = base64.b64encode(image_bytes).decode('utf-8')
         
         content_dict = {
             "role": "user",
@@ -317,14 +478,49 @@ async def chat_endpoint(request: KisanChatSchema):
                 {"text": text},
                 {
                     "inline_data": {
-                        "mime_type": "image/jpeg",
+                        "mime_type": image_mime_type,
                         "data": base64_image
                     }
                 }
             ]
         }
         input_text = content_dict
-    elif image:
+    elif image_key and text.strip():
+        print("--- Received uploaded image key with text ---")
+        try:
+            image_key = validate_upload_key(image_key, "image")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        image_mime_type = mimetypes.guess_type(image_key)[0] or "image/jpeg"
+        if is_local_backend() or settings.NORMALIZE_IMAGES or settings.IMAGE_DEDUP_ENABLED:
+            # Same pipeline as inline images: normalize, hash for reuse, send inline
+            # (Gemini can't read local storage either)
+            image_bytes = await download_upload(image_key)
+            image_bytes, image_mime_type, image_dedup = await prepare_image(
+                image_bytes, image_mime_type, text, requests
+            )
+            image_part = {
+                "inline_data": {
+                    "mime_type": image_mime_type,
+                    "data": base64.b64encode(image_bytes).decode("utf-8")
+                }
+            }
+        else:
+            # Gemini reads the original from Cloud Storage; no bytes pass through here
+            image_part = {
+                "file_data": {
+                    "mime_type": image_mime_type,
+                    "file_uri": gcs_uri(settings.UPLOAD_BUCKET, image_key)
+                }
+            }
+        input_text = {
+            "role": "user",
+            "parts": [
+                {"text": text},
+                image_part
+            ]
+        }
+    elif image or image_key:
         raise HTTPException(status_code=422, detail=f"Please provide text with the image")
     elif text and text.strip(): # Fixed: Check if text exists and is not empty
         print("--- Received text input ---")
@@ -333,12 +529,25 @@ async def chat_endpoint(request: KisanChatSchema):
         raise HTTPException(status_code=400, detail="No valid input provided. Please send text, audio, or image with text.")
     # 2. Forward text to the external API
     initial_state_dict = create_initial_dict(requests)
-    external_api_response_text = await call_external_api(input_text, initial_state_dict)
+    cached_diagnosis = None
+    if image_dedup is not None:
+        cached_diagnosis = await asyncio.to_thread(get_image_dedup_index().lookup, *image_dedup)
+
+    if cached_diagnosis is not None:
+        print("--- Reusing diagnosis of a near-duplicate image ---")
+        external_api_response_text = cached_diagnosis["text_response"]
+    else:
+        external_api_response_text = await call_external_api(input_text, initial_state_dict)
+        if image_dedup is not None and not is_demo_response(external_api_response_text):
+            await asyncio.to_thread(
+                get_image_dedup_index().add, *image_dedup, {"text_response": external_api_response_text}
+            )
 
     # 3. Pass the response to the TTS model (optional - continue if it fails)
+    audio_profile = select_audio_profile(requests.get("audio_profile"), http_request.headers)
     final_audio_bytes = b""
     try:
-        final_audio_bytes = await synthesize_text_to_speech(external_api_response_text)
+        final_audio_bytes = await synthesize_text_to_speech(external_api_response_text, audio_profile)
         print(external_api_response_text)
     except Exception as e:
         print(f"Warning: Text-to-Speech processing failed (continuing without audio): {e}")
@@ -356,8 +565,13 @@ async def chat_endpoint(request: KisanChatSchema):
 
     response_data = ChatResponse(
         text_response=external_api_response_text,
-        audio_response_base64=audio_base64
+        audio_response_base64=audio_base64,
+        audio_mime_type=content_type_for(profile_audio_params(audio_profile, API_AUDIO_PARAMS)),
+        audio_profile=audio_profile
     )
+    metrics.observe("chat_audio_bytes", len(final_audio_bytes), buckets=BYTE_BUCKETS, profile=audio_profile)
+    metrics.observe("chat_response_bytes", len(audio_base64) + len(external_api_response_text.encode("utf-8")),
+                    buckets=BYTE_BUCKETS, profile=audio_profile)
 
     # You could also return a streaming response directly like this:
     # return StreamingResponse(io.BytesIO(final_audio_bytes), media_type="audio/mpeg")
@@ -365,12 +579,105 @@ async def chat_endpoint(request: KisanChatSchema):
     return JSONResponse(content=response_data.dict())
 
 
+# --- Direct upload signing ---
+
+class UploadSignRequest(BaseModel):
+    kind: str  # "image" or "audio"
+    content_type: str
+    user_id: Optional[str] = "anonymous"
+
+
+@app.post("/api/uploads/sign")
+def sign_upload(request: UploadSignRequest):
+    """
+    Reserve an object key and a short-lived signed URL for a direct upload.
+
+    The client sends the file straight to Cloud Storage using the returned
+    `method`, `upload_url` and `headers`, then passes `object_key` to
+    `/api/chat_endpoint` as `image_key` or `audio_key`.
+    """
+    expected_type = "image/" if request.kind == "image" else "audio/"
+    if not request.content_type.startswith(expected_type):
+        raise HTTPException(status_code=400, detail=f"Invalid content type for {request.kind} upload.")
+    try:
+        return create_upload(get_upload_bucket(), request.kind, request.user_id, request.content_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# --- Local storage backend (STORAGE_BACKEND=local) ---
+
+def _local_blob(bucket: str, path: str, method: str, expires: int, signature: str):
+    """Resolve a signed local storage URL to a blob, or raise 403/404."""
+    if not is_local_backend():
+        raise HTTPException(status_code=404, detail="Local storage backend is not enabled.")
+    if not verify_local_url(bucket, path, method, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature.")
+    try:
+        return get_upload_bucket().client.bucket(bucket).blob(path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/local-storage/{bucket}/{path:path}")
+def read_local_object(bucket: str, path: str, method: str, expires: int, signature: str):
+    """Serve an object through a signed download URL."""
+    blob = _local_blob(bucket, path, "GET", expires, signature)
+    if method != "GET" or not blob.exists():
+        raise HTTPException(status_code=404, detail="Object not found.")
+    blob.reload()
+    headers = {"Cache-Control": blob.cache_control} if blob.cache_control else {}
+    return Response(content=blob.download_as_bytes(), media_type=blob.content_type, headers=headers)
+
+
+@app.put("/local-storage/{bucket}/{path:path}")
+async def write_local_object(bucket: str, path: str, method: str, expires: int, signature: str, http_request: Request):
+    """Accept a direct client upload through a signed upload URL."""
+    blob = _local_blob(bucket, path, "PUT", expires, signature)
+    if method != "PUT":
+        raise HTTPException(status_code=403, detail="URL is not valid for uploads.")
+    content_length = http_request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail="Upload too large.")
+    # Content-Length may be missing or wrong (chunked uploads): cap what is actually read
+    chunks = []
+    received = 0
+    async for chunk in http_request.stream():
+        received += len(chunk)
+        if received > settings.MAX_UPLOAD_SIZE:
+            raise HTTPException(status_code=413, detail="Upload too large.")
+        chunks.append(chunk)
+    await asyncio.to_thread(
+        blob.upload_from_string, b"".join(chunks), content_type=http_request.headers.get("content-type")
+    )
+    return Response(status_code=200)
+
+
+@app.get("/audio-pack/{version}/{key}")
+def read_audio_pack(version: str, key: str):
+    """Serve a prewarmed phrase from the memory-mapped audio pack."""
+    pack = get_audio_pack()
+    if pack is None or pack.version != version or key not in pack:
+        raise HTTPException(status_code=404, detail="Audio not found.")
+    return Response(
+        content=bytes(pack.get(key)),
+        media_type=pack.content_type(key),
+        headers={"Cache-Control": TTS_CACHE_CONTROL},
+    )
+
+
 # --- Root endpoint for basic health check ---
 @app.get("/")
 def read_root():
     return {"message": "Chat API is running. Go to /docs for API documentation."}
 
 
+# --- Metrics endpoint (Prometheus text format) ---
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    return metrics.render_prometheus()
+
+
 # --- To run the app ---
 # Command: uvicorn main:app --reload
 if __name__ == "__main__":
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Prewarm TTS for the backend's fixed phrases.
+
+Extracts every phrase the backend emits verbatim (Kannada error messages,
+"no speech detected", demo responses and the archived response templates),
+synthesizes each phrase in every supported voice and audio profile with
+bounded concurrency and writes a versioned audio pack. The server memory-maps the newest pack in
+AUDIO_PACK_DIR at startup and serves these phrases without calling TTS.
+
+Usage:
+    python prewarm_tts.py [--output-dir audio_packs] [--concurrency 4] [--version v1]
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Add current directory to path to import our modules
+sys.path.append(str(Path(__file__).parent))
+
+from google.cloud import texttospeech
+
+from config.settings import settings
+from services.audio_pack import AudioPack, find_latest_pack, write_audio_pack
+from services.audio_profiles import AUDIO_PROFILES, build_audio_config, content_type_for, profile_audio_params
+from services.tts_cache import DEFAULT_AUDIO_PARAMS, tts_cache_key
+
+ARCHIVED_PROMPT_PATH = (
+    Path(__file__).parent / "archives" / "plant_disease_detector_agent" / "prompt.py"
+)
+
+
+def extract_phrases() -> List[str]:
+    """Collect the fixed phrases emitted by the backend, de-duplicated in order."""
+    phrases: List[str] = []
+
+    try:
+        from services.ai_service import ERROR_MESSAGES as AGENT_ERROR_MESSAGES
+        phrases.extend(AGENT_ERROR_MESSAGES.values())
+    except Exception as e:
+        print(f"Skipping KisanAIAgent messages: {e}")
+
+    try:
+        from services.speech_service import NO_SPEECH_DETECTED
+        phrases.append(NO_SPEECH_DETECTED)
+    except Exception as e:
+        print(f"Skipping SpeechService messages: {e}")
+
+    try:
+        from main import DEMO_RESPONSES
+        phrases.extend(DEMO_RESPONSES.values())
+    except Exception as e:
+        print(f"Skipping demo responses: {e}")
+
+    # Load the archived prompt module by path; its package imports the ADK agent
+    try:
+        spec = importlib.util.spec_from_file_location("archived_prompt", ARCHIVED_PROMPT_PATH)
+        archived_prompt = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(archived_prompt)
+        phrases.extend(archived_prompt.ERROR_MESSAGES.values())
+        for templates in archived_prompt.RESPONSE_TEMPLATES.values():
+            phrases.extend(templates.values())
+    except Exception as e:
+        print(f"Skipping archived response templates: {e}")
+
+    return list(dict.fromkeys(p for p in phrases if p.strip()))
+
+
+def supported_voices(profiles: List[str]) -> List[Tuple[dict, dict]]:
+    """Return (voice, audio_config) pairs for every TTS path and audio profile."""
+    from services.speech_service import service_voice_params
+    from services.speech_tools import VOICE_CONFIGS, voice_params
+
+    bases = [(voice_params(config), DEFAULT_AUDIO_PARAMS) for config in VOICE_CONFIGS.values()]
+
+    # SpeechService voice, built the same way as at runtime (default language)
+    bases.append((service_voice_params(), DEFAULT_AUDIO_PARAMS))
+
+    try:
+        from main import API_AUDIO_PARAMS, API_TTS_VOICE
+        bases.append((API_TTS_VOICE, API_AUDIO_PARAMS))
+    except Exception as e:
+        print(f"Skipping chat endpoint voice: {e}")
+
+    return [
+        (voice, profile_audio_params(profile, base))
+        for voice, base in bases
+        for profile in profiles
+    ]
+
+
+def synthesize(client: texttospeech.TextToSpeechClient, text: str, voice: dict, audio_config: dict) -> bytes:
+    """Synthesize `text` with plain-dict voice and audio parameters."""
+    voice_kwargs = dict(voice)
+    voice_kwargs["ssml_gender"] = texttospeech.SsmlVoiceGender[voice["ssml_gender"]]
+
+    response = client.synthesize_speech(
+        input=texttospeech.SynthesisInput(text=text),
+        voice=texttospeech.VoiceSelectionParams(**voice_kwargs),
+        audio_config=build_audio_config(audio_config),
+    )
+    return response.audio_content
+
+
+async def build_entries(
+    phrases: List[str],
+    voices: List[Tuple[dict, dict]],
+    concurrency: int,
+    previous: Optional[AudioPack] = None,
+) -> Dict[str, Tuple[bytes, str]]:
+    """Synthesize every phrase in every voice, reusing audio from a previous pack."""
+    client = texttospeech.TextToSpeechClient()
+    semaphore = asyncio.Semaphore(concurrency)
+    entries: Dict[str, Tuple[bytes, str]] = {}
+    failures = 0
+
+    jobs = {}
+    for voice, audio_config in voices:
+        content_type = content_type_for(audio_config)
+        for phrase in phrases:
+            key = tts_cache_key(phrase, voice, audio_config)
+            if key in entries or key in jobs:
+                continue
+            if previous is not None and key in previous:
+                entries[key] = (previous.get(key), content_type)
+                continue
+            jobs[key] = (phrase, voice, audio_config, content_type)
+
+    print(f"Reused {len(entries)} clips, synthesizing {len(jobs)} clips")
+
+    async def run(key: str, phrase: str, voice: dict, audio_config: dict, content_type: str):
+        nonlocal failures
+        async with semaphore:
+            try:
+                audio = await asyncio.to_thread(synthesize, client, phrase, voice, audio_config)
+                entries[key] = (audio, content_type)
+            except Exception as e:
+                failures += 1
+                print(f"  Failed [{voice.get('name') or voice['language_code']}] {phrase[:40]!r}: {e}")
+
+    await asyncio.gather(*(run(key, *job) for key, job in jobs.items()))
+
+    if failures:
+        print(f"{failures} clips failed and were left out of the pack")
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a TTS audio pack for fixed phrases")
+    parser.add_argument("--output-dir", default=settings.AUDIO_PACK_DIR,
+                        help="Directory to write the pack to (default: AUDIO_PACK_DIR)")
+    parser.add_argument("--concurrency", type=int, default=settings.TTS_PREWARM_CONCURRENCY,
+                        help="Maximum concurrent TTS requests")
+    parser.add_argument("--version", default=None,
+                        help="Pack version label (default: UTC timestamp)")
+    parser.add_argument("--profiles", nargs="+", default=list(AUDIO_PROFILES),
+                        choices=list(AUDIO_PROFILES),
+                        help="Audio profiles to synthesize (default: all)")
+    parser.add_argument("--no-reuse", action="store_true",
+                        help="Re-synthesize clips already present in the latest pack")
+    args = parser.parse_args()
+
+    phrases = extract_phrases()
+    voices = supported_voices(args.profiles)
+    print(f"Extracted {len(phrases)} phrases for {len(voices)} voice/profile combinations")
+
+    previous = None
+    if not args.no_reuse:
+        latest = find_latest_pack(Path(args.output_dir))
+        if latest is not None:
+            previous = AudioPack(latest)
+            print(f"Reusing clips from {latest.name}")
+
+    entries = asyncio.run(build_entries(phrases, voices, args.concurrency, previous))
+    path = write_audio_pack(Path(args.output_dir), entries, version=args.version)
+
+    if previous is not None:
+        previous.close()
+
+    total_bytes = sum(len(audio) for audio, _ in entries.values())
+    print(f"Wrote {len(entries)} clips ({total_bytes / 1024:.1f} KiB) to {path}")
+
+
+if __name__ == "__main__":
+    main()
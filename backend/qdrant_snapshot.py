@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Export or import a snapshot of the government schemes collection.
+
+Build the corpus once (prepare_qdrant_corpus.py), export it, and ship the
+file with new nodes; with QDRANT_SNAPSHOT_PATH set, a node restores it into
+an empty collection at startup without any embedding calls.
+
+Usage:
+    python qdrant_snapshot.py export [--path snapshots/government_schemes.snapshot.gz]
+    python qdrant_snapshot.py import [--path ...] [--local-path qdrant_local]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add current directory to path to import our modules
+sys.path.append(str(Path(__file__).parent))
+
+from config.settings import settings
+from services.qdrant_service import COLLECTION_NAME, QdrantService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import a Qdrant collection snapshot")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("--path", default=settings.QDRANT_SNAPSHOT_PATH or f"snapshots/{COLLECTION_NAME}.snapshot.gz",
+                        help="Snapshot file (default: QDRANT_SNAPSHOT_PATH)")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--local-path", default=None,
+                        help="Use embedded Qdrant with storage in this directory instead of the configured one")
+    args = parser.parse_args()
+
+    service = QdrantService(local_path=args.local_path)
+    if service.use_memory:
+        print("Qdrant is in-memory; nothing to export and an import would not persist")
+        sys.exit(1)
+
+    try:
+        if args.action == "export":
+            service.export_snapshot(args.path, args.collection)
+        else:
+            service.import_snapshot(args.path, args.collection)
+    finally:
+        if service.local_path:
+            service.close()
+
+
+if __name__ == "__main__":
+    main()
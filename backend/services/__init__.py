@@ -4,10 +4,17 @@ Kisan AI Backend Services
 This module provides various services for the Kisan AI application.
 """
 
-from services.qdrant_service import QdrantService, get_qdrant_service
+from services.qdrant_service import (
+    AsyncQdrantService,
+    QdrantService,
+    get_async_qdrant_service,
+    get_qdrant_service,
+)
 
 __all__ = [
+    "AsyncQdrantService",
     "QdrantService",
+    "get_async_qdrant_service",
     "get_qdrant_service",
 ]
 
@@ -16,9 +16,18 @@ from agents.kisan_agent.kisan_agent_wrapper import (
     process_image_message as kisan_process_image_message,
 )
 from config.settings import settings
+from services.history_compactor import gemini_summarize, get_history_compactor
+from services.image_processing import normalize_image
 
 logger = logging.getLogger(__name__)
 
+# Fixed Kannada error responses (prewarmed into the TTS audio pack)
+ERROR_MESSAGES = {
+    "technical_issue": "ಕ್ಷಮಿಸಿ, ತಾಂತ್ರಿಕ ಸಮಸ್ಯೆ ಇದೆ. ದಯವಿಟ್ಟು ಮತ್ತೆ ಪ್ರಯತ್ನಿಸಿ.",
+    "image_analysis": "ಚಿತ್ರ ವಿಶ್ಲೇಷಣೆಯಲ್ಲಿ ಸಮಸ್ಯೆ. ದಯವಿಟ್ಟು ಮತ್ತೆ ಪ್ರಯತ್ನಿಸಿ.",
+    "generation": "ಕ್ಷಮಿಸಿ, ಪ್ರತಿಕ್ರಿಯೆ ರಚಿಸುವಲ್ಲಿ ಸಮಸ್ಯೆ. ದಯವಿಟ್ಟು ಮತ್ತೆ ಪ್ರಯತ್ನಿಸಿ.",
+}
+
 class KisanAIAgent:
     """
     Kisan AI Agent using Google ADK agents
@@ -69,7 +78,7 @@ class KisanAIAgent:
             
         except Exception as e:
             logger.error(f"AI processing error: {str(e)}")
-            error_response = "ಕ್ಷಮಿಸಿ, ತಾಂತ್ರಿಕ ಸಮಸ್ಯೆ ಇದೆ. ದಯವಿಟ್ಟು ಮತ್ತೆ ಪ್ರಯತ್ನಿಸಿ."
+            error_response = ERROR_MESSAGES["technical_issue"]
             return {
                 "response": error_response,
                 "tools_used": [],
@@ -98,7 +107,7 @@ class KisanAIAgent:
             
         except Exception as e:
             logger.error(f"Image processing error: {str(e)}")
-            error_response = "ಚಿತ್ರ ವಿಶ್ಲೇಷಣೆಯಲ್ಲಿ ಸಮಸ್ಯೆ. ದಯವಿಟ್ಟು ಮತ್ತೆ ಪ್ರಯತ್ನಿಸಿ."
+            error_response = ERROR_MESSAGES["image_analysis"]
             return {
                 "diagnosis": error_response,
                 "error": str(e)
@@ -114,7 +123,11 @@ class KisanAIAgent:
         try:
             # Convert base64 to image part
             image_data = base64.b64decode(image_base64)
-            image_part = Part.from_data(image_data, mime_type="image/jpeg")
+            mime_type = "image/jpeg"
+            if settings.NORMALIZE_IMAGES:
+                normalized = await asyncio.to_thread(normalize_image, image_data)
+                image_data, mime_type = normalized["data"], normalized["mime_type"]
+            image_part = Part.from_data(image_data, mime_type=mime_type)
             
             # Create diagnosis prompt
             prompt = f"""
@@ -305,13 +318,30 @@ class KisanAIAgent:
             
         except Exception as e:
             logger.error(f"Gemini generation error: {str(e)}")
-            return "ಕ್ಷಮಿಸಿ, ಪ್ರತಿಕ್ರಿಯೆ ರಚಿಸುವಲ್ಲಿ ಸಮಸ್ಯೆ. ದಯವಿಟ್ಟು ಮತ್ತೆ ಪ್ರಯತ್ನಿಸಿ."
+            return ERROR_MESSAGES["generation"]
     
-    def _build_chat_history(self, conversation_history: List[Dict]) -> List[Content]:
-        """Convert conversation history to Gemini format"""
+    async def _build_chat_history(self, 
+                                  conversation_history: List[Dict],
+                                  history_state: Optional[Dict] = None) -> List[Content]:
+        """
+        Convert conversation history to Gemini format
+        
+        Recent messages are kept verbatim and older ones replaced by the rolling
+        summary in `history_state` (updated in place when it is recomputed).
+        """
+        if settings.HISTORY_COMPACTION_ENABLED and history_state is not None:
+            compactor = get_history_compactor()
+            history_state.update(
+                await compactor.update_summary(conversation_history, history_state, gemini_summarize)
+            )
+            messages, stats = compactor.compact(conversation_history, history_state)
+            logger.info(f"Chat history: {stats['prompt_tokens']} prompt tokens, {stats['saved_tokens']} saved")
+        else:
+            messages = conversation_history[-10:]  # Last 10 messages
+        
         contents = []
-        for msg in conversation_history[-10:]:  # Last 10 messages
-            role = "model" if msg["role"] == "assistant" else "user"
+        for msg in messages:
+            role = "model" if msg["role"] in ("assistant", "model") else "user"
             contents.append(Content(role=role, parts=[Part.from_text(msg["content"])]))
         return contents
     
@@ -0,0 +1,156 @@
+"""
+Prebuilt audio packs for fixed phrases.
+
+An audio pack is a single file holding pre-synthesized speech for phrases the
+backend emits verbatim (error messages, demo responses, "no speech detected"),
+keyed by the same content digest used for TTS blobs. The server memory-maps the
+newest pack at startup so these fallback paths are served without a TTS call.
+
+File layout::
+
+    MAGIC (8 bytes) | index length (uint32 LE) | index JSON | audio data
+
+The index maps each key to ``[offset, length, content_type]`` relative to the
+start of the audio data.
+"""
+
+import json
+import logging
+import mmap
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PACK_MAGIC = b"KSNTTS01"
+PACK_FORMAT_VERSION = 1
+PACK_GLOB = "tts_pack_*.pack"
+
+
+class AudioPack:
+    """Read-only, memory-mapped view over an audio pack file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(PACK_MAGIC)] != PACK_MAGIC:
+            self.close()
+            raise ValueError(f"Not an audio pack: {self.path}")
+
+        header_end = len(PACK_MAGIC) + 4
+        (index_length,) = struct.unpack("<I", self._mmap[len(PACK_MAGIC):header_end])
+        index = json.loads(self._mmap[header_end:header_end + index_length].decode("utf-8"))
+
+        self.version: str = index["version"]
+        self.format_version: int = index["format_version"]
+        self.created_at: str = index.get("created_at", "")
+        self._entries: Dict[str, list] = index["entries"]
+        self._data_start = header_end + index_length
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the audio bytes stored under `key`, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        offset, length, _ = entry
+        start = self._data_start + offset
+        return self._mmap[start:start + length]
+
+    def content_type(self, key: str) -> Optional[str]:
+        """Return the MIME type stored for `key`, or None."""
+        entry = self._entries.get(key)
+        return entry[2] if entry else None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self):
+        """Release the memory map and file handle."""
+        try:
+            self._mmap.close()
+        finally:
+            self._file.close()
+
+
+def write_audio_pack(
+    output_dir: Path,
+    entries: Dict[str, Tuple[bytes, str]],
+    version: Optional[str] = None,
+) -> Path:
+    """
+    Write a new versioned audio pack.
+
+    Args:
+        output_dir: Directory the pack is written to
+        entries: Mapping of content key to (audio bytes, content type)
+        version: Pack version label (default: UTC timestamp)
+
+    Returns:
+        Path of the written pack
+    """
+    version = version or datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    index_entries = {}
+    offset = 0
+    for key in sorted(entries):
+        audio, content_type = entries[key]
+        index_entries[key] = [offset, len(audio), content_type]
+        offset += len(audio)
+
+    index = json.dumps({
+        "version": version,
+        "format_version": PACK_FORMAT_VERSION,
+        "created_at": datetime.utcnow().isoformat(),
+        "entries": index_entries,
+    }, ensure_ascii=False).encode("utf-8")
+
+    path = output_dir / f"tts_pack_{version}.pack"
+    tmp_path = path.with_suffix(".pack.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(PACK_MAGIC)
+        f.write(struct.pack("<I", len(index)))
+        f.write(index)
+        for key in sorted(entries):
+            f.write(entries[key][0])
+    tmp_path.replace(path)
+    return path
+
+
+def find_latest_pack(pack_dir: Path) -> Optional[Path]:
+    """Return the newest pack in `pack_dir` (versions sort lexicographically)."""
+    pack_dir = Path(pack_dir)
+    if not pack_dir.is_dir():
+        return None
+    packs = sorted(pack_dir.glob(PACK_GLOB))
+    return packs[-1] if packs else None
+
+
+# Singleton instance
+_audio_pack: Optional[AudioPack] = None
+_audio_pack_loaded = False
+
+
+def get_audio_pack() -> Optional[AudioPack]:
+    """Load the newest pack from settings.AUDIO_PACK_DIR once; None if there is none."""
+    global _audio_pack, _audio_pack_loaded
+    if not _audio_pack_loaded:
+        _audio_pack_loaded = True
+        path = find_latest_pack(Path(settings.AUDIO_PACK_DIR))
+        if path is not None:
+            try:
+                _audio_pack = AudioPack(path)
+                logger.info(f"Loaded audio pack {_audio_pack.version} ({len(_audio_pack)} phrases)")
+            except Exception as e:
+                logger.error(f"Could not load audio pack {path}: {str(e)}")
+    return _audio_pack
@@ -0,0 +1,98 @@
+"""
+Audio profiles for synthesized speech.
+
+A profile fixes the encoding and sample rate of TTS output. "standard" keeps
+the original MP3 output; the Opus profiles trade fidelity for a much smaller
+payload on 2G/3G connections (Opus bitrate scales with the sample rate, and
+Cloud TTS output is always mono). The profile is picked per request from an
+explicit client hint or from the network-quality client hint headers.
+"""
+
+from typing import Any, Dict, Mapping, Optional
+
+from google.cloud import texttospeech
+
+from config.settings import settings
+
+# Encoding overrides per profile, merged over each TTS path's base parameters
+AUDIO_PROFILES: Dict[str, Dict[str, Any]] = {
+    "standard": {"audio_encoding": "MP3"},
+    "low": {"audio_encoding": "OGG_OPUS", "sample_rate_hertz": 16000},
+    "minimal": {"audio_encoding": "OGG_OPUS", "sample_rate_hertz": 8000},
+}
+
+CONTENT_TYPES = {
+    "MP3": "audio/mpeg",
+    "OGG_OPUS": "audio/ogg",
+    "LINEAR16": "audio/wav",
+}
+
+# Effective connection type (ECT client hint) -> profile
+ECT_PROFILES = {
+    "slow-2g": "minimal",
+    "2g": "minimal",
+    "3g": "low",
+    "4g": "standard",
+}
+
+
+def select_audio_profile(hint: Optional[str] = None, headers: Optional[Mapping[str, str]] = None) -> str:
+    """
+    Pick an audio profile for a request.
+
+    Precedence: explicit `hint` (request body), `X-Audio-Profile` header,
+    `Save-Data: on`, the `ECT` client hint, the `Downlink` client hint (Mbps),
+    then settings.DEFAULT_AUDIO_PROFILE.
+
+    Args:
+        hint: Profile name requested by the client, if any
+        headers: Request headers
+
+    Returns:
+        Name of a profile in AUDIO_PROFILES
+    """
+    headers = headers or {}
+
+    for candidate in (hint, headers.get("x-audio-profile")):
+        if candidate and candidate.lower() in AUDIO_PROFILES:
+            return candidate.lower()
+
+    if headers.get("save-data", "").lower() == "on":
+        return "minimal"
+
+    ect = headers.get("ect", "").lower()
+    if ect in ECT_PROFILES:
+        return ECT_PROFILES[ect]
+
+    downlink = headers.get("downlink")
+    if downlink:
+        try:
+            mbps = float(downlink)
+            if mbps < 0.5:
+                return "minimal"
+            if mbps < 2.0:
+                return "low"
+            return "standard"
+        except ValueError:
+            pass
+
+    if settings.DEFAULT_AUDIO_PROFILE in AUDIO_PROFILES:
+        return settings.DEFAULT_AUDIO_PROFILE
+    return "standard"
+
+
+def profile_audio_params(profile: str, base: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge a profile's encoding settings over a TTS path's base parameters."""
+    return {**base, **AUDIO_PROFILES.get(profile, AUDIO_PROFILES["standard"])}
+
+
+def content_type_for(audio_params: Dict[str, Any]) -> str:
+    """Return the MIME type produced by the given audio parameters."""
+    return CONTENT_TYPES.get(audio_params.get("audio_encoding", "MP3"), "audio/mpeg")
+
+
+def build_audio_config(audio_params: Dict[str, Any]) -> texttospeech.AudioConfig:
+    """Build a TTS AudioConfig from plain-dict audio parameters."""
+    kwargs = dict(audio_params)
+    kwargs["audio_encoding"] = texttospeech.AudioEncoding[audio_params.get("audio_encoding", "MP3")]
+    return texttospeech.AudioConfig(**kwargs)
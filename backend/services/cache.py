@@ -0,0 +1,148 @@
+"""
+Read-through caches for Kisan AI.
+
+`TTLCache` is a thread-safe in-process LRU whose entries expire after a TTL.
+`SharedCache` is an optional Redis tier (enabled by REDIS_URL) so several
+workers share lookups; values are stored as JSON with a TTL, and anything not
+JSON-serializable (e.g. Firestore timestamps) is stored as its string form.
+Hit/miss counters for both tiers are exported through services.metrics.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:
+    # Shared tier is optional
+    redis_asyncio = None
+
+from config.settings import settings
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Returned by get() on a miss, so cached None values are distinguishable
+MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry."""
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl_seconds: float = 300.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, key: Any, default: Any = MISSING) -> Any:
+        """Return the cached value for `key`, or `default` if absent or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                hit = True
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                hit = False
+            hit_rate = self.hit_rate
+
+        metrics.increment("cache_requests_total", cache=self.name, tier="local", result="hit" if hit else "miss")
+        metrics.set_gauge("cache_hit_ratio", hit_rate, cache=self.name)
+        return entry[0] if hit else default
+
+    def peek(self, key: Any, default: Any = MISSING) -> Any:
+        """Like get(), without counting towards the hit rate or refreshing recency."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+        return default
+
+    def set(self, key: Any, value: Any, ttl_seconds: Optional[float] = None):
+        """Store `value`, evicting the least recently used entry when full."""
+        expires_at = time.monotonic() + (ttl_seconds or self.ttl_seconds)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                metrics.increment("cache_evictions_total", cache=self.name)
+
+    def invalidate(self, key: Any):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SharedCache:
+    """Redis-backed cache tier shared between workers."""
+
+    def __init__(self, url: str, namespace: str = "kisan"):
+        self.namespace = namespace
+        self._client = redis_asyncio.from_url(url)
+
+    def _key(self, name: str, key: str) -> str:
+        return f"{self.namespace}:{name}:{key}"
+
+    async def get(self, name: str, key: str) -> Any:
+        """Return the cached value, or MISSING on a miss or Redis error."""
+        try:
+            raw = await self._client.get(self._key(name, key))
+        except Exception as e:
+            logger.warning(f"Shared cache read failed: {str(e)}")
+            return MISSING
+        metrics.increment("cache_requests_total", cache=name, tier="shared", result="miss" if raw is None else "hit")
+        return MISSING if raw is None else json.loads(raw)
+
+    async def set(self, name: str, key: str, value: Any, ttl_seconds: float):
+        try:
+            await self._client.set(self._key(name, key), json.dumps(value, default=str), ex=int(ttl_seconds))
+        except Exception as e:
+            logger.warning(f"Shared cache write failed: {str(e)}")
+
+    async def invalidate(self, name: str, key: str):
+        try:
+            await self._client.delete(self._key(name, key))
+        except Exception as e:
+            logger.warning(f"Shared cache invalidation failed: {str(e)}")
+
+
+# Singleton instance
+_shared_cache: Optional[SharedCache] = None
+_shared_cache_unavailable = False
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """Return the shared cache tier, or None when REDIS_URL is unset or redis is not installed."""
+    global _shared_cache, _shared_cache_unavailable
+    if _shared_cache is None and settings.REDIS_URL and not _shared_cache_unavailable:
+        if redis_asyncio is None:
+            logger.warning("REDIS_URL is set but the redis package is not installed; using local cache only")
+            _shared_cache_unavailable = True
+            return None
+        _shared_cache = SharedCache(settings.REDIS_URL)
+    return _shared_cache
@@ -0,0 +1,105 @@
+"""
+Qdrant collection profiles.
+
+A profile fixes how a collection stores and searches its dense vectors:
+quantization (none, scalar int8 or binary), HNSW graph parameters, search-time
+`ef` and whether the original float32 vectors live on disk. Quantized vectors
+stay in RAM and results are rescored against the original vectors, with
+`oversampling` times more candidates fetched than requested.
+
+    fast      binary quantization (32x smaller), small graph; lowest latency
+    balanced  int8 quantization (4x smaller); near-float recall
+    accurate  float32 in RAM, larger graph and ef; highest recall
+
+The profile is picked per collection (QDRANT_COLLECTION_PROFILE by default).
+benchmarks/bench_collection_profiles.py measures memory, build time, latency
+and recall for each one.
+"""
+
+from typing import Any, Dict, Optional
+
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    HnswConfigDiff,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+)
+
+from config.settings import settings
+
+COLLECTION_PROFILES: Dict[str, Dict[str, Any]] = {
+    "fast": {
+        "quantization": "binary",
+        "hnsw_m": 16,
+        "ef_construct": 100,
+        "search_ef": 64,
+        "oversampling": 3.0,
+        "on_disk": True,
+    },
+    "balanced": {
+        "quantization": "int8",
+        "hnsw_m": 16,
+        "ef_construct": 200,
+        "search_ef": 128,
+        "oversampling": 2.0,
+        "on_disk": True,
+    },
+    "accurate": {
+        "quantization": None,
+        "hnsw_m": 32,
+        "ef_construct": 400,
+        "search_ef": 256,
+        "oversampling": 1.0,
+        "on_disk": False,
+    },
+}
+
+
+def get_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    """Profile settings by name (default: QDRANT_COLLECTION_PROFILE)."""
+    name = name or settings.QDRANT_COLLECTION_PROFILE
+    if name not in COLLECTION_PROFILES:
+        raise ValueError(f"Unknown collection profile {name!r}; expected one of {', '.join(COLLECTION_PROFILES)}")
+    return COLLECTION_PROFILES[name]
+
+
+def quantization_config(profile: Dict[str, Any]):
+    """Qdrant quantization config for a profile, or None for float32 only."""
+    if profile["quantization"] == "int8":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if profile["quantization"] == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def hnsw_config(profile: Dict[str, Any]) -> HnswConfigDiff:
+    return HnswConfigDiff(m=profile["hnsw_m"], ef_construct=profile["ef_construct"])
+
+
+def search_params(profile: Dict[str, Any]) -> SearchParams:
+    """Search-time parameters: HNSW ef and rescoring of quantized candidates."""
+    quantization = None
+    if profile["quantization"]:
+        quantization = QuantizationSearchParams(rescore=True, oversampling=profile["oversampling"])
+    return SearchParams(hnsw_ef=profile["search_ef"], quantization=quantization)
+
+
+def estimated_memory_bytes(profile: Dict[str, Any], points: int, dimension: int) -> Dict[str, int]:
+    """
+    Rough RAM and disk footprint of the dense vectors and HNSW graph.
+
+    Returns:
+        Dict with `ram` and `disk` byte counts
+    """
+    original = points * dimension * 4
+    quantized = {"int8": points * dimension, "binary": points * dimension // 8}.get(profile["quantization"], 0)
+    # Each node keeps up to 2*m links on layer 0, 4 bytes per link
+    graph = points * profile["hnsw_m"] * 2 * 4
+    ram = quantized + graph + (0 if profile["on_disk"] else original)
+    return {"ram": ram, "disk": original if profile["on_disk"] else 0}
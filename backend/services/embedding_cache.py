@@ -0,0 +1,240 @@
+"""
+Persistent embedding cache.
+
+Corpus rebuilds re-embed the same chunks and farmers repeat the same scheme
+questions. Embeddings are cached under (model, task type, sha256(text)) in two
+tiers: an in-memory LRU (`TTLCache` without expiry) in front of a SQLite table
+of float32 blobs at EMBEDDING_CACHE_DB. Corpus preparation and the query path
+share the cache through `BatchEmbedder`, so a query already seen (or warmed up
+from the query log with warm_embedding_cache.py) never reaches the API.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import logging.handlers
+import queue
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config.settings import settings
+from services.cache import MISSING, TTLCache
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+# SQLite's default limit on host parameters is 999
+_SELECT_CHUNK = 500
+
+
+def embedding_key(model: str, task_type: str, text: str) -> CacheKey:
+    """Cache key for an embedding of `text`."""
+    return model, task_type, hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class EmbeddingCache:
+    """In-memory LRU over an on-disk SQLite embedding store."""
+
+    def __init__(self, path: str, memory_size: int = 20000):
+        self.path = path
+        self.memory = TTLCache("embeddings", maxsize=memory_size, ttl_seconds=float("inf"))
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " task_type TEXT NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " dimension INTEGER NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " PRIMARY KEY (model, task_type, digest))"
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.memory.hits + self.disk_hits
+        total = hits + self.misses
+        return hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "memory_hits": self.memory.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "entries": len(self),
+        }
+
+    def get_many(self, keys: Iterable[CacheKey]) -> Dict[CacheKey, List[float]]:
+        """
+        Look up embeddings, memory first, then disk.
+
+        Returns:
+            Dict of the keys that were found; disk hits are promoted to memory
+        """
+        found: Dict[CacheKey, List[float]] = {}
+        pending: Dict[Tuple[str, str], List[str]] = {}
+        for key in dict.fromkeys(keys):
+            vector = self.memory.get(key)
+            if vector is MISSING:
+                pending.setdefault(key[:2], []).append(key[2])
+            else:
+                found[key] = vector
+
+        disk_hits = 0
+        with self._lock:
+            for (model, task_type), digests in pending.items():
+                for start in range(0, len(digests), _SELECT_CHUNK):
+                    chunk = digests[start:start + _SELECT_CHUNK]
+                    rows = self._conn.execute(
+                        "SELECT digest, vector FROM embeddings WHERE model = ? AND task_type = ?"
+                        f" AND digest IN ({','.join('?' * len(chunk))})",
+                        (model, task_type, *chunk),
+                    ).fetchall()
+                    for digest, blob in rows:
+                        key = (model, task_type, digest)
+                        found[key] = _unpack(blob)
+                        self.memory.set(key, found[key])
+                        disk_hits += 1
+
+        misses = sum(len(digests) for digests in pending.values()) - disk_hits
+        self.disk_hits += disk_hits
+        self.misses += misses
+        if disk_hits:
+            metrics.increment("cache_requests_total", disk_hits, cache="embeddings", tier="disk", result="hit")
+        if misses:
+            metrics.increment("cache_requests_total", misses, cache="embeddings", tier="disk", result="miss")
+        metrics.set_gauge("embedding_cache_hit_ratio", self.hit_rate)
+        return found
+
+    def set_many(self, items: Dict[CacheKey, List[float]]):
+        """Store embeddings in both tiers."""
+        if not items:
+            return
+        now = time.time()
+        for key, vector in items.items():
+            self.memory.set(key, vector)
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, task_type, digest, dimension, vector, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(*key, len(vector), _pack(vector), now) for key, vector in items.items()],
+            )
+            self._conn.commit()
+
+
+class _QueryLogHandler(logging.FileHandler):
+    """File handler that reports write errors instead of stopping its listener thread."""
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            super().emit(record)
+        except OSError as e:
+            logger.warning(f"Could not write query log: {str(e)}")
+
+
+# Query log writers per path: a QueueHandler in front of a file handler that
+# runs on a listener thread, so the search path never does file I/O
+_query_loggers: Dict[str, Tuple[logging.Logger, logging.handlers.QueueListener]] = {}
+_query_loggers_lock = threading.Lock()
+
+
+def _query_logger(path: str) -> logging.Logger:
+    with _query_loggers_lock:
+        if path not in _query_loggers:
+            records: queue.SimpleQueue = queue.SimpleQueue()
+            query_logger = logging.getLogger(f"{__name__}.queries.{path}")
+            query_logger.setLevel(logging.INFO)
+            query_logger.propagate = False
+            query_logger.handlers = [logging.handlers.QueueHandler(records)]
+            listener = logging.handlers.QueueListener(
+                records, _QueryLogHandler(path, encoding="utf-8", delay=True)
+            )
+            listener.start()
+            _query_loggers[path] = (query_logger, listener)
+        return _query_loggers[path][0]
+
+
+def log_query(query: str):
+    """Queue a search query for EMBEDDING_QUERY_LOG, for later cache warm-up."""
+    if not settings.EMBEDDING_QUERY_LOG:
+        return
+    _query_logger(settings.EMBEDDING_QUERY_LOG).info(
+        json.dumps({"query": query, "timestamp": time.time()}, ensure_ascii=False)
+    )
+
+
+def flush_query_log():
+    """Write out queued queries and close the query log files."""
+    with _query_loggers_lock:
+        writers = list(_query_loggers.values())
+        _query_loggers.clear()
+    for query_logger, listener in writers:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        query_logger.handlers = []
+
+
+atexit.register(flush_query_log)
+
+
+def read_query_log(path: str) -> Iterator[str]:
+    """Yield queries from a JSON-lines query log (plain text lines are accepted too)."""
+    with open(path, encoding="utf-8") as log:
+        for line in log:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+                query = entry.get("query", "") if isinstance(entry, dict) else str(entry)
+            except json.JSONDecodeError:
+                query = line
+            if query:
+                yield query
+
+
+# Singleton instance
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Get or create the embedding cache singleton (None when disabled)."""
+    global _embedding_cache
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(
+            settings.EMBEDDING_CACHE_DB,
+            memory_size=settings.EMBEDDING_CACHE_MEMORY_SIZE,
+        )
+    return _embedding_cache
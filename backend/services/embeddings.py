@@ -0,0 +1,380 @@
+"""
+Batched embedding generation.
+
+`BatchEmbedder` splits texts into requests of up to EMBEDDING_BATCH_SIZE
+(the batchEmbedContents limit is 100), runs EMBEDDING_CONCURRENCY requests at
+a time under a shared requests-per-minute limiter, and retries failed requests
+with exponential backoff. A request that still fails raises EmbeddingError
+instead of silently indexing zero vectors.
+
+With an EmbeddingCache, only texts not already cached under (model, task type,
+text digest) are sent; duplicate texts in one call are embedded once.
+
+`aembed` is the asyncio counterpart used on the query path; it awaits
+`aembed_batch` (Google's async embedding call by default) instead of blocking
+the event loop.
+
+The embedding call is pluggable (`embed_batch(texts, task_type)`), which lets
+benchmarks measure indexing throughput with a local fake embedder. The model
+itself is an `EmbeddingBackend` chosen by EMBEDDING_BACKEND:
+
+    google   Google embedding API (network, rate-limited)
+    local    multilingual ONNX model on CPU via fastembed (offline; handles
+             Kannada and Hindi), e.g. intfloat/multilingual-e5-large
+
+The vector dimension comes from the backend's model, so collections are sized
+to whichever model indexes them.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+try:
+    from fastembed import TextEmbedding
+except ImportError:
+    # Local backend is optional
+    TextEmbedding = None
+
+from config.settings import settings
+from services.embedding_cache import EmbeddingCache, embedding_key, get_embedding_cache
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Dimensions of known Google embedding models; others are probed once
+GOOGLE_EMBEDDING_DIMENSIONS = {
+    "models/embedding-001": 768,
+    "models/text-embedding-004": 768,
+}
+
+EmbedBatch = Callable[[List[str], str], List[List[float]]]
+AsyncEmbedBatch = Callable[[List[str], str], Awaitable[List[List[float]]]]
+
+
+class EmbeddingError(RuntimeError):
+    """Raised when texts could not be embedded after all retries."""
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate_per_minute` acquisitions."""
+
+    def __init__(self, rate_per_minute: float, burst: Optional[int] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = burst or max(1, int(self.rate_per_second))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self) -> float:
+        """Take a token if one is available; otherwise return seconds to wait."""
+        if self.rate_per_second <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate_per_second
+
+    def acquire(self):
+        """Block until a token is available."""
+        while (wait := self._try_acquire()) > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a token is available."""
+        while (wait := self._try_acquire()) > 0:
+            await asyncio.sleep(wait)
+
+
+class EmbeddingBackend:
+    """
+    An embedding model behind `embed_batch(texts, task_type)`.
+
+    Subclasses set the model name, the vector dimension when it is known
+    without running the model, an optional async `aembed_batch`, and the
+    batching, concurrency and rate limits BatchEmbedder should use for them.
+    """
+
+    name = ""
+    dimension: Optional[int] = None
+    aembed_batch: Optional[AsyncEmbedBatch] = None
+
+    def __init__(self, model: str, batch_size: int, concurrency: int, requests_per_minute: float, max_retries: int):
+        self.model = model
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.requests_per_minute = requests_per_minute
+        self.max_retries = max_retries
+
+    def embed_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class GoogleEmbeddingBackend(EmbeddingBackend):
+    """Google embedding API; one batchEmbedContents request per batch."""
+
+    name = "google"
+
+    def __init__(self, model: Optional[str] = None):
+        super().__init__(
+            model=model or settings.EMBEDDING_MODEL,
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+            concurrency=settings.EMBEDDING_CONCURRENCY,
+            requests_per_minute=settings.EMBEDDING_REQUESTS_PER_MINUTE,
+            max_retries=settings.EMBEDDING_MAX_RETRIES,
+        )
+        self.dimension = GOOGLE_EMBEDDING_DIMENSIONS.get(self.model)
+
+    def embed_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
+        import google.generativeai as genai
+
+        result = genai.embed_content(
+            model=self.model,
+            content=texts,
+            task_type=task_type
+        )
+        return result["embedding"]
+
+    async def aembed_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
+        import google.generativeai as genai
+
+        result = await genai.embed_content_async(
+            model=self.model,
+            content=texts,
+            task_type=task_type
+        )
+        return result["embedding"]
+
+
+class LocalEmbeddingBackend(EmbeddingBackend):
+    """
+    Multilingual sentence model on CPU with ONNX Runtime (fastembed).
+
+    The model is downloaded on first use and loaded once per process. Batches
+    run one at a time, since ONNX Runtime already spreads each batch over
+    LOCAL_EMBEDDING_THREADS cores. E5 models get their "query: " /
+    "passage: " prefixes from the task type.
+    """
+
+    name = "local"
+
+    def __init__(self, model: Optional[str] = None, threads: Optional[int] = None):
+        if TextEmbedding is None:
+            raise EmbeddingError("EMBEDDING_BACKEND=local requires fastembed (pip install fastembed)")
+        super().__init__(
+            model=model or settings.LOCAL_EMBEDDING_MODEL,
+            batch_size=settings.LOCAL_EMBEDDING_BATCH_SIZE,
+            concurrency=1,
+            requests_per_minute=0,
+            max_retries=0,
+        )
+        self.threads = settings.LOCAL_EMBEDDING_THREADS if threads is None else threads
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                started = time.time()
+                self._model = TextEmbedding(
+                    model_name=self.model,
+                    threads=self.threads or None,
+                    cache_dir=settings.LOCAL_EMBEDDING_CACHE_DIR or None,
+                )
+                logger.info(f"Loaded local embedding model {self.model} in {time.time() - started:.1f}s")
+        return self._model
+
+    def _prefixed(self, texts: List[str], task_type: str) -> List[str]:
+        if "e5" not in self.model.lower():
+            return texts
+        prefix = "query: " if task_type == "retrieval_query" else "passage: "
+        return [prefix + text for text in texts]
+
+    def embed_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
+        vectors = self._load().embed(self._prefixed(texts, task_type), batch_size=self.batch_size)
+        return [vector.tolist() for vector in vectors]
+
+
+EMBEDDING_BACKENDS = {
+    "google": GoogleEmbeddingBackend,
+    "local": LocalEmbeddingBackend,
+}
+
+
+def create_embedding_backend(name: Optional[str] = None) -> EmbeddingBackend:
+    """Embedding backend by name (default: EMBEDDING_BACKEND)."""
+    name = name or settings.EMBEDDING_BACKEND
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {name!r}; expected one of {', '.join(EMBEDDING_BACKENDS)}")
+    return EMBEDDING_BACKENDS[name]()
+
+class BatchEmbedder:
+    """Concurrent, rate-limited, retrying batch embedder."""
+
+    def __init__(
+        self,
+        embed_batch: EmbedBatch,
+        batch_size: int = 100,
+        concurrency: int = 4,
+        requests_per_minute: float = 1500,
+        max_retries: int = 5,
+        retry_base_seconds: float = 1.0,
+        model: str = "",
+        cache: Optional[EmbeddingCache] = None,
+        aembed_batch: Optional[AsyncEmbedBatch] = None,
+        dimension: Optional[int] = None,
+    ):
+        self.embed_batch = embed_batch
+        self.aembed_batch = aembed_batch
+        self.model = model
+        self._dimension = dimension
+        self.cache = cache
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.limiter = RateLimiter(requests_per_minute, burst=concurrency)
+
+    @property
+    def dimension(self) -> int:
+        """Vector dimension, probed with one uncached request if not given."""
+        if self._dimension is None:
+            self._dimension = len(self._embed_with_retry(["dimension probe"], "retrieval_query")[0])
+        return self._dimension
+
+    def embed(self, texts: Sequence[str], task_type: str = "retrieval_document") -> List[List[float]]:
+        """
+        Embed `texts`, preserving order.
+
+        Raises:
+            EmbeddingError: If any batch fails after `max_retries` retries
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+
+        keys, vectors, missing = self._lookup(texts, task_type)
+        if missing:
+            computed = dict(zip(missing, self._embed_uncached(list(missing.values()), task_type)))
+            self._store(vectors, computed)
+        return [vectors[key] for key in keys]
+
+    async def aembed(self, texts: Sequence[str], task_type: str = "retrieval_query") -> List[List[float]]:
+        """
+        Async variant of `embed` that never blocks the event loop on the API.
+
+        Falls back to running `embed_batch` in a thread when no async call is set.
+
+        Raises:
+            EmbeddingError: If any batch fails after `max_retries` retries
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+
+        keys, vectors, missing = self._lookup(texts, task_type)
+        if missing:
+            uncached = list(missing.values())
+            batches = [uncached[i:i + self.batch_size] for i in range(0, len(uncached), self.batch_size)]
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def run(batch: List[str]) -> List[List[float]]:
+                async with semaphore:
+                    return await self._aembed_with_retry(batch, task_type)
+
+            started = time.time()
+            results = await asyncio.gather(*(run(batch) for batch in batches))
+            metrics.increment("embedding_texts_total", len(uncached), task_type=task_type)
+            metrics.observe("embedding_seconds", time.time() - started, task_type=task_type)
+            computed = dict(zip(missing, (vector for batch_vectors in results for vector in batch_vectors)))
+            self._store(vectors, computed)
+        return [vectors[key] for key in keys]
+
+    def _lookup(self, texts: List[str], task_type: str):
+        """Return (keys, cached vectors by key, uncached texts by key)."""
+        keys = [embedding_key(self.model, task_type, text) for text in texts]
+        vectors: Dict = self.cache.get_many(keys) if self.cache is not None else {}
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        return keys, vectors, missing
+
+    def _store(self, vectors: Dict, computed: Dict):
+        if self.cache is not None:
+            self.cache.set_many(computed)
+        vectors.update(computed)
+
+    def _embed_uncached(self, texts: List[str], task_type: str) -> List[List[float]]:
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        started = time.time()
+        if len(batches) == 1 or self.concurrency <= 1:
+            results = [self._embed_with_retry(batch, task_type) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as pool:
+                results = list(pool.map(lambda batch: self._embed_with_retry(batch, task_type), batches))
+
+        elapsed = time.time() - started
+        metrics.increment("embedding_texts_total", len(texts), task_type=task_type)
+        metrics.observe("embedding_seconds", elapsed, task_type=task_type)
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    def _embed_with_retry(self, batch: List[str], task_type: str) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                vectors = self.embed_batch(batch, task_type)
+                if len(vectors) != len(batch):
+                    raise EmbeddingError(f"Expected {len(batch)} embeddings, got {len(vectors)}")
+                metrics.increment("embedding_requests_total", status="ok")
+                return vectors
+            except Exception as e:
+                if attempt == self.max_retries:
+                    metrics.increment("embedding_requests_total", status="failed")
+                    raise EmbeddingError(f"Embedding {len(batch)} texts failed after {attempt + 1} attempts: {e}") from e
+                metrics.increment("embedding_retries_total")
+                delay = self.retry_base_seconds * (2 ** attempt)
+                logger.warning(f"Embedding request failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay + random.uniform(0, delay / 2))
+
+    async def _aembed_with_retry(self, batch: List[str], task_type: str) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire_async()
+            try:
+                if self.aembed_batch is not None:
+                    vectors = await self.aembed_batch(batch, task_type)
+                else:
+                    vectors = await asyncio.to_thread(self.embed_batch, batch, task_type)
+                if len(vectors) != len(batch):
+                    raise EmbeddingError(f"Expected {len(batch)} embeddings, got {len(vectors)}")
+                metrics.increment("embedding_requests_total", status="ok")
+                return vectors
+            except Exception as e:
+                if attempt == self.max_retries:
+                    metrics.increment("embedding_requests_total", status="failed")
+                    raise EmbeddingError(f"Embedding {len(batch)} texts failed after {attempt + 1} attempts: {e}") from e
+                metrics.increment("embedding_retries_total")
+                delay = self.retry_base_seconds * (2 ** attempt)
+                logger.warning(f"Embedding request failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+
+def create_batch_embedder(backend: Optional[EmbeddingBackend] = None, use_cache: bool = True) -> BatchEmbedder:
+    """Create a BatchEmbedder for `backend` (default: EMBEDDING_BACKEND from settings)."""
+    backend = backend or create_embedding_backend()
+    return BatchEmbedder(
+        embed_batch=backend.embed_batch,
+        aembed_batch=backend.aembed_batch,
+        batch_size=backend.batch_size,
+        concurrency=backend.concurrency,
+        requests_per_minute=backend.requests_per_minute,
+        max_retries=backend.max_retries,
+        model=backend.model,
+        cache=get_embedding_cache() if use_cache else None,
+        dimension=backend.dimension,
+    )
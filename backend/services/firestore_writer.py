@@ -0,0 +1,203 @@
+"""
+Write-behind buffer for Firestore.
+
+Conversation turns and user-context updates are collected in memory and
+flushed as Firestore WriteBatch commits of up to 500 operations, either when
+the buffer fills up or every FIRESTORE_FLUSH_INTERVAL_SECONDS. Writes to the
+same document within one window are coalesced (merge writes are combined,
+plain sets keep the last value), so a burst of turns costs one round-trip per
+batch instead of one per document.
+
+Writes stay readable through `pending_data` until their batch has committed.
+Batches that fail to commit are handed to the persistence queue as individual
+``storage.set_document`` jobs, which retry with backoff and spill to disk.
+
+The buffer is opt-in (FIRESTORE_WRITE_BEHIND): until a flush commits them,
+writes exist only in process memory and are lost if the process crashes.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from services.metrics import metrics
+from services.persistence_queue import get_persistence_queue
+from services.storage_backend import get_firestore_client
+
+logger = logging.getLogger(__name__)
+
+# Firestore limit on writes per batch
+MAX_BATCH_OPS = 500
+
+DocKey = Tuple[str, str]
+
+
+class WriteBehindBuffer:
+    """Coalescing write buffer flushed as Firestore batches."""
+
+    def __init__(
+        self,
+        firestore_client=None,
+        max_ops: int = MAX_BATCH_OPS,
+        flush_interval_seconds: float = 1.0,
+    ):
+        self._client = firestore_client
+        self.max_ops = min(max_ops, MAX_BATCH_OPS)
+        self.flush_interval_seconds = flush_interval_seconds
+
+        # (collection, document_id) -> [data, merge]
+        self._pending: "OrderedDict[DocKey, List[Any]]" = OrderedDict()
+        # Writes taken by the running flush, until its batch commits
+        self._flushing: Dict[DocKey, List[Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_firestore_client()
+        return self._client
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def add(self, collection: str, document_id: str, data: Dict[str, Any], merge: bool = False):
+        """Buffer a document write; triggers an early flush once `max_ops` are pending."""
+        key = (collection, document_id)
+        with self._lock:
+            existing = self._pending.get(key)
+            if existing is not None and merge:
+                # Merge over whatever is pending; a pending full set stays a full set
+                existing[0] = {**existing[0], **data}
+            else:
+                self._pending[key] = [dict(data), merge]
+            pending = len(self._pending)
+        metrics.increment("firestore_buffered_writes_total", collection=collection)
+        metrics.set_gauge("firestore_write_buffer_size", pending)
+
+        if pending >= self.max_ops and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def pending_data(self, collection: str, document_id: str) -> Optional[Dict[str, Any]]:
+        """Return the not-yet-committed data for a document, for read-your-writes."""
+        key = (collection, document_id)
+        with self._lock:
+            entry = self._pending.get(key)
+            flushing = self._flushing.get(key)
+            if entry is None:
+                return dict(flushing[0]) if flushing else None
+            if flushing is None or not entry[1]:
+                return dict(entry[0])
+            # A merge write buffered while the earlier write is committing
+            return {**flushing[0], **entry[0]}
+
+    async def start(self):
+        """Start the periodic flusher."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info("Firestore write-behind buffer started")
+
+    async def stop(self):
+        """Stop the flusher and flush everything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while len(self):
+            await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            while len(self):
+                await self.flush()
+                if len(self) < self.max_ops:
+                    break
+
+    async def flush(self) -> int:
+        """
+        Commit up to `max_ops` buffered writes as one batch.
+
+        Returns:
+            Number of writes committed
+        """
+        async with self._flush_lock:
+            with self._lock:
+                ops = []
+                while self._pending and len(ops) < self.max_ops:
+                    ops.append(self._pending.popitem(last=False))
+                self._flushing = dict(ops)
+                remaining = len(self._pending)
+            metrics.set_gauge("firestore_write_buffer_size", remaining)
+            if not ops:
+                return 0
+
+            started = time.time()
+            try:
+                await asyncio.to_thread(self._commit, ops)
+            except Exception as e:
+                logger.error(f"Firestore batch commit of {len(ops)} writes failed: {str(e)}")
+                metrics.increment("firestore_batch_commits_total", status="failed")
+                queue = get_persistence_queue()
+                for (collection, document_id), (data, merge) in ops:
+                    queue.enqueue("storage.set_document", {
+                        "collection": collection,
+                        "document_id": document_id,
+                        "data": data,
+                        "merge": merge,
+                    })
+                return 0
+            finally:
+                with self._lock:
+                    self._flushing = {}
+
+            metrics.increment("firestore_batch_commits_total", status="ok")
+            metrics.increment("firestore_batched_writes_total", len(ops))
+            metrics.observe("firestore_batch_commit_seconds", time.time() - started)
+            return len(ops)
+
+    def _commit(self, ops: List[Tuple[DocKey, List[Any]]]):
+        batch = self.client.batch()
+        for (collection, document_id), (data, merge) in ops:
+            doc_ref = self.client.collection(collection).document(document_id)
+            batch.set(doc_ref, data, merge=merge)
+        batch.commit()
+
+
+# Singleton instance
+_write_behind_buffer: Optional[WriteBehindBuffer] = None
+
+
+def get_write_behind_buffer() -> WriteBehindBuffer:
+    """Get or create the write-behind buffer singleton."""
+    global _write_behind_buffer
+    if _write_behind_buffer is None:
+        _write_behind_buffer = WriteBehindBuffer(
+            max_ops=settings.FIRESTORE_BATCH_MAX_OPS,
+            flush_interval_seconds=settings.FIRESTORE_FLUSH_INTERVAL_SECONDS,
+        )
+    return _write_behind_buffer
+
+
+def write_behind_enabled() -> bool:
+    """Whether Firestore writes should go through the running write-behind buffer."""
+    return settings.FIRESTORE_WRITE_BEHIND and get_write_behind_buffer().running
@@ -0,0 +1,184 @@
+"""
+Rolling conversation summarization.
+
+Long farmer conversations make every prompt longer. The compactor keeps the
+most recent HISTORY_KEEP_MESSAGES messages verbatim and folds older messages
+into a running summary kept in session state:
+
+    {"summary": str, "summarized_count": int}
+
+`summarized_count` is how many leading messages the summary covers. Messages
+that age out of the verbatim window are still sent as-is until they add up to
+HISTORY_SUMMARY_TRIGGER_TOKENS; only then is the summary recomputed, from the
+previous summary plus the newly aged-out messages, so each turn costs at most
+one small summarization call and usually none.
+
+Messages are dicts with "role" ("user"/"assistant"/"model") and "content".
+A message may set "turn_start": False (e.g. a tool response) so the verbatim
+window never starts in the middle of a tool exchange. The summary is prepended
+to the first verbatim user message rather than added as a turn of its own, so
+user and model turns keep alternating.
+"""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """Summarize this conversation between a farmer and an agricultural assistant.
+Keep the farmer's crops, location, problems, diagnoses, advice given and open questions.
+Write at most {max_words} words, in the language of the conversation.
+
+Previous summary:
+{summary}
+
+New messages:
+{messages}"""
+
+Summarizer = Callable[[str], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def messages_tokens(messages: List[Dict[str, Any]]) -> int:
+    return sum(estimate_tokens(message.get("content", "")) for message in messages)
+
+
+def summary_text(summary: str) -> str:
+    return f"Summary of the earlier conversation:\n{summary}"
+
+
+def format_messages(messages: List[Dict[str, Any]]) -> str:
+    return "\n".join(f"{message['role']}: {message.get('content', '')}" for message in messages)
+
+
+class HistoryCompactor:
+    """Keeps recent messages verbatim and the rest as a rolling summary."""
+
+    def __init__(
+        self,
+        keep_messages: int = 6,
+        trigger_tokens: int = 1500,
+        summary_max_words: int = 250,
+    ):
+        self.keep_messages = keep_messages
+        self.trigger_tokens = trigger_tokens
+        self.summary_max_words = summary_max_words
+
+    def _window_start(self, messages: List[Dict[str, Any]]) -> int:
+        """Index of the first verbatim message, moved back to a turn boundary."""
+        start = max(0, len(messages) - self.keep_messages)
+        while start > 0 and not messages[start].get("turn_start", True):
+            start -= 1
+        return start
+
+    def _covered(self, messages: List[Dict[str, Any]], state: Dict[str, Any]) -> int:
+        covered = state.get("summarized_count", 0)
+        # History was truncated or replaced; the summary no longer lines up
+        return covered if covered <= len(messages) else 0
+
+    def needs_summary(self, messages: List[Dict[str, Any]], state: Dict[str, Any]) -> bool:
+        """Whether the aged-out, unsummarized messages crossed the token threshold."""
+        pending = messages[self._covered(messages, state):self._window_start(messages)]
+        return bool(pending) and messages_tokens(pending) >= self.trigger_tokens
+
+    async def update_summary(
+        self,
+        messages: List[Dict[str, Any]],
+        state: Dict[str, Any],
+        summarize: Summarizer,
+    ) -> Dict[str, Any]:
+        """
+        Fold aged-out messages into the summary if the threshold was crossed.
+
+        Returns:
+            The (possibly unchanged) state dict
+        """
+        if not self.needs_summary(messages, state):
+            return state
+
+        covered = self._covered(messages, state)
+        start = self._window_start(messages)
+        prompt = SUMMARY_PROMPT.format(
+            max_words=self.summary_max_words,
+            summary=state.get("summary") if covered else "(none)",
+            messages=format_messages(messages[covered:start]),
+        )
+        try:
+            summary = (await summarize(prompt)).strip()
+        except Exception as e:
+            # Keep sending the messages verbatim; retry on a later turn
+            logger.error(f"History summarization failed: {str(e)}")
+            metrics.increment("history_summaries_total", status="failed")
+            return state
+
+        metrics.increment("history_summaries_total", status="ok")
+        return {"summary": summary, "summarized_count": start}
+
+    def compact(
+        self,
+        messages: List[Dict[str, Any]],
+        state: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """
+        Build the prompt history from the current summary and the uncovered messages.
+
+        Returns:
+            (messages for the prompt, stats with `full_tokens`, `prompt_tokens`
+            and `saved_tokens`)
+        """
+        state = state or {}
+        covered = self._covered(messages, state)
+        compacted = list(messages[covered:])
+        if covered and state.get("summary"):
+            summary = summary_text(state["summary"])
+            if compacted and compacted[0]["role"] == "user":
+                compacted[0] = {**compacted[0], "content": f"{summary}\n\n{compacted[0].get('content', '')}"}
+            else:
+                compacted.insert(0, {"role": "user", "content": summary})
+
+        full_tokens = messages_tokens(messages)
+        prompt_tokens = messages_tokens(compacted)
+        stats = {
+            "full_tokens": full_tokens,
+            "prompt_tokens": prompt_tokens,
+            "saved_tokens": max(0, full_tokens - prompt_tokens),
+        }
+        metrics.increment("history_prompt_tokens_total", prompt_tokens)
+        metrics.increment("history_prompt_tokens_saved_total", stats["saved_tokens"])
+        return compacted, stats
+
+
+async def gemini_summarize(prompt: str) -> str:
+    """Summarize with HISTORY_SUMMARY_MODEL through the Google GenAI SDK."""
+    from google import genai
+    from google.genai import types
+
+    client = genai.Client()
+    response = await client.aio.models.generate_content(
+        model=settings.HISTORY_SUMMARY_MODEL,
+        contents=prompt,
+        config=types.GenerateContentConfig(temperature=0.2, max_output_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS),
+    )
+    return response.text or ""
+
+
+# Singleton instance
+_history_compactor: Optional[HistoryCompactor] = None
+
+
+def get_history_compactor() -> HistoryCompactor:
+    """Get or create the history compactor singleton."""
+    global _history_compactor
+    if _history_compactor is None:
+        _history_compactor = HistoryCompactor(
+            keep_messages=settings.HISTORY_KEEP_MESSAGES,
+            trigger_tokens=settings.HISTORY_SUMMARY_TRIGGER_TOKENS,
+        )
+    return _history_compactor
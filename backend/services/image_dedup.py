@@ -0,0 +1,257 @@
+"""
+Perceptual-hash dedup for plant diagnoses.
+
+Farmers often resend the same leaf photo, or several near-identical shots.
+Each diagnosed image is indexed by a 64-bit pHash (DCT of a 32x32 grayscale
+thumbnail) and a 64-bit dHash (horizontal gradients of a 9x8 thumbnail), both
+computed with NumPy, and stored in SQLite together with the agent's answer.
+An upload whose hashes are both within IMAGE_DEDUP_MAX_DISTANCE bits of an
+indexed image, asked by the same farmer with the same question and language,
+reuses that answer instead of running the disease detection and treatment plan
+agents again. Answers are personalized (name, location, history), so they are
+never shared between farmers.
+
+Hashes are kept in memory as NumPy arrays so a lookup is one vectorized XOR and
+popcount over the whole index; each lookup first appends rows other workers
+added. Entries expire after IMAGE_DEDUP_TTL_SECONDS (expired ones never match)
+and the least recently used ones are evicted beyond IMAGE_DEDUP_MAX_ENTRIES.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+import numpy as np
+from PIL import Image
+
+from config.settings import settings
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II basis, so dct(x) = M @ x @ M.T for a 2D block."""
+    k = np.arange(size)[:, None]
+    i = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    """Pack 64 booleans into a signed 64-bit integer (SQLite INTEGER range)."""
+    return int.from_bytes(np.packbits(bits).tobytes(), "big", signed=True)
+
+
+def phash(image: Image.Image) -> int:
+    """Perceptual hash: low-frequency DCT coefficients above their median."""
+    pixels = np.asarray(
+        image.convert("L").resize((32, 32), Image.Resampling.LANCZOS), dtype=np.float64
+    )
+    low = (_DCT_32 @ pixels @ _DCT_32.T)[:8, :8].flatten()
+    # Skip the DC term, which only encodes overall brightness
+    return _bits_to_int(low > np.median(low[1:]))
+
+
+def dhash(image: Image.Image) -> int:
+    """Difference hash: whether each pixel is brighter than its left neighbour."""
+    pixels = np.asarray(
+        image.convert("L").resize((9, 8), Image.Resampling.LANCZOS), dtype=np.int16
+    )
+    return _bits_to_int((pixels[:, 1:] > pixels[:, :-1]).flatten())
+
+
+def image_hashes(image_data: bytes) -> Tuple[int, int]:
+    """Return (pHash, dHash) for encoded image bytes."""
+    with Image.open(io.BytesIO(image_data)) as image:
+        image.draft("RGB", (256, 256))
+        return phash(image), dhash(image)
+
+
+def hamming_distances(hashes: np.ndarray, value: int) -> np.ndarray:
+    """Bit distances between `value` and every hash in an int64 array."""
+    xor = (hashes ^ np.int64(value)).view(np.uint8).reshape(-1, 8)
+    return np.unpackbits(xor, axis=1).sum(axis=1)
+
+
+def prompt_key(text: str, language: str = "", user: str = "") -> str:
+    """Key for the question a user asked with an image (case and whitespace insensitive)."""
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha256(f"{user}\n{language}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+class ImageDedupIndex:
+    """Persistent near-duplicate index of diagnosed images."""
+
+    def __init__(
+        self,
+        path: str,
+        max_distance: int = 6,
+        max_entries: int = 5000,
+        ttl_seconds: float = 30 * 24 * 3600,
+    ):
+        self.path = path
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS diagnoses ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " phash INTEGER NOT NULL,"
+            " dhash INTEGER NOT NULL,"
+            " prompt_key TEXT NOT NULL,"
+            " result TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_hit_at REAL NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.commit()
+        self._load()
+
+    def _load(self):
+        """Build the in-memory hash arrays from SQLite."""
+        self._ids = np.empty(0, dtype=np.int64)
+        self._phashes = np.empty(0, dtype=np.int64)
+        self._dhashes = np.empty(0, dtype=np.int64)
+        self._prompt_keys = np.empty(0, dtype=object)
+        self._created_at = np.empty(0, dtype=np.float64)
+        self._load_new()
+
+    def _load_new(self):
+        """Append rows added since the last load, by this or another process."""
+        last_id = int(self._ids[-1]) if len(self._ids) else 0
+        rows = self._conn.execute(
+            "SELECT id, phash, dhash, prompt_key, created_at FROM diagnoses WHERE id > ? ORDER BY id", (last_id,)
+        ).fetchall()
+        if rows:
+            self._ids = np.append(self._ids, np.array([row[0] for row in rows], dtype=np.int64))
+            self._phashes = np.append(self._phashes, np.array([row[1] for row in rows], dtype=np.int64))
+            self._dhashes = np.append(self._dhashes, np.array([row[2] for row in rows], dtype=np.int64))
+            self._prompt_keys = np.append(self._prompt_keys, np.array([row[3] for row in rows], dtype=object))
+            self._created_at = np.append(self._created_at, np.array([row[4] for row in rows], dtype=np.float64))
+        metrics.set_gauge("image_dedup_entries", len(self._ids))
+
+    def _drop(self, entry_ids):
+        """Remove evicted entries from the in-memory arrays."""
+        keep = ~np.isin(self._ids, np.fromiter(entry_ids, dtype=np.int64))
+        self._ids = self._ids[keep]
+        self._phashes = self._phashes[keep]
+        self._dhashes = self._dhashes[keep]
+        self._prompt_keys = self._prompt_keys[keep]
+        self._created_at = self._created_at[keep]
+        metrics.set_gauge("image_dedup_entries", len(self._ids))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def lookup(self, hashes: Tuple[int, int], key: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the closest unexpired indexed image asked with the same prompt key.
+
+        Returns:
+            Stored result dict, or None if nothing is within `max_distance`
+        """
+        now = time.time()
+        with self._lock:
+            self._load_new()
+            p_dist = hamming_distances(self._phashes, hashes[0])
+            d_dist = hamming_distances(self._dhashes, hashes[1])
+            matches = (
+                (p_dist <= self.max_distance)
+                & (d_dist <= self.max_distance)
+                & (self._prompt_keys == key)
+                & (self._created_at >= now - self.ttl_seconds)
+            )
+            candidates = np.flatnonzero(matches)
+            # Closest first; rows another worker evicted are skipped and dropped
+            candidates = candidates[np.argsort(p_dist[candidates] + d_dist[candidates], kind="stable")]
+            row = None
+            deleted = set()
+            for best in candidates:
+                entry_id = int(self._ids[best])
+                row = self._conn.execute("SELECT result FROM diagnoses WHERE id = ?", (entry_id,)).fetchone()
+                if row is not None:
+                    break
+                deleted.add(entry_id)
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE diagnoses SET last_hit_at = ?, hits = hits + 1 WHERE id = ?", (now, entry_id)
+                )
+                self._conn.commit()
+                distance = int(p_dist[best])
+            if deleted:
+                self._drop(deleted)
+
+        if row is None:
+            metrics.increment("image_dedup_lookups_total", result="miss")
+            return None
+        metrics.increment("image_dedup_lookups_total", result="hit")
+        metrics.observe("image_dedup_match_distance", distance, buckets=(0, 1, 2, 4, 6, 8, 12, 16))
+        return json.loads(row[0])
+
+    def add(self, hashes: Tuple[int, int], key: str, result: Dict[str, Any]):
+        """Index a diagnosed image and evict expired or least recently used entries."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO diagnoses (phash, dhash, prompt_key, result, created_at, last_hit_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (hashes[0], hashes[1], key, json.dumps(result, ensure_ascii=False), now, now),
+            )
+            evicted = self._evict(now)
+            self._conn.commit()
+            self._load_new()
+            if evicted:
+                self._drop(evicted)
+
+    def _evict(self, now: float) -> Set[int]:
+        """Delete expired and least recently used rows; returns their ids."""
+        expired = [
+            row[0] for row in self._conn.execute(
+                "SELECT id FROM diagnoses WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+        ]
+        overflow = [
+            row[0] for row in self._conn.execute(
+                "SELECT id FROM diagnoses WHERE created_at >= ?"
+                " ORDER BY last_hit_at DESC LIMIT -1 OFFSET ?",
+                (now - self.ttl_seconds, self.max_entries),
+            )
+        ]
+        evicted = set(expired) | set(overflow)
+        if evicted:
+            self._conn.executemany("DELETE FROM diagnoses WHERE id = ?", [(entry_id,) for entry_id in evicted])
+            metrics.increment("image_dedup_evictions_total", len(evicted))
+        return evicted
+
+
+# Singleton instance
+_image_dedup_index: Optional[ImageDedupIndex] = None
+
+
+def get_image_dedup_index() -> ImageDedupIndex:
+    """Get or create the image dedup index singleton."""
+    global _image_dedup_index
+    if _image_dedup_index is None:
+        _image_dedup_index = ImageDedupIndex(
+            settings.IMAGE_DEDUP_DB,
+            max_distance=settings.IMAGE_DEDUP_MAX_DISTANCE,
+            max_entries=settings.IMAGE_DEDUP_MAX_ENTRIES,
+            ttl_seconds=settings.IMAGE_DEDUP_TTL_SECONDS,
+        )
+    return _image_dedup_index
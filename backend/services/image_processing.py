@@ -0,0 +1,165 @@
+"""
+Image normalization before Gemini and storage.
+
+Farmers' phone photos are often 4-12 MB and 12+ megapixels, far more than the
+vision model uses. `normalize_image` decodes once (JPEG draft mode scales down
+during decoding), applies the EXIF orientation, drops all metadata (including
+GPS), downsizes to IMAGE_MAX_DIMENSION on the long side and re-encodes at
+IMAGE_QUALITY. It returns the new bytes with the detected MIME type and the
+byte and image-token counts before and after.
+"""
+
+import io
+import logging
+import math
+import time
+from typing import Any, Dict, Optional
+
+from PIL import Image, ImageOps
+
+from config.settings import settings
+from services.metrics import BYTE_BUCKETS, metrics
+
+logger = logging.getLogger(__name__)
+
+# Magic-number prefixes of formats the vision model accepts
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+# Gemini bills images in tiles of 258 tokens
+TOKENS_PER_TILE = 258
+
+OUTPUT_FORMATS = {
+    "image/jpeg": "JPEG",
+    "image/webp": "WEBP",
+}
+
+
+def detect_mime_type(data: bytes) -> Optional[str]:
+    """Detect an image MIME type from its leading bytes."""
+    for signature, mime_type in _SIGNATURES:
+        if data.startswith(signature):
+            return mime_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[4:8] == b"ftyp" and data[8:12] in (b"heic", b"heix", b"mif1", b"msf1"):
+        return "image/heic"
+    return None
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """
+    Estimate the Gemini tokens billed for an image of the given size.
+
+    Images up to 384px on both sides cost one tile. Larger images are cut into
+    square tiles whose side is two thirds of the short edge, clamped to
+    256-768px, and each tile costs TOKENS_PER_TILE.
+    """
+    if width <= 384 and height <= 384:
+        return TOKENS_PER_TILE
+    tile = min(768, max(256, int(min(width, height) / 1.5)))
+    return math.ceil(width / tile) * math.ceil(height / tile) * TOKENS_PER_TILE
+
+
+def normalize_image(
+    data: bytes,
+    max_dimension: Optional[int] = None,
+    quality: Optional[int] = None,
+    output_mime_type: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Orient, strip, downsize and re-encode an image.
+
+    Args:
+        data: Original image bytes
+        max_dimension: Longest side after resizing (default: IMAGE_MAX_DIMENSION)
+        quality: Encoder quality 1-95 (default: IMAGE_QUALITY)
+        output_mime_type: "image/jpeg" or "image/webp" (default: IMAGE_OUTPUT_MIME_TYPE)
+
+    Returns:
+        Dict with `data`, `mime_type`, `width`, `height`, `original_bytes`,
+        `bytes`, `original_mime_type`, `tokens_before` and `tokens_after`
+
+    Raises:
+        ValueError: If the bytes are not a decodable image
+    """
+    max_dimension = max_dimension or settings.IMAGE_MAX_DIMENSION
+    quality = quality or settings.IMAGE_QUALITY
+    output_mime_type = output_mime_type or settings.IMAGE_OUTPUT_MIME_TYPE
+    if output_mime_type not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output image type: {output_mime_type}")
+
+    started = time.time()
+    try:
+        image = Image.open(io.BytesIO(data))
+        original_mime_type = Image.MIME.get(image.format) or detect_mime_type(data)
+        original_size = image.size
+        orientation = image.getexif().get(0x0112, 1)
+
+        # Let the JPEG decoder scale by 1/2, 1/4 or 1/8 while decoding. Draft
+        # sizes refer to the stored (unrotated) frame, so a square target works
+        # for either orientation.
+        if image.format == "JPEG":
+            image.draft("RGB", (max_dimension, max_dimension))
+        image.load()
+    except Exception as e:
+        raise ValueError(f"Invalid image data: {str(e)}")
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "L"):
+        # Flatten transparency onto white; JPEG has no alpha channel
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+    # Re-encoding without exif/icc/xmp arguments writes no metadata
+    output = io.BytesIO()
+    image.save(output, format=OUTPUT_FORMATS[output_mime_type], quality=quality, optimize=True)
+    normalized = output.getvalue()
+    width, height = image.size
+
+    # Small originals can grow when re-encoded; keep them if nothing needed fixing
+    if (
+        len(normalized) >= len(data)
+        and original_mime_type == output_mime_type
+        and orientation == 1
+        and max(original_size) <= max_dimension
+        and not _has_metadata(data)
+    ):
+        normalized = data
+        width, height = original_size
+
+    result = {
+        "data": normalized,
+        "mime_type": output_mime_type,
+        "width": width,
+        "height": height,
+        "original_mime_type": original_mime_type,
+        "original_bytes": len(data),
+        "bytes": len(normalized),
+        "tokens_before": estimate_image_tokens(*original_size),
+        "tokens_after": estimate_image_tokens(width, height),
+    }
+
+    metrics.observe("image_normalize_seconds", time.time() - started)
+    metrics.observe("image_bytes", result["original_bytes"], buckets=BYTE_BUCKETS, stage="original")
+    metrics.observe("image_bytes", result["bytes"], buckets=BYTE_BUCKETS, stage="normalized")
+    metrics.increment("image_tokens_total", result["tokens_before"], stage="original")
+    metrics.increment("image_tokens_total", result["tokens_after"], stage="normalized")
+    logger.info(
+        f"Normalized image {original_size[0]}x{original_size[1]} {result['original_bytes']}B "
+        f"(~{result['tokens_before']} tokens) -> {width}x{height} {result['bytes']}B "
+        f"(~{result['tokens_after']} tokens)"
+    )
+    return result
+
+
+def _has_metadata(data: bytes) -> bool:
+    """Whether a JPEG carries EXIF/XMP (APP1) or ICC (APP2) segments."""
+    return b"\xff\xe1" in data[:65536] or b"\xff\xe2" in data[:65536]
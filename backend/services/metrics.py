@@ -0,0 +1,133 @@
+"""
+In-process metrics registry for Kisan AI.
+
+Counters, gauges and histograms keyed by name and labels, rendered in the
+Prometheus text exposition format by the /metrics endpoint. Recording is a
+no-op when ENABLE_METRICS is false.
+"""
+
+import bisect
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+from config.settings import settings
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Default histogram buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Histogram buckets for payload sizes (bytes)
+BYTE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class Metrics:
+    """Thread-safe metrics registry."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+
+    def increment(self, name: str, value: float = 1.0, **labels):
+        """Add `value` to a counter."""
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """Set a gauge to `value`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = LATENCY_BUCKETS, **labels):
+        """Record `value` in a histogram."""
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def get(self, name: str, **labels) -> float:
+        """Return the current value of a counter or gauge (0 if unset)."""
+        key = _label_key(labels)
+        with self._lock:
+            for store in (self._counters, self._gauges):
+                if name in store and key in store[name]:
+                    return store[name][key]
+        return 0.0
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Return counters, gauges and histogram count/sum as plain dicts."""
+        with self._lock:
+            result: Dict[str, Dict[str, float]] = {}
+            for store in (self._counters, self._gauges):
+                for name, series in store.items():
+                    for key, value in series.items():
+                        result.setdefault(name, {})[_format_labels(key)] = value
+            for name, series in self._histograms.items():
+                for key, histogram in series.items():
+                    labels = _format_labels(key)
+                    result.setdefault(f"{name}_count", {})[labels] = histogram.count
+                    result.setdefault(f"{name}_sum", {})[labels] = histogram.sum
+            return result
+
+    def render_prometheus(self) -> str:
+        """Render all series in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(store.items()):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for key, value in series.items():
+                        lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', str(bound)))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {histogram.count}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry
+metrics = Metrics(enabled=settings.ENABLE_METRICS)
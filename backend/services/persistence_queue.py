@@ -0,0 +1,383 @@
+"""
+Background persistence queue for Kisan AI.
+
+Firestore writes don't need to finish before the farmer gets a reply, so
+callers enqueue them here and return immediately. Uploads are not queued:
+their signed URLs go back to the client, which fetches the object at once. A bounded asyncio
+queue feeds a pool of workers that run the (blocking) handlers in threads and
+retry with exponential backoff. When the queue is full, or a job keeps
+failing, it is appended to a JSONL spill file on disk and replayed later, so
+nothing is lost across bursts or restarts. Jobs still running when shutdown
+times out are spilled too, and may run twice; handlers must be idempotent.
+Spill writes and replay reads (open, fsync, flock) run on a writer thread
+and in worker threads, never on the event loop. The spill file is locked
+across processes, so uvicorn workers can share it.
+
+Jobs are a handler name plus a JSON-serializable payload (bytes and datetimes
+are encoded transparently). Handlers are registered by the services that own
+the clients, e.g. ``queue.register("storage.set_document", fn)``.
+"""
+
+import asyncio
+import atexit
+import base64
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # No cross-process spill lock on Windows
+    fcntl = None
+
+from config.settings import settings
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        if set(value) == {"__bytes__"}:
+            return base64.b64decode(value["__bytes__"])
+        if set(value) == {"__datetime__"}:
+            return datetime.fromisoformat(value["__datetime__"])
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+class PersistenceQueue:
+    """Bounded in-process work queue with a worker pool and disk spill."""
+
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        workers: int = 4,
+        max_retries: int = 5,
+        retry_base_seconds: float = 0.5,
+        spill_path: str = "persistence_spill.jsonl",
+        replay_interval_seconds: float = 5.0,
+    ):
+        self.maxsize = maxsize
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.spill_path = Path(spill_path)
+        self.replay_interval_seconds = replay_interval_seconds
+
+        self._handlers: Dict[str, Callable[..., Any]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._inflight: Dict[int, Dict[str, Any]] = {}
+        self._spill_lock = threading.Lock()
+        self._spill_lines: "queue.Queue[Tuple[Path, str, str, bool]]" = queue.Queue()
+        self._spill_writer: Optional[threading.Thread] = None
+        self._spill_writer_lock = threading.Lock()
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def register(self, name: str, handler: Callable[..., Any]):
+        """
+        Register a handler called as ``handler(**payload)``.
+
+        Blocking handlers run in a worker thread; coroutine functions are awaited.
+        """
+        self._handlers[name] = handler
+
+    async def start(self):
+        """Start the worker pool and replay anything spilled by a previous run."""
+        if self._running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._running = True
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._replay_loop()))
+        logger.info(f"Persistence queue started with {self.workers} workers")
+
+    async def stop(self, timeout: float = 10.0):
+        """Drain the queue for up to `timeout` seconds, then spill what is left."""
+        if not self._running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Persistence queue did not drain in time; spilling remaining jobs")
+        self._running = False
+        # Jobs cut off mid-run are replayed later rather than dropped
+        for job in self._inflight.values():
+            self._spill(job)
+        self._inflight.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            self._spill(job)
+        self._update_depth()
+        await asyncio.to_thread(self.flush_spills)
+
+    def enqueue(self, name: str, payload: Dict[str, Any]) -> bool:
+        """
+        Schedule a job without blocking.
+
+        Returns:
+            True if the job was queued in memory, False if it was spilled to disk
+        """
+        job = {"name": name, "payload": payload, "enqueued_at": time.time(), "attempts": 0}
+        if self._queue is None or not self._running:
+            self._spill(job)
+            return False
+        try:
+            self._queue.put_nowait(job)
+            metrics.increment("persistence_jobs_enqueued_total", job=name)
+            self._update_depth()
+            return True
+        except asyncio.QueueFull:
+            self._spill(job)
+            return False
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job = await self._queue.get()
+            self._inflight[worker_id] = job
+            try:
+                await self._run(job)
+            finally:
+                self._inflight.pop(worker_id, None)
+                self._queue.task_done()
+                self._update_depth()
+
+    async def _run(self, job: Dict[str, Any]):
+        name = job["name"]
+        metrics.observe("persistence_queue_lag_seconds", time.time() - job["enqueued_at"], job=name)
+
+        handler = self._handlers.get(name)
+        if handler is None:
+            logger.warning(f"No handler registered for persistence job {name}; spilling")
+            self._spill(job)
+            return
+
+        started = time.time()
+        for attempt in range(self.max_retries + 1):
+            try:
+                if asyncio.iscoroutinefunction(handler):
+                    await handler(**job["payload"])
+                else:
+                    await asyncio.to_thread(handler, **job["payload"])
+                metrics.increment("persistence_jobs_total", job=name, status="ok")
+                metrics.observe("persistence_job_seconds", time.time() - started, job=name)
+                return
+            except Exception as e:
+                job["attempts"] += 1
+                if attempt == self.max_retries:
+                    logger.error(f"Persistence job {name} failed after {job['attempts']} attempts: {str(e)}")
+                    metrics.increment("persistence_jobs_total", job=name, status="failed")
+                    self._spill(job, failed=True)
+                    return
+                metrics.increment("persistence_retries_total", job=name)
+                delay = self.retry_base_seconds * (2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+    def _spill(self, job: Dict[str, Any], failed: bool = False):
+        """
+        Append a job to the spill file (or the dead-letter file if it exhausted retries).
+
+        On the event loop the line is handed to the spill writer thread, so a
+        slow disk never stalls requests; elsewhere (scripts) it is written
+        before returning.
+        """
+        path = self.spill_path.with_suffix(".failed.jsonl") if failed else self.spill_path
+        item = (path, json.dumps(_encode(job), ensure_ascii=False), job["name"], failed)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_spilled([item])
+            return
+        self._ensure_spill_writer()
+        self._spill_lines.put(item)
+
+    def flush_spills(self):
+        """Block until every line handed to the spill writer is on disk."""
+        self._spill_lines.join()
+
+    def _ensure_spill_writer(self):
+        with self._spill_writer_lock:
+            if self._spill_writer is None or not self._spill_writer.is_alive():
+                if self._spill_writer is None:
+                    # Lines handed over just before exit still reach the disk
+                    atexit.register(self.flush_spills)
+                self._spill_writer = threading.Thread(
+                    target=self._spill_writer_loop, name="persistence-spill", daemon=True
+                )
+                self._spill_writer.start()
+
+    def _spill_writer_loop(self):
+        while True:
+            items = [self._spill_lines.get()]
+            # Batch whatever else is waiting into the same fsync
+            while True:
+                try:
+                    items.append(self._spill_lines.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_spilled(items)
+            except Exception as e:
+                logger.error(f"Could not write {len(items)} spilled persistence jobs: {str(e)}")
+            finally:
+                for _ in items:
+                    self._spill_lines.task_done()
+
+    def _write_spilled(self, items: List[Tuple[Path, str, str, bool]]):
+        by_path: Dict[Path, List[str]] = {}
+        for path, line, _, _ in items:
+            by_path.setdefault(path, []).append(line + "\n")
+        with self._locked_spill():
+            for path, lines in by_path.items():
+                with open(path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+        for _, _, name, failed in items:
+            metrics.increment("persistence_jobs_spilled_total", job=name, failed=str(failed).lower())
+
+    @contextmanager
+    def _locked_spill(self):
+        """Hold the spill files against other threads and other worker processes."""
+        with self._spill_lock:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spill_path.with_suffix(".lock"), "a") as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock, fcntl.LOCK_UN)
+
+    async def _replay_loop(self):
+        while True:
+            try:
+                await self.replay_spilled()
+            except Exception as e:
+                logger.error(f"Persistence spill replay error: {str(e)}")
+            await asyncio.sleep(self.replay_interval_seconds)
+
+    async def replay_spilled(self) -> int:
+        """
+        Move spilled jobs back into the in-memory queue while it has room.
+
+        Returns:
+            Number of jobs re-queued
+        """
+        if self._queue is None:
+            return 0
+        room = self.maxsize - self._queue.qsize() if self.maxsize > 0 else 1000
+        if room <= 0:
+            return 0
+
+        jobs = await asyncio.to_thread(self._take_spilled, room, set(self._handlers))
+        requeued = 0
+        for job in jobs:
+            try:
+                self._queue.put_nowait(job)
+                requeued += 1
+            except asyncio.QueueFull:
+                # Filled up by new enqueues while the file was being read
+                self._spill(job)
+
+        if requeued:
+            logger.info(f"Re-queued {requeued} spilled persistence jobs")
+            self._update_depth()
+        return requeued
+
+    def _take_spilled(self, limit: int, names: Set[str]) -> List[Dict[str, Any]]:
+        """Remove up to `limit` jobs with a registered handler from the spill file."""
+        if not self.spill_path.exists():
+            return []
+
+        taken = []
+        leftover = []
+        with self._locked_spill():
+            if not self.spill_path.exists():
+                return []
+            with open(self.spill_path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    if len(taken) >= limit or json.loads(line)["name"] not in names:
+                        leftover.append(line)
+                        continue
+                    taken.append(_decode(json.loads(line)))
+
+            if leftover:
+                pending_path = self.spill_path.with_suffix(".pending.jsonl")
+                with open(pending_path, "w", encoding="utf-8") as f:
+                    f.writelines(leftover)
+                    f.flush()
+                    os.fsync(f.fileno())
+                pending_path.replace(self.spill_path)
+            else:
+                self.spill_path.unlink()
+        return taken
+
+    def _update_depth(self):
+        if self._queue is not None:
+            metrics.set_gauge("persistence_queue_depth", self._queue.qsize())
+
+
+def defer_enabled(defer: Optional[bool] = None) -> bool:
+    """
+    Whether a write should go through the persistence queue.
+
+    `defer` overrides settings.PERSISTENCE_DEFER_WRITES; either way writes run
+    inline when the queue has not been started (scripts, tests).
+    """
+    wanted = settings.PERSISTENCE_DEFER_WRITES if defer is None else defer
+    return wanted and get_persistence_queue().running
+
+
+# Singleton instance
+_persistence_queue: Optional[PersistenceQueue] = None
+
+
+def get_persistence_queue() -> PersistenceQueue:
+    """Get or create the persistence queue singleton."""
+    global _persistence_queue
+    if _persistence_queue is None:
+        _persistence_queue = PersistenceQueue(
+            maxsize=settings.PERSISTENCE_QUEUE_SIZE,
+            workers=settings.PERSISTENCE_WORKERS,
+            max_retries=settings.PERSISTENCE_MAX_RETRIES,
+            retry_base_seconds=settings.PERSISTENCE_RETRY_BASE_SECONDS,
+            spill_path=settings.PERSISTENCE_SPILL_PATH,
+        )
+    return _persistence_queue
@@ -2,16 +2,85 @@
 Qdrant Vector Database Service for KisanVaani
 
 This module provides Qdrant-based vector storage and retrieval
-for the government schemes RAG functionality.
+for the government schemes RAG functionality. `AsyncQdrantService` serves
+the query path from async agent tools without blocking the event loop.
+
+Collections carry a BM25 sparse vector next to the dense embedding; search
+runs both legs in one `query_points` call and fuses them with reciprocal rank
+fusion, so exact scheme names and codes are found even when the dense score
+is low. Collections created without the sparse field fall back to dense-only
+search.
+
+Vector storage (quantization, HNSW, on-disk vectors) follows a collection
+profile from services/collection_profiles.py.
+
+Scheme chunks carry indexed payload fields (state, scope, categories,
+language, source; see services/scheme_metadata.py), and searches accept
+`filters` that are applied inside both legs.
+
+With a reranker (RERANK_ENABLED), searches fetch RERANK_CANDIDATES chunks
+and return the best `top_k` by cross-encoder score (services/reranker.py).
+
+Query embeddings and search results are cached (services/search_cache.py).
+Result entries are keyed by the collection's content version, which every
+write (ingestion, deletes, recreation) replaces in QDRANT_META_COLLECTION.
+
+Without a reachable server (or with QDRANT_EMBEDDED), Qdrant runs embedded
+in the process and persists to QDRANT_LOCAL_PATH. The storage takes one
+client per process, shared by the sync and async services, and a single
+worker: a second process fails with EmbeddedQdrantLocked. A collection can be
+exported to a snapshot file (points with their vectors and payloads) and
+restored on another node without any embedding calls; at startup, an empty
+collection is restored from QDRANT_SNAPSHOT_PATH (bootstrap_from_snapshot).
 """
 
+import asyncio
+import base64
+import gzip
+import itertools
+import json
 import os
-from typing import List, Optional
+import random
+import threading
+import time
+import uuid
+from array import array
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    Distance,
+    FieldCondition,
+    Filter,
+    Fusion,
+    FusionQuery,
+    IsEmptyCondition,
+    MatchAny,
+    MatchValue,
+    Modifier,
+    PayloadField,
+    PayloadSchemaType,
+    PointIdsList,
+    PointStruct,
+    Prefetch,
+    SearchParams,
+    SparseVector,
+    SparseVectorParams,
+    VectorParams,
+)
 import google.generativeai as genai
 
+from config.settings import settings
+from services.collection_profiles import get_profile, hnsw_config, quantization_config, search_params
+from services.embedding_cache import log_query
+from services.embeddings import BatchEmbedder, create_batch_embedder
+from services.reranker import Reranker, get_reranker
+from services.search_cache import SearchCache, get_search_cache
+from services.scheme_metadata import CATEGORY_KEYWORDS, PAYLOAD_INDEX_FIELDS, normalize_state
+from services.sparse_encoder import SPARSE_VECTOR_NAME, BM25Encoder, create_bm25_encoder
+
 load_dotenv()
 
 # Configuration
@@ -20,54 +89,216 @@ QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
 QDRANT_URL = os.getenv("QDRANT_URL")  # For Qdrant Cloud
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")  # For Qdrant Cloud
 COLLECTION_NAME = os.getenv("QDRANT_COLLECTION_NAME", "government_schemes")
+META_COLLECTION = settings.QDRANT_META_COLLECTION
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/embedding-001")
+SNAPSHOT_FORMAT = "kisanvaani-qdrant-snapshot/1"
+
+# Whether this process uses embedded Qdrant; decided once (see _use_embedded)
+_embedded: Optional[bool] = None
+
+
+def _use_embedded() -> bool:
+    """
+    Whether to run Qdrant embedded at QDRANT_LOCAL_PATH instead of using the
+    server at QDRANT_HOST:QDRANT_PORT: always with QDRANT_EMBEDDED, otherwise
+    when the server is unreachable. Decided once per process, so the sync and
+    async services use the same storage.
+    """
+    global _embedded
+    if _embedded is None:
+        if settings.QDRANT_EMBEDDED:
+            _embedded = True
+        else:
+            probe = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT, timeout=5)
+            try:
+                probe.get_collections()
+                print(f"Connected to Qdrant at {QDRANT_HOST}:{QDRANT_PORT}")
+                _embedded = False
+            except Exception as e:
+                print(f"Could not connect to Qdrant server: {e}")
+                _embedded = True
+            finally:
+                probe.close()
+    return _embedded
+
+
+class EmbeddedQdrantLocked(RuntimeError):
+    """Raised when embedded Qdrant would be shared between worker processes."""
+
+
+# Embedded clients by storage path. Local Qdrant locks its storage directory
+# and is not thread-safe, so a process opens one client per path, shares it
+# between the sync and async services and runs one call on it at a time.
+_embedded_clients: Dict[str, "_LockedClient"] = {}
+_embedded_clients_lock = threading.Lock()
+
+
+class _LockedClient:
+    """Client wrapper that serializes method calls."""
+    
+    def __init__(self, client: QdrantClient):
+        self._client = client
+        self._lock = threading.Lock()
+    
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+        
+        def call(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return call
+
+
+class _EmbeddedAsyncClient:
+    """Async facade over the shared embedded client; calls run in a thread."""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.client = _embedded_client(path)
+    
+    def __getattr__(self, name: str):
+        method = getattr(self.client, name)
+        
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return call
+    
+    async def close(self):
+        await asyncio.to_thread(_close_embedded_client, self.path)
+
+
+def _embedded_client(path: str) -> _LockedClient:
+    """
+    This process's embedded client for `path`, opened on first use.
+    
+    Raises:
+        EmbeddedQdrantLocked: With several workers (WEB_CONCURRENCY > 1), or
+            when another process already holds the storage
+    """
+    path = os.path.abspath(path)
+    with _embedded_clients_lock:
+        if path not in _embedded_clients:
+            workers = os.getenv("WEB_CONCURRENCY", "")
+            if workers.isdigit() and int(workers) > 1:
+                raise EmbeddedQdrantLocked(
+                    f"Embedded Qdrant ({path}) supports a single worker, but WEB_CONCURRENCY={workers}; "
+                    "run one worker or use a Qdrant server (QDRANT_HOST)"
+                )
+            try:
+                _embedded_clients[path] = _LockedClient(QdrantClient(path=path))
+            except RuntimeError as e:
+                if "already accessed" not in str(e):
+                    raise
+                raise EmbeddedQdrantLocked(
+                    f"Embedded Qdrant storage {path} is held by another process; embedded Qdrant supports "
+                    "a single worker (uvicorn --workers 1), use a Qdrant server (QDRANT_HOST) to scale out"
+                ) from e
+        return _embedded_clients[path]
+
+
+def _close_embedded_client(path: str):
+    """Close the embedded client for `path`; the next user reopens the storage."""
+    with _embedded_clients_lock:
+        client = _embedded_clients.pop(os.path.abspath(path), None)
+    if client is not None:
+        client.close()
 
 
 class QdrantService:
     """Service class for Qdrant vector database operations."""
     
-    def __init__(self, use_memory: bool = False):
+    def __init__(
+        self,
+        use_memory: bool = False,
+        embedder: Optional[BatchEmbedder] = None,
+        profile: Optional[str] = None,
+        reranker: Optional[Reranker] = None,
+        search_cache: Optional[SearchCache] = None,
+        local_path: Optional[str] = None
+    ):
         """
         Initialize Qdrant client.
         
         Args:
             use_memory: If True, use in-memory Qdrant (for testing without server)
+            local_path: Run Qdrant embedded with its storage in this directory
+                        (one client per directory, shared in the process)
+            embedder: Batch embedder (default: EMBEDDING_BACKEND configured from settings)
+            profile: Collection profile name (default: QDRANT_COLLECTION_PROFILE)
+            reranker: Cross-encoder reranker (default: from settings, None when disabled)
+            search_cache: Query embedding / result cache (default: from settings,
+                          None when disabled)
         """
         self.use_memory = use_memory
+        self.local_path: Optional[str] = None
+        self.profile = get_profile(profile)
         
         if use_memory:
             # Use in-memory Qdrant (no server needed)
             self.client = QdrantClient(":memory:")
             print("Using in-memory Qdrant (data will not persist)")
+        elif local_path:
+            self._open_embedded(local_path)
         elif QDRANT_URL and QDRANT_API_KEY:
             # Use Qdrant Cloud
             self.client = QdrantClient(
                 url=QDRANT_URL,
                 api_key=QDRANT_API_KEY
             )
+        elif _use_embedded():
+            self._open_embedded(settings.QDRANT_LOCAL_PATH)
         else:
-            # Try to use local Qdrant, fall back to in-memory
-            try:
-                self.client = QdrantClient(
-                    host=QDRANT_HOST,
-                    port=QDRANT_PORT
-                )
-                # Test connection
-                self.client.get_collections()
-                print(f"Connected to Qdrant at {QDRANT_HOST}:{QDRANT_PORT}")
-            except Exception as e:
-                print(f"Could not connect to Qdrant server: {e}")
-                print("Falling back to in-memory Qdrant (data will not persist)")
-                self.client = QdrantClient(":memory:")
-                self.use_memory = True
+            self.client = QdrantClient(
+                host=QDRANT_HOST,
+                port=QDRANT_PORT
+            )
         
         # Initialize Google embedding model
         google_api_key = os.getenv("GOOGLE_API_KEY")
         if google_api_key:
             genai.configure(api_key=google_api_key)
         
-        self.embedding_dimension = 768  # Default for Google's embedding model
+        self.embedder = embedder or create_batch_embedder()
+        self.embedding_dimension = self.embedder.dimension
+        self.sparse_encoder = create_bm25_encoder()
+        self.reranker = reranker or get_reranker()
+        self.search_cache = search_cache or get_search_cache()
+        self._hybrid_collections: Dict[str, bool] = {}
+        self._upsert_lock = threading.Lock()
+        
+    def _open_embedded(self, path: str):
+        """Open embedded on-disk Qdrant at `path`, or fall back to in-memory."""
+        try:
+            self.client = _embedded_client(path)
+            self.local_path = path
+            print(f"Using embedded Qdrant at {path} (data persists on disk)")
+        except EmbeddedQdrantLocked:
+            # An empty in-memory index would silently answer for this worker
+            raise
+        except Exception as e:
+            print(f"Could not open embedded Qdrant at {path}: {e}")
+            print("Falling back to in-memory Qdrant (data will not persist)")
+            self.client = QdrantClient(":memory:")
+            self.use_memory = True
+    
+    def get_embeddings(self, texts: List[str], task_type: str = "retrieval_document") -> List[List[float]]:
+        """
+        Generate embeddings for many texts with batched, concurrent requests.
         
+        Args:
+            texts: Texts to embed
+            task_type: Embedding task type
+            
+        Returns:
+            Embedding vectors in the order of `texts`
+            
+        Raises:
+            EmbeddingError: If a batch still fails after retries
+        """
+        return self.embedder.embed(texts, task_type=task_type)
+    
     def get_embedding(self, text: str) -> List[float]:
         """
         Generate embedding for given text using Google's embedding model.
@@ -78,17 +309,7 @@ class QdrantService:
         Returns:
             List of floats representing the embedding vector
         """
-        try:
-            result = genai.embed_content(
-                model=EMBEDDING_MODEL,
-                content=text,
-                task_type="retrieval_document"
-            )
-            return result['embedding']
-        except Exception as e:
-            print(f"Error generating embedding: {e}")
-            # Return zero vector as fallback
-            return [0.0] * self.embedding_dimension
+        return self.get_embeddings([text])[0]
     
     def get_query_embedding(self, text: str) -> List[float]:
         """
@@ -100,23 +321,22 @@ class QdrantService:
         Returns:
             List of floats representing the embedding vector
         """
-        try:
-            result = genai.embed_content(
-                model=EMBEDDING_MODEL,
-                content=text,
-                task_type="retrieval_query"
-            )
-            return result['embedding']
-        except Exception as e:
-            print(f"Error generating query embedding: {e}")
-            return [0.0] * self.embedding_dimension
+        if self.search_cache is not None:
+            cached = self.search_cache.get_embedding(self.embedder.model, text)
+            if cached is not None:
+                return cached
+        embedding = self.get_embeddings([text], task_type="retrieval_query")[0]
+        if self.search_cache is not None:
+            self.search_cache.set_embedding(self.embedder.model, text, embedding)
+        return embedding
     
-    def create_collection(self, collection_name: str = COLLECTION_NAME) -> bool:
+    def create_collection(self, collection_name: str = COLLECTION_NAME, profile: Optional[str] = None) -> bool:
         """
         Create a collection in Qdrant if it doesn't exist.
         
         Args:
             collection_name: Name of the collection
+            profile: Collection profile name (default: this service's profile)
             
         Returns:
             True if successful
@@ -126,21 +346,41 @@ class QdrantService:
             collection_names = [c.name for c in collections]
             
             if collection_name not in collection_names:
+                profile_config = get_profile(profile) if profile else self.profile
                 self.client.create_collection(
                     collection_name=collection_name,
                     vectors_config=VectorParams(
                         size=self.embedding_dimension,
-                        distance=Distance.COSINE
-                    )
+                        distance=Distance.COSINE,
+                        on_disk=profile_config["on_disk"]
+                    ),
+                    hnsw_config=hnsw_config(profile_config),
+                    quantization_config=quantization_config(profile_config),
+                    sparse_vectors_config=_sparse_vectors_config()
                 )
+                self._hybrid_collections.pop(collection_name, None)
                 print(f"Created collection: {collection_name}")
             else:
                 print(f"Collection {collection_name} already exists")
+                size = _dense_size(self.client.get_collection(collection_name=collection_name))
+                if size is not None and size != self.embedding_dimension:
+                    print(f"Warning: {collection_name} holds {size}-dim vectors but {self.embedder.model} "
+                          f"produces {self.embedding_dimension}; rebuild it with the current model")
+            self.create_payload_indexes(collection_name)
             return True
         except Exception as e:
             print(f"Error creating collection: {e}")
             return False
     
+    def create_payload_indexes(self, collection_name: str = COLLECTION_NAME):
+        """Create keyword indexes on the filterable payload fields (idempotent)."""
+        for field in PAYLOAD_INDEX_FIELDS:
+            self.client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field,
+                field_schema=PayloadSchemaType.KEYWORD
+            )
+    
     def add_documents(
         self,
         documents: List[dict],
@@ -154,39 +394,134 @@ class QdrantService:
             collection_name: Name of the collection
             
         Returns:
-            True if successful
+            True if every document was indexed
         """
-        try:
-            points = []
-            for doc in documents:
-                embedding = self.get_embedding(doc['text'])
-                point = PointStruct(
-                    id=doc['id'],
-                    vector=embedding,
-                    payload={
-                        "text": doc['text'],
-                        "source": doc.get('source', 'unknown'),
-                        "metadata": doc.get('metadata', {})
-                    }
-                )
-                points.append(point)
-            
-            self.client.upsert(
-                collection_name=collection_name,
-                points=points
-            )
-            print(f"Added {len(documents)} documents to {collection_name}")
-            return True
-        except Exception as e:
-            print(f"Error adding documents: {e}")
+        report = self.ingest_documents(documents, collection_name)
+        return report["failed"] == 0
+    
+    def _is_hybrid(self, collection_name: str) -> bool:
+        """Whether the collection has the BM25 sparse field (cached per collection)."""
+        if not settings.HYBRID_SEARCH_ENABLED:
             return False
+        if collection_name not in self._hybrid_collections:
+            self._hybrid_collections[collection_name] = _has_sparse_field(
+                self.client.get_collection(collection_name=collection_name)
+            )
+        return self._hybrid_collections[collection_name]
+    
+    def _build_points(self, documents: List[dict], hybrid: bool = False) -> List[PointStruct]:
+        embeddings = self.get_embeddings([doc['text'] for doc in documents])
+        return [
+            PointStruct(
+                id=doc['id'],
+                vector=_point_vector(embedding, self.sparse_encoder, doc['text']) if hybrid else embedding,
+                payload={
+                    **_index_fields(doc),
+                    "text": doc['text'],
+                    "source": doc.get('source', 'unknown'),
+                    "metadata": doc.get('metadata', {})
+                }
+            )
+            for doc, embedding in zip(documents, embeddings)
+        ]
+    
+    def _upload_batch(self, documents: List[dict], collection_name: str, max_retries: int) -> int:
+        """Embed and upsert one batch, retrying the upsert like `upload_points`."""
+        points = self._build_points(documents, self._is_hybrid(collection_name))
+        # In-memory Qdrant is not thread-safe: embed in parallel, upsert one at a time
+        # (the shared embedded client serializes its own calls)
+        lock = self._upsert_lock if self.use_memory else nullcontext()
+        for attempt in range(max_retries + 1):
+            try:
+                with lock:
+                    self.client.upsert(collection_name=collection_name, points=points, wait=True)
+                return len(points)
+            except Exception as e:
+                if attempt == max_retries:
+                    raise
+                # Capped exponential backoff with jitter, so parallel batches don't retry in lockstep
+                delay = settings.QDRANT_UPSERT_RETRY_BASE_SECONDS * (2 ** attempt)
+                delay = min(settings.QDRANT_UPSERT_RETRY_MAX_SECONDS, delay + random.uniform(0, delay / 2))
+                print(f"Upsert of {len(points)} points failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+    
+    def ingest_documents(
+        self,
+        documents: Iterable[dict],
+        collection_name: str = COLLECTION_NAME,
+        batch_size: Optional[int] = None,
+        parallel: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Stream documents into a collection in batches with bounded parallelism.
+        
+        Documents are consumed lazily, so at most `parallel` batches are held in
+        memory at once. Each batch is embedded and upserted by a worker; a batch
+        that fails after retries is reported without stopping the others.
+        
+        Args:
+            documents: Iterable of dicts with 'id', 'text', and optional 'metadata'
+            collection_name: Name of the collection
+            batch_size: Points per upsert (default: QDRANT_UPSERT_BATCH_SIZE)
+            parallel: Batches in flight (default: QDRANT_UPSERT_PARALLEL)
+            max_retries: Upsert retries per batch (default: QDRANT_UPSERT_MAX_RETRIES)
+            progress: Called with the running report after each batch
+            
+        Returns:
+            Report with `indexed`, `failed`, `batches`, `failed_ids`, `seconds`
+            and `docs_per_sec`
+        """
+        batch_size = batch_size or settings.QDRANT_UPSERT_BATCH_SIZE
+        parallel = parallel or settings.QDRANT_UPSERT_PARALLEL
+        max_retries = settings.QDRANT_UPSERT_MAX_RETRIES if max_retries is None else max_retries
+        
+        report = {"indexed": 0, "failed": 0, "batches": 0, "failed_ids": [], "seconds": 0.0, "docs_per_sec": 0.0}
+        started = time.time()
+        iterator = iter(documents)
+        
+        def finish(future, batch):
+            try:
+                report["indexed"] += future.result()
+            except Exception as e:
+                print(f"Error indexing batch of {len(batch)} documents: {e}")
+                report["failed"] += len(batch)
+                report["failed_ids"].extend(doc['id'] for doc in batch)
+            report["batches"] += 1
+            report["seconds"] = time.time() - started
+            report["docs_per_sec"] = report["indexed"] / report["seconds"] if report["seconds"] else 0.0
+            if progress:
+                progress(dict(report))
+        
+        with ThreadPoolExecutor(max_workers=parallel) as pool:
+            in_flight = {}
+            while True:
+                batch = list(itertools.islice(iterator, batch_size))
+                if batch:
+                    in_flight[pool.submit(self._upload_batch, batch, collection_name, max_retries)] = batch
+                if in_flight and (len(in_flight) >= parallel or not batch):
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finish(future, in_flight.pop(future))
+                if not batch and not in_flight:
+                    break
+        
+        report["seconds"] = time.time() - started
+        if report["indexed"]:
+            self.bump_content_version(collection_name)
+        print(f"Indexed {report['indexed']} documents into {collection_name} in {report['seconds']:.1f}s "
+              f"({report['docs_per_sec']:.1f} docs/s, {report['failed']} failed)")
+        return report
     
     def search(
         self,
         query: str,
         collection_name: str = COLLECTION_NAME,
         top_k: int = 5,
-        score_threshold: float = 0.6
+        score_threshold: float = 0.6,
+        filters: Optional[Dict[str, Any]] = None,
+        rerank: bool = True
     ) -> List[dict]:
         """
         Search for similar documents in the collection.
@@ -195,36 +530,85 @@ class QdrantService:
             query: Search query text
             collection_name: Name of the collection
             top_k: Number of results to return
-            score_threshold: Minimum similarity score
+            score_threshold: Minimum cosine similarity. On hybrid collections it
+                             filters the dense leg only: BM25 matches are kept
+                             whatever their similarity, and fused RRF scores are
+                             rank-based, so no cutoff is applied after fusion
+            filters: Payload filters (see build_filter)
+            rerank: Rerank over-fetched candidates if a reranker is configured
             
         Returns:
-            List of matching documents with scores
+            List of matching documents with scores (fused RRF scores for
+            hybrid collections, cross-encoder scores when reranked)
         """
         try:
-            query_embedding = self.get_query_embedding(query)
+            log_query(query)
+            cache_key = None
+            if self.search_cache is not None:
+                version = self._content_version(collection_name)
+                cache_key = self.search_cache.result_key(
+                    collection_name, version, self.embedder.model, query, filters, top_k, score_threshold, rerank
+                )
+                cached = self.search_cache.get_results(cache_key)
+                if cached is not None:
+                    return cached
             
-            results = self.client.search(
-                collection_name=collection_name,
-                query_vector=query_embedding,
-                limit=top_k,
-                score_threshold=score_threshold
-            )
+            query_embedding = self.get_query_embedding(query)
+            limit = _candidate_limit(self.reranker, top_k, rerank)
             
-            documents = []
-            for result in results:
-                documents.append({
-                    "id": result.id,
-                    "score": result.score,
-                    "text": result.payload.get("text", ""),
-                    "source": result.payload.get("source", ""),
-                    "metadata": result.payload.get("metadata", {})
-                })
+            if self._is_hybrid(collection_name):
+                results = self.client.query_points(
+                    collection_name=collection_name,
+                    **_hybrid_query(query_embedding, self.sparse_encoder, query, limit, score_threshold,
+                                    build_filter(filters), search_params(self.profile))
+                ).points
+            else:
+                results = (self.client.query_points(
+                    collection_name=collection_name,
+                    query=query_embedding,
+                    query_filter=build_filter(filters),
+                    search_params=search_params(self.profile),
+                    limit=limit,
+                    score_threshold=score_threshold,
+                    with_payload=True
+                )).points
             
+            documents = _to_documents(results)
+            if limit > top_k:
+                documents = self.reranker.rerank(query, documents, top_k)
+            if cache_key is not None and _rerank_complete(documents, limit, top_k):
+                self.search_cache.set_results(cache_key, documents)
             return documents
         except Exception as e:
             print(f"Error searching: {e}")
             return []
     
+    def delete_points(self, ids: List, collection_name: str = COLLECTION_NAME) -> bool:
+        """
+        Delete points by id.
+        
+        Args:
+            ids: Point ids to delete
+            collection_name: Name of the collection
+            
+        Returns:
+            True if successful
+        """
+        try:
+            for start in range(0, len(ids), settings.QDRANT_UPSERT_BATCH_SIZE):
+                self.client.delete(
+                    collection_name=collection_name,
+                    points_selector=PointIdsList(points=ids[start:start + settings.QDRANT_UPSERT_BATCH_SIZE]),
+                    wait=True
+                )
+            return True
+        except Exception as e:
+            print(f"Error deleting points: {e}")
+            return False
+        finally:
+            if ids:
+                self.bump_content_version(collection_name)
+    
     def delete_collection(self, collection_name: str = COLLECTION_NAME) -> bool:
         """
         Delete a collection from Qdrant.
@@ -238,11 +622,157 @@ class QdrantService:
         try:
             self.client.delete_collection(collection_name=collection_name)
             print(f"Deleted collection: {collection_name}")
+            self.bump_content_version(collection_name)
             return True
         except Exception as e:
             print(f"Error deleting collection: {e}")
             return False
     
+    def get_content_version(self, collection_name: str = COLLECTION_NAME) -> int:
+        """Content version of a collection (0 if it was never written)."""
+        try:
+            points = self.client.retrieve(collection_name=META_COLLECTION, ids=[_version_point_id(collection_name)])
+        except Exception:
+            # No meta collection yet
+            return 0
+        return points[0].payload.get("version", 0) if points else 0
+    
+    def bump_content_version(self, collection_name: str = COLLECTION_NAME) -> int:
+        """
+        Give a collection a new content version after its points changed.
+        
+        Cached search results for the old version are no longer served, here
+        immediately and in other processes after their next version check.
+        
+        Returns:
+            The new version
+        """
+        version = time.time_ns()
+        try:
+            if not self.client.collection_exists(META_COLLECTION):
+                self.client.create_collection(
+                    collection_name=META_COLLECTION,
+                    vectors_config=VectorParams(size=1, distance=Distance.DOT)
+                )
+            self.client.upsert(
+                collection_name=META_COLLECTION,
+                points=[PointStruct(
+                    id=_version_point_id(collection_name),
+                    vector=[1.0],
+                    payload={"collection": collection_name, "version": version}
+                )],
+                wait=True
+            )
+        except Exception as e:
+            print(f"Error updating content version: {e}")
+        if self.search_cache is not None:
+            self.search_cache.set_version(collection_name, version)
+        return version
+    
+    def _content_version(self, collection_name: str) -> int:
+        version = self.search_cache.version(collection_name)
+        if version is None:
+            version = self.get_content_version(collection_name)
+            self.search_cache.set_version(collection_name, version)
+        return version
+    
+    def export_snapshot(self, path: str, collection_name: str = COLLECTION_NAME) -> int:
+        """
+        Write a collection's points (vectors and payloads) to a snapshot file.
+        
+        The file is gzipped JSON lines: a header with the embedding model and
+        dimension, then one point per line. It is written to a temporary file
+        and moved into place, so a reader never sees a partial snapshot.
+        
+        Args:
+            path: Snapshot file to write
+            collection_name: Name of the collection
+            
+        Returns:
+            Number of points exported
+        """
+        started = time.time()
+        info = self.client.get_collection(collection_name=collection_name)
+        header = {
+            "format": SNAPSHOT_FORMAT,
+            "collection": collection_name,
+            "embedding_model": self.embedder.model,
+            "dimension": _dense_size(info),
+            "sparse": _has_sparse_field(info),
+            "points": info.points_count,
+            "created_at": time.time(),
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        count = 0
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps(header) + "\n")
+            offset = None
+            while True:
+                points, offset = self.client.scroll(
+                    collection_name=collection_name,
+                    limit=settings.QDRANT_UPSERT_BATCH_SIZE,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+                for point in points:
+                    f.write(json.dumps(_snapshot_record(point)) + "\n")
+                count += len(points)
+                if offset is None:
+                    break
+        os.replace(tmp_path, path)
+        print(f"Exported {count} points from {collection_name} to {path} in {time.time() - started:.1f}s")
+        return count
+    
+    def import_snapshot(self, path: str, collection_name: str = COLLECTION_NAME) -> int:
+        """
+        Replace a collection with the points in a snapshot file.
+        
+        No embeddings are computed; the snapshot must come from the same
+        embedding model this service uses for queries.
+        
+        Args:
+            path: Snapshot file written by export_snapshot
+            collection_name: Name of the collection to (re)create
+            
+        Returns:
+            Number of points restored
+            
+        Raises:
+            ValueError: If the file is not a snapshot or was built with another
+                        embedding model
+        """
+        started = time.time()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("format") != SNAPSHOT_FORMAT:
+                raise ValueError(f"{path} is not a {SNAPSHOT_FORMAT} file")
+            if header["embedding_model"] != self.embedder.model or header["dimension"] != self.embedding_dimension:
+                raise ValueError(
+                    f"Snapshot was built with {header['embedding_model']} ({header['dimension']} dims), "
+                    f"but queries are embedded with {self.embedder.model} ({self.embedding_dimension} dims)"
+                )
+            
+            if self.client.collection_exists(collection_name):
+                self.client.delete_collection(collection_name=collection_name)
+            self._hybrid_collections.pop(collection_name, None)
+            self.create_collection(collection_name)
+            hybrid = self._is_hybrid(collection_name)
+            
+            count = 0
+            while True:
+                lines = list(itertools.islice(f, settings.QDRANT_UPSERT_BATCH_SIZE))
+                if not lines:
+                    break
+                points = [_snapshot_point(json.loads(line), hybrid) for line in lines]
+                self.client.upsert(collection_name=collection_name, points=points, wait=True)
+                count += len(points)
+        
+        self.bump_content_version(collection_name)
+        print(f"Restored {count} points into {collection_name} from {path} in {time.time() - started:.1f}s")
+        return count
+    
     def get_collection_info(self, collection_name: str = COLLECTION_NAME) -> dict:
         """
         Get information about a collection.
@@ -264,10 +794,348 @@ class QdrantService:
         except Exception as e:
             print(f"Error getting collection info: {e}")
             return {}
+    
+    def close(self):
+        """Close the client; embedded storage is released for every user in the process."""
+        if self.local_path:
+            _close_embedded_client(self.local_path)
+        else:
+            self.client.close()
+
+
+def _sparse_vectors_config() -> Optional[Dict[str, SparseVectorParams]]:
+    if not settings.HYBRID_SEARCH_ENABLED:
+        return None
+    # Qdrant keeps document frequencies and applies IDF at query time
+    return {SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)}
+
+
+def _dense_size(collection_info) -> Optional[int]:
+    vectors = collection_info.config.params.vectors
+    return getattr(vectors, "size", None)
 
 
-# Singleton instance
+def _has_sparse_field(collection_info) -> bool:
+    return SPARSE_VECTOR_NAME in (collection_info.config.params.sparse_vectors or {})
+
+
+def _point_vector(embedding: List[float], encoder: BM25Encoder, text: str) -> dict:
+    indices, values = encoder.encode_document(text)
+    return {"": embedding, SPARSE_VECTOR_NAME: SparseVector(indices=indices, values=values)}
+
+
+def _hybrid_query(
+    embedding: List[float],
+    encoder: BM25Encoder,
+    query: str,
+    top_k: int,
+    score_threshold: float,
+    query_filter: Optional[Filter] = None,
+    params: Optional[SearchParams] = None
+) -> dict:
+    """
+    `query_points` arguments fusing a dense and a BM25 leg with RRF.
+    
+    The score threshold applies to the dense leg only, so exact-token matches
+    from the sparse leg survive even when their cosine similarity is low.
+    The filter is applied inside both legs; `params` (HNSW ef, quantization
+    rescoring) to the dense leg.
+    """
+    limit = top_k * settings.HYBRID_PREFETCH_MULTIPLIER
+    prefetch = [Prefetch(
+        query=embedding,
+        filter=query_filter,
+        params=params,
+        limit=limit,
+        score_threshold=score_threshold
+    )]
+    indices, values = encoder.encode_query(query)
+    if indices:
+        prefetch.append(Prefetch(
+            query=SparseVector(indices=indices, values=values),
+            using=SPARSE_VECTOR_NAME,
+            filter=query_filter,
+            limit=limit
+        ))
+    return {
+        "prefetch": prefetch,
+        "query": FusionQuery(fusion=Fusion.RRF),
+        "limit": top_k,
+        "with_payload": True,
+    }
+
+
+def _index_fields(doc: dict) -> Dict[str, Any]:
+    """Top-level payload copies of the document's filterable metadata fields."""
+    metadata = doc.get('metadata', {})
+    return {field: metadata[field] for field in PAYLOAD_INDEX_FIELDS if field in metadata}
+
+
+def build_filter(filters: Optional[Dict[str, Any]]) -> Optional[Filter]:
+    """
+    Build a Qdrant filter from search filters.
+    
+    Supported keys:
+        state: Farmer's state; matches that state's chunks and chunks not
+               tied to any state (central and general schemes)
+        scope: "state", "central" or "general"
+        categories: Category or list of categories from CATEGORY_KEYWORDS
+                    (any may match)
+        language: Language code
+        source: Source document file name
+    
+    Unknown states and categories and empty values are ignored.
+    """
+    if not filters:
+        return None
+    
+    must = []
+    state = normalize_state(filters.get("state"))
+    if state:
+        must.append(Filter(should=[
+            FieldCondition(key="state", match=MatchValue(value=state)),
+            IsEmptyCondition(is_empty=PayloadField(key="state"))
+        ]))
+    categories = filters.get("categories")
+    if categories:
+        categories = [categories] if isinstance(categories, str) else list(categories)
+        categories = [category for category in categories if category in CATEGORY_KEYWORDS]
+        if categories:
+            must.append(FieldCondition(key="categories", match=MatchAny(any=categories)))
+    for field in ("scope", "language", "source"):
+        if filters.get(field):
+            must.append(FieldCondition(key=field, match=MatchValue(value=filters[field])))
+    return Filter(must=must) if must else None
+
+
+def _candidate_limit(reranker: Optional[Reranker], top_k: int, rerank: bool) -> int:
+    """Points to fetch: RERANK_CANDIDATES when reranking, else `top_k`."""
+    if rerank and reranker is not None:
+        return max(top_k, settings.RERANK_CANDIDATES)
+    return top_k
+
+
+def _rerank_complete(documents: List[dict], limit: int, top_k: int) -> bool:
+    """False when reranking was skipped under load, so the results are not cached."""
+    return limit <= top_k or len(documents) <= 1 or all("retrieval_score" in doc for doc in documents)
+
+
+def _snapshot_record(point) -> dict:
+    """Snapshot line for a point; the dense vector is stored as base64 float32."""
+    vector = point.vector
+    sparse = None
+    if isinstance(vector, dict):
+        sparse = vector.get(SPARSE_VECTOR_NAME)
+        vector = vector.get("")
+    return {
+        "id": point.id,
+        "vector": base64.b64encode(array("f", vector).tobytes()).decode("ascii"),
+        "sparse": {"indices": list(sparse.indices), "values": list(sparse.values)} if sparse else None,
+        "payload": point.payload,
+    }
+
+
+def _snapshot_point(record: dict, hybrid: bool) -> PointStruct:
+    dense = array("f", base64.b64decode(record["vector"])).tolist()
+    vector = dense
+    if hybrid:
+        vector = {"": dense}
+        if record.get("sparse"):
+            vector[SPARSE_VECTOR_NAME] = SparseVector(**record["sparse"])
+    return PointStruct(id=record["id"], vector=vector, payload=record["payload"])
+
+
+def _version_point_id(collection_name: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"kisanvaani:version:{collection_name}"))
+
+
+def _to_documents(results) -> List[dict]:
+    """Convert scored points to result dicts."""
+    return [
+        {
+            "id": result.id,
+            "score": result.score,
+            "text": result.payload.get("text", ""),
+            "source": result.payload.get("source", ""),
+            "metadata": result.payload.get("metadata", {})
+        }
+        for result in results
+    ]
+
+
+class AsyncQdrantService:
+    """Async query-side Qdrant operations for agent tools."""
+    
+    def __init__(
+        self,
+        use_memory: bool = False,
+        client: Optional[AsyncQdrantClient] = None,
+        embedder: Optional[BatchEmbedder] = None,
+        profile: Optional[str] = None,
+        reranker: Optional[Reranker] = None,
+        search_cache: Optional[SearchCache] = None
+    ):
+        """
+        Initialize the async Qdrant client.
+        
+        The client keeps a pooled connection, so one instance should be
+        reused for the lifetime of the process (see get_async_qdrant_service).
+        
+        Args:
+            use_memory: If True, use in-memory Qdrant (for testing without server)
+            client: Existing async client to use instead of creating one
+            embedder: Batch embedder (default: EMBEDDING_BACKEND configured from settings)
+            profile: Collection profile name for search parameters
+                     (default: QDRANT_COLLECTION_PROFILE)
+            reranker: Cross-encoder reranker (default: from settings, None when disabled)
+            search_cache: Query embedding / result cache (default: from settings,
+                          None when disabled)
+        """
+        self.profile = get_profile(profile)
+        if client is not None:
+            self.client = client
+        elif use_memory:
+            self.client = AsyncQdrantClient(":memory:")
+        elif QDRANT_URL and QDRANT_API_KEY:
+            self.client = AsyncQdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+        elif _use_embedded():
+            # Local Qdrant allows one client per storage: share the sync one
+            self.client = _EmbeddedAsyncClient(settings.QDRANT_LOCAL_PATH)
+        else:
+            self.client = AsyncQdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+        
+        google_api_key = os.getenv("GOOGLE_API_KEY")
+        if google_api_key:
+            genai.configure(api_key=google_api_key)
+        
+        self.embedder = embedder or create_batch_embedder()
+        self.sparse_encoder = create_bm25_encoder()
+        self.reranker = reranker or get_reranker()
+        self.search_cache = search_cache or get_search_cache()
+        self._hybrid_collections: Dict[str, bool] = {}
+    
+    async def _is_hybrid(self, collection_name: str) -> bool:
+        """Whether the collection has the BM25 sparse field (cached per collection)."""
+        if not settings.HYBRID_SEARCH_ENABLED:
+            return False
+        if collection_name not in self._hybrid_collections:
+            self._hybrid_collections[collection_name] = _has_sparse_field(
+                await self.client.get_collection(collection_name=collection_name)
+            )
+        return self._hybrid_collections[collection_name]
+    
+    async def get_content_version(self, collection_name: str = COLLECTION_NAME) -> int:
+        """Content version of a collection (0 if it was never written)."""
+        try:
+            points = await self.client.retrieve(collection_name=META_COLLECTION, ids=[_version_point_id(collection_name)])
+        except Exception:
+            # No meta collection yet
+            return 0
+        return points[0].payload.get("version", 0) if points else 0
+    
+    async def _content_version(self, collection_name: str) -> int:
+        version = self.search_cache.version(collection_name)
+        if version is None:
+            version = await self.get_content_version(collection_name)
+            self.search_cache.set_version(collection_name, version)
+        return version
+    
+    async def get_query_embedding(self, text: str) -> List[float]:
+        """
+        Generate embedding for a query text.
+        
+        Args:
+            text: Query text to embed
+            
+        Returns:
+            List of floats representing the embedding vector
+        """
+        if self.search_cache is not None:
+            cached = self.search_cache.get_embedding(self.embedder.model, text)
+            if cached is not None:
+                return cached
+        embedding = (await self.embedder.aembed([text], task_type="retrieval_query"))[0]
+        if self.search_cache is not None:
+            self.search_cache.set_embedding(self.embedder.model, text, embedding)
+        return embedding
+    
+    async def search(
+        self,
+        query: str,
+        collection_name: str = COLLECTION_NAME,
+        top_k: int = 5,
+        score_threshold: float = 0.6,
+        filters: Optional[Dict[str, Any]] = None,
+        rerank: bool = True
+    ) -> List[dict]:
+        """
+        Search for similar documents in the collection.
+        
+        Args:
+            query: Search query text
+            collection_name: Name of the collection
+            top_k: Number of results to return
+            score_threshold: Minimum cosine similarity. On hybrid collections it
+                             filters the dense leg only: BM25 matches are kept
+                             whatever their similarity, and fused RRF scores are
+                             rank-based, so no cutoff is applied after fusion
+            filters: Payload filters (see build_filter)
+            rerank: Rerank over-fetched candidates if a reranker is configured
+            
+        Returns:
+            List of matching documents with scores (fused RRF scores for
+            hybrid collections, cross-encoder scores when reranked)
+        """
+        try:
+            log_query(query)
+            cache_key = None
+            if self.search_cache is not None:
+                version = await self._content_version(collection_name)
+                cache_key = self.search_cache.result_key(
+                    collection_name, version, self.embedder.model, query, filters, top_k, score_threshold, rerank
+                )
+                cached = self.search_cache.get_results(cache_key)
+                if cached is not None:
+                    return cached
+            
+            query_embedding = await self.get_query_embedding(query)
+            limit = _candidate_limit(self.reranker, top_k, rerank)
+            
+            if await self._is_hybrid(collection_name):
+                results = (await self.client.query_points(
+                    collection_name=collection_name,
+                    **_hybrid_query(query_embedding, self.sparse_encoder, query, limit, score_threshold,
+                                    build_filter(filters), search_params(self.profile))
+                )).points
+            else:
+                results = (await self.client.query_points(
+                    collection_name=collection_name,
+                    query=query_embedding,
+                    query_filter=build_filter(filters),
+                    search_params=search_params(self.profile),
+                    limit=limit,
+                    score_threshold=score_threshold,
+                    with_payload=True
+                )).points
+            
+            documents = _to_documents(results)
+            if limit > top_k:
+                documents = await self.reranker.arerank(query, documents, top_k)
+            if cache_key is not None and _rerank_complete(documents, limit, top_k):
+                self.search_cache.set_results(cache_key, documents)
+            return documents
+        except Exception as e:
+            print(f"Error searching: {e}")
+            return []
+    
+    async def close(self):
+        """Close the client's connections."""
+        await self.client.close()
+
+
+# Singleton instances
 _qdrant_service: Optional[QdrantService] = None
+_async_qdrant_service: Optional[AsyncQdrantService] = None
 
 
 def get_qdrant_service() -> QdrantService:
@@ -277,3 +1145,53 @@ def get_qdrant_service() -> QdrantService:
         _qdrant_service = QdrantService()
     return _qdrant_service
 
+
+def get_async_qdrant_service() -> AsyncQdrantService:
+    """Get or create the async Qdrant service singleton."""
+    global _async_qdrant_service
+    if _async_qdrant_service is None:
+        _async_qdrant_service = AsyncQdrantService()
+    return _async_qdrant_service
+
+
+def bootstrap_from_snapshot(snapshot_path: Optional[str] = None, collection_name: str = COLLECTION_NAME) -> bool:
+    """
+    Restore a missing or empty collection from a snapshot file at startup.
+    
+    Lets a new node serve the prebuilt corpus in seconds instead of
+    re-embedding it. Uses the shared service, so embedded storage is opened
+    once and stays open for the process; the async service shares its client.
+    
+    Args:
+        snapshot_path: Snapshot file (default: QDRANT_SNAPSHOT_PATH)
+        collection_name: Name of the collection
+        
+    Returns:
+        True if the collection was restored
+    """
+    snapshot_path = snapshot_path or settings.QDRANT_SNAPSHOT_PATH
+    if not snapshot_path or not os.path.exists(snapshot_path):
+        return False
+    try:
+        service = get_qdrant_service()
+        if service.use_memory:
+            return False
+        if service.client.collection_exists(collection_name) and service.get_collection_info(collection_name).get("points_count"):
+            return False
+        service.import_snapshot(snapshot_path, collection_name)
+        return True
+    except EmbeddedQdrantLocked as e:
+        print(f"Skipping restore of {collection_name} from {snapshot_path}: {e}")
+        return False
+    except Exception as e:
+        print(f"Error restoring {collection_name} from {snapshot_path}: {e}")
+        return False
+
+
+async def close_async_qdrant_service():
+    """Close the async Qdrant service singleton, if it was created."""
+    global _async_qdrant_service
+    if _async_qdrant_service is not None:
+        await _async_qdrant_service.close()
+        _async_qdrant_service = None
+
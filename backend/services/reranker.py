@@ -0,0 +1,187 @@
+"""
+Cross-encoder reranking of retrieved scheme chunks.
+
+Vector search over-fetches RERANK_CANDIDATES chunks; a cross-encoder then
+scores each (query, chunk) pair jointly, which ranks the chunk that actually
+answers the question far more reliably than cosine or RRF order, and the best
+few are returned. The model runs on CPU with ONNX Runtime (fastembed's
+TextCrossEncoder, an optional dependency) in batches of RERANK_BATCH_SIZE.
+
+Scores are cached per (normalized query, candidate ids), so a repeated query
+over the same candidates is not scored again. Reranking is skipped, falling
+back to retrieval order, when RERANK_MAX_CONCURRENT reranks are already
+running or recent reranks have taken longer than RERANK_LATENCY_BUDGET_MS;
+the latency estimate decays while skipping, so reranking resumes once load
+drops.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+
+try:
+    from fastembed.rerank.cross_encoder import TextCrossEncoder
+except ImportError:
+    # Reranking is optional
+    TextCrossEncoder = None
+
+from config.settings import settings
+from services.cache import MISSING, TTLCache
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ScoreBatch = Callable[[str, List[str]], List[float]]
+
+# Weight of the newest rerank in the latency estimate, and its decay per skip
+LATENCY_SMOOTHING = 0.3
+SKIP_DECAY = 0.8
+
+
+class CrossEncoderScorer:
+    """`score_batch(query, texts)` backed by a fastembed cross-encoder, loaded on first use."""
+
+    def __init__(self, model: str, batch_size: int, threads: int = 0):
+        if TextCrossEncoder is None:
+            raise RuntimeError("RERANK_ENABLED requires fastembed (pip install fastembed)")
+        self.model = model
+        self.batch_size = batch_size
+        self.threads = threads
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                started = time.time()
+                self._model = TextCrossEncoder(model_name=self.model, threads=self.threads or None)
+                logger.info(f"Loaded reranker {self.model} in {time.time() - started:.1f}s")
+        return self._model
+
+    def __call__(self, query: str, texts: List[str]) -> List[float]:
+        return [float(score) for score in self._load().rerank(query, texts, batch_size=self.batch_size)]
+
+
+class Reranker:
+    """Reorders search results by cross-encoder score, within a latency budget."""
+
+    def __init__(
+        self,
+        score_batch: ScoreBatch,
+        batch_size: int = 16,
+        latency_budget_ms: float = 300.0,
+        max_concurrent: int = 2,
+        cache_size: int = 512,
+        cache_ttl_seconds: float = 600.0,
+    ):
+        self.score_batch = score_batch
+        self.batch_size = batch_size
+        self.latency_budget_seconds = latency_budget_ms / 1000
+        self.max_concurrent = max_concurrent
+        self.cache = TTLCache("rerank", maxsize=cache_size, ttl_seconds=cache_ttl_seconds)
+        self._latency_seconds = 0.0
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    def rerank(self, query: str, results: List[dict], top_k: int) -> List[dict]:
+        """
+        Best `top_k` of `results` by cross-encoder score.
+
+        Results keep their retrieval score as `retrieval_score`; `score` becomes
+        the rerank score. Falls back to the first `top_k` results in retrieval
+        order when reranking is skipped or fails.
+        """
+        if len(results) <= 1:
+            return results[:top_k]
+        key = self._cache_key(query, results)
+        scores = self.cache.get(key)
+        if scores is MISSING:
+            if not self._admit():
+                return results[:top_k]
+            try:
+                scores = self._score(query, [result["text"] for result in results])
+            except Exception as e:
+                logger.warning(f"Reranking failed ({e}); using retrieval order")
+                metrics.increment("rerank_requests_total", result="failed")
+                return results[:top_k]
+            finally:
+                self._release()
+            self.cache.set(key, scores)
+            metrics.increment("rerank_requests_total", result="reranked")
+        else:
+            metrics.increment("rerank_requests_total", result="cached")
+        return _ordered(results, scores, top_k)
+
+    async def arerank(self, query: str, results: List[dict], top_k: int) -> List[dict]:
+        """`rerank` off the event loop; the model is CPU-bound."""
+        if len(results) <= 1:
+            return results[:top_k]
+        return await asyncio.to_thread(self.rerank, query, results, top_k)
+
+    def _cache_key(self, query: str, results: Sequence[dict]):
+        return " ".join(query.lower().split()), tuple(result["id"] for result in results)
+
+    def _admit(self) -> bool:
+        """Reserve a rerank slot, or return False if reranking should be skipped now."""
+        with self._lock:
+            if self._inflight >= self.max_concurrent or self._latency_seconds > self.latency_budget_seconds:
+                self._latency_seconds *= SKIP_DECAY
+                reason = "busy" if self._inflight >= self.max_concurrent else "over_budget"
+            else:
+                self._inflight += 1
+                return True
+        metrics.increment("rerank_requests_total", result="skipped", reason=reason)
+        return False
+
+    def _release(self):
+        with self._lock:
+            self._inflight -= 1
+
+    def _score(self, query: str, texts: List[str]) -> List[float]:
+        started = time.time()
+        scores = []
+        for i in range(0, len(texts), self.batch_size):
+            scores.extend(self.score_batch(query, texts[i:i + self.batch_size]))
+        if len(scores) != len(texts):
+            raise ValueError(f"Expected {len(texts)} scores, got {len(scores)}")
+        elapsed = time.time() - started
+        metrics.observe("rerank_seconds", elapsed)
+        with self._lock:
+            self._latency_seconds += LATENCY_SMOOTHING * (elapsed - self._latency_seconds)
+        return scores
+
+
+def _ordered(results: List[dict], scores: Sequence[float], top_k: int) -> List[dict]:
+    ranked = sorted(zip(scores, range(len(results))), key=lambda pair: -pair[0])[:top_k]
+    return [
+        {**results[i], "score": score, "retrieval_score": results[i]["score"]}
+        for score, i in ranked
+    ]
+
+
+# Singleton instance
+_reranker: Optional[Reranker] = None
+
+
+def get_reranker() -> Optional[Reranker]:
+    """Get or create the reranker singleton (None when disabled)."""
+    global _reranker
+    if not settings.RERANK_ENABLED:
+        return None
+    if _reranker is None:
+        try:
+            scorer = CrossEncoderScorer(settings.RERANK_MODEL, settings.RERANK_BATCH_SIZE, settings.LOCAL_EMBEDDING_THREADS)
+        except RuntimeError as e:
+            logger.warning(f"Reranking disabled: {e}")
+            return None
+        _reranker = Reranker(
+            scorer,
+            batch_size=settings.RERANK_BATCH_SIZE,
+            latency_budget_ms=settings.RERANK_LATENCY_BUDGET_MS,
+            max_concurrent=settings.RERANK_MAX_CONCURRENT,
+            cache_size=settings.RERANK_CACHE_SIZE,
+            cache_ttl_seconds=settings.RERANK_CACHE_TTL_SECONDS,
+        )
+    return _reranker
@@ -0,0 +1,147 @@
+"""
+Blob retention for the upload bucket.
+
+Synthesized answers (`tts/`) and direct uploads (`uploads/`) are written on
+every turn and mostly never read again after a few days. A retention policy
+maps an object prefix to a maximum age in days (BLOB_RETENTION_DAYS); the
+sweeper lists each prefix, deletes objects older than their policy in batches
+of up to BLOB_SWEEP_BATCH_SIZE and reports what it scanned and removed. Dry
+runs report without deleting.
+
+An object's age counts from its `custom_time` when set, else its creation
+time. Content-addressed TTS objects get `custom_time` refreshed when they are
+reused (see tts_cache.touch_blob), so frequently served phrases are not
+deleted and synthesized again.
+
+The sweeper runs from ``sweep_blobs.py`` (cron or a scheduled job), never
+inside the API workers, so one deployment sweeps once per schedule.
+
+Works with both storage backends: Cloud Storage deletes go through batch
+requests, the local backend deletes files directly.
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from google.api_core.exceptions import NotFound
+
+from config.settings import settings
+from services.metrics import metrics
+from services.storage_backend import get_storage_client
+
+logger = logging.getLogger(__name__)
+
+
+def delete_blobs(bucket, blob_names: Iterable[str], batch_size: int = 100) -> Dict[str, bool]:
+    """
+    Delete objects in batches.
+
+    Missing objects count as deleted.
+
+    Returns:
+        Dict mapping each object name to whether it is gone
+    """
+    names = list(dict.fromkeys(blob_names))
+    results: Dict[str, bool] = {}
+    client = bucket.client
+
+    for start in range(0, len(names), batch_size):
+        chunk = names[start:start + batch_size]
+        if hasattr(client, "batch"):
+            try:
+                # One HTTP request per chunk; raises if any delete in it failed
+                with client.batch():
+                    for name in chunk:
+                        bucket.blob(name).delete()
+                results.update({name: True for name in chunk})
+                continue
+            except Exception as e:
+                # The batch reports only its first error; find the failures one by one
+                logger.warning(f"Batch delete of {len(chunk)} objects failed ({str(e)}); retrying individually")
+        for name in chunk:
+            results[name] = _delete_one(bucket, name)
+    return results
+
+
+def _delete_one(bucket, name: str) -> bool:
+    try:
+        bucket.blob(name).delete()
+        return True
+    except NotFound:
+        return True
+    except Exception as e:
+        logger.error(f"Delete of {name} failed: {str(e)}")
+        return False
+
+
+class BlobSweeper:
+    """Deletes objects older than their prefix's retention policy."""
+
+    def __init__(
+        self,
+        bucket=None,
+        policies: Optional[Dict[str, float]] = None,
+        batch_size: int = 100,
+        dry_run: bool = False,
+    ):
+        self._bucket = bucket
+        self.policies = policies if policies is not None else settings.BLOB_RETENTION_DAYS
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+
+    @property
+    def bucket(self):
+        if self._bucket is None:
+            self._bucket = get_storage_client().bucket(settings.UPLOAD_BUCKET)
+        return self._bucket
+
+    def sweep(self, now: Optional[datetime] = None, dry_run: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Run one pass over every policy prefix.
+
+        Args:
+            now: Reference time (default: current UTC time)
+            dry_run: Override the sweeper's dry-run setting
+
+        Returns:
+            Report with per-prefix `scanned`, `expired`, `deleted`, `failed`
+            and `expired_bytes` counts
+        """
+        now = now or datetime.now(timezone.utc)
+        dry_run = self.dry_run if dry_run is None else dry_run
+        started = time.time()
+        report: Dict[str, Any] = {"dry_run": dry_run, "prefixes": {}}
+
+        for prefix, days in self.policies.items():
+            cutoff = now - timedelta(days=days)
+            stats = {"retention_days": days, "scanned": 0, "expired": 0, "deleted": 0, "failed": 0, "expired_bytes": 0}
+            expired: List[str] = []
+
+            for blob in self.bucket.list_blobs(prefix=prefix):
+                stats["scanned"] += 1
+                last_used = getattr(blob, "custom_time", None) or blob.time_created or blob.updated
+                if last_used is not None and last_used < cutoff:
+                    expired.append(blob.name)
+                    stats["expired_bytes"] += blob.size or 0
+            stats["expired"] = len(expired)
+
+            if expired and not dry_run:
+                results = delete_blobs(self.bucket, expired, self.batch_size)
+                stats["deleted"] = sum(results.values())
+                stats["failed"] = len(results) - stats["deleted"]
+                metrics.increment("blob_sweep_deleted_total", stats["deleted"], prefix=prefix)
+                metrics.increment("blob_sweep_deleted_bytes_total", stats["expired_bytes"], prefix=prefix)
+                if stats["failed"]:
+                    metrics.increment("blob_sweep_failed_total", stats["failed"], prefix=prefix)
+
+            report["prefixes"][prefix] = stats
+
+        report["seconds"] = time.time() - started
+        metrics.observe("blob_sweep_seconds", report["seconds"])
+        logger.info(
+            f"Blob sweep{' (dry run)' if dry_run else ''}: "
+            + ", ".join(f"{p} {s['expired']}/{s['scanned']} expired" for p, s in report["prefixes"].items())
+        )
+        return report
@@ -0,0 +1,131 @@
+"""
+Structured payload fields for scheme chunks.
+
+Extracted at ingestion and stored as indexed payload fields, so searches can
+be restricted to what applies to a farmer instead of scanning every state's
+schemes:
+
+    state       canonical state name the chunk is about (absent if none)
+    scope       "state", "central" or "general"
+    categories  scheme categories, e.g. ["irrigation", "credit"]
+    language    "en", "hi" or "kn" by script
+    source      source document file name
+
+A chunk's state comes from the chunk text when it names exactly one state,
+otherwise from the file name (e.g. "Karnataka_Schemes_2024.pdf").
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+# Payload fields that get a keyword index
+PAYLOAD_INDEX_FIELDS = ("state", "scope", "categories", "language", "source")
+
+STATES = [
+    "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh", "Goa", "Gujarat",
+    "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka", "Kerala", "Madhya Pradesh",
+    "Maharashtra", "Manipur", "Meghalaya", "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan",
+    "Sikkim", "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal",
+    "Andaman and Nicobar Islands", "Chandigarh", "Dadra and Nagar Haveli and Daman and Diu",
+    "Delhi", "Jammu and Kashmir", "Ladakh", "Lakshadweep", "Puducherry",
+]
+
+STATE_ALIASES = {
+    "orissa": "Odisha",
+    "pondicherry": "Puducherry",
+    "uttaranchal": "Uttarakhand",
+    "new delhi": "Delhi",
+    "nct of delhi": "Delhi",
+    "ಕರ್ನಾಟಕ": "Karnataka",
+}
+
+CENTRAL_MARKERS = (
+    "government of india", "govt. of india", "govt of india", "central sector", "centrally sponsored",
+    "pradhan mantri", "ministry of agriculture", "pm-kisan", "pmfby", "pmksy", "national mission",
+)
+
+CATEGORY_KEYWORDS = {
+    "income_support": ("income support", "pm-kisan", "direct benefit", "pension", "maandhan"),
+    "insurance": ("insurance", "pmfby", "premium", "crop loss"),
+    "credit": ("loan", "credit", "kcc", "kisan credit card", "interest subvention"),
+    "irrigation": ("irrigation", "drip", "sprinkler", "pmksy", "micro irrigation", "borewell", "pump"),
+    "mechanization": ("tractor", "machinery", "mechanization", "mechanisation", "custom hiring", "power tiller"),
+    "inputs": ("seed", "fertilizer", "fertiliser", "soil health", "pesticide"),
+    "organic": ("organic", "natural farming", "pkvy", "bio-fertilizer"),
+    "horticulture": ("horticulture", "fruit", "vegetable", "floriculture", "midh"),
+    "livestock": ("livestock", "dairy", "cattle", "poultry", "goat", "sheep", "animal husbandry"),
+    "fisheries": ("fisheries", "fish", "aquaculture"),
+    "market": ("market", "e-nam", "msp", "procurement", "warehouse", "storage"),
+    "solar": ("solar", "pm-kusum", "kusum"),
+}
+
+_STATE_PATTERNS = [
+    (re.compile(r"\b" + re.escape(name.lower()).replace(r"\ ", r"[\s_-]+") + r"\b"), name)
+    for name in STATES
+] + [
+    (re.compile(r"(?<!\w)" + re.escape(alias) + r"(?!\w)"), name)
+    for alias, name in STATE_ALIASES.items()
+]
+
+_CANONICAL_STATES = {name.lower(): name for name in STATES}
+
+
+def normalize_state(value: Optional[str]) -> Optional[str]:
+    """Canonical state name for user input, or None if it is not a known state."""
+    if not value:
+        return None
+    key = " ".join(value.replace("_", " ").split()).lower()
+    return _CANONICAL_STATES.get(key) or STATE_ALIASES.get(key)
+
+
+def find_states(text: str) -> List[str]:
+    """States named in `text`, in canonical form."""
+    lowered = text.lower()
+    return sorted({name for pattern, name in _STATE_PATTERNS if pattern.search(lowered)})
+
+
+def detect_language(text: str) -> str:
+    """Language code by dominant script."""
+    kannada = sum("ಀ" <= ch <= "೿" for ch in text)
+    devanagari = sum("ऀ" <= ch <= "ॿ" for ch in text)
+    if max(kannada, devanagari) < max(20, len(text) // 10):
+        return "en"
+    return "kn" if kannada >= devanagari else "hi"
+
+
+def detect_categories(text: str) -> List[str]:
+    lowered = text.lower()
+    return sorted(
+        category for category, keywords in CATEGORY_KEYWORDS.items()
+        if any(keyword in lowered for keyword in keywords)
+    )
+
+
+def extract_scheme_metadata(text: str, filename: str) -> Dict[str, Any]:
+    """Payload fields for a chunk of `filename`."""
+    chunk_states = find_states(text)
+    file_states = find_states(re.sub(r"[_.-]+", " ", filename))
+    if len(chunk_states) == 1:
+        state = chunk_states[0]
+    elif len(file_states) == 1:
+        state = file_states[0]
+    else:
+        state = None
+
+    lowered = text.lower()
+    if state:
+        scope = "state"
+    elif any(marker in lowered for marker in CENTRAL_MARKERS):
+        scope = "central"
+    else:
+        scope = "general"
+
+    metadata = {
+        "scope": scope,
+        "categories": detect_categories(text),
+        "language": detect_language(text),
+        "source": filename,
+    }
+    if state:
+        metadata["state"] = state
+    return metadata
@@ -0,0 +1,122 @@
+"""
+Query-side cache for scheme search.
+
+Two in-process tiers, both bounded by size (LRU) and TTL:
+
+    query embeddings   (embedding model, normalized query) -> vector;
+                       independent of the index, so changing top_k,
+                       thresholds or filters never re-embeds a query
+    search results     (collection, content version, embedding model,
+                       normalized query, filters, top_k, threshold,
+                       rerank) -> hits
+
+Both keys carry the embedding model (as embedding_cache does), so switching
+EMBEDDING_BACKEND or model never serves vectors or hits from the old one.
+
+Every collection has a content version, stored in the QDRANT_META_COLLECTION
+collection and replaced whenever ingestion or deletion changes the collection
+(QdrantService.bump_content_version). The version is part of the result key,
+so a new version makes older entries unreachable and they age out. Other
+processes pick up a new version within SEARCH_CACHE_VERSION_CHECK_SECONDS.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from services.cache import MISSING, TTLCache
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query."""
+    return " ".join(query.casefold().split())
+
+
+def _filter_key(filters: Optional[Dict[str, Any]]) -> Tuple:
+    items = []
+    for field, value in sorted((filters or {}).items()):
+        if not value:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = tuple(sorted(str(v) for v in value))
+        items.append((field, value))
+    return tuple(items)
+
+
+class SearchCache:
+    """Query embedding and search result caches keyed by collection content version."""
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl_seconds: float = 300.0,
+        embedding_maxsize: int = 4096,
+        version_check_seconds: float = 5.0,
+    ):
+        self.results = TTLCache("search_results", maxsize=maxsize, ttl_seconds=ttl_seconds)
+        self.embeddings = TTLCache("query_embeddings", maxsize=embedding_maxsize, ttl_seconds=ttl_seconds)
+        self.version_check_seconds = version_check_seconds
+        self._versions: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def version(self, collection_name: str) -> Optional[int]:
+        """Last known content version, or None if it is due for a re-check."""
+        with self._lock:
+            entry = self._versions.get(collection_name)
+        if entry is None or time.monotonic() - entry[1] > self.version_check_seconds:
+            return None
+        return entry[0]
+
+    def set_version(self, collection_name: str, version: int):
+        with self._lock:
+            self._versions[collection_name] = (version, time.monotonic())
+
+    def get_embedding(self, model: str, query: str) -> Optional[List[float]]:
+        vector = self.embeddings.get((model, normalize_query(query)))
+        return None if vector is MISSING else vector
+
+    def set_embedding(self, model: str, query: str, vector: List[float]):
+        self.embeddings.set((model, normalize_query(query)), vector)
+
+    def result_key(
+        self,
+        collection_name: str,
+        version: int,
+        model: str,
+        query: str,
+        filters: Optional[Dict[str, Any]],
+        top_k: int,
+        score_threshold: float,
+        rerank: bool,
+    ) -> Tuple:
+        return (
+            collection_name, version, model, normalize_query(query), _filter_key(filters),
+            top_k, score_threshold, rerank
+        )
+
+    def get_results(self, key: Tuple) -> Optional[List[dict]]:
+        hits = self.results.get(key)
+        return None if hits is MISSING else [dict(hit) for hit in hits]
+
+    def set_results(self, key: Tuple, hits: List[dict]):
+        self.results.set(key, [dict(hit) for hit in hits])
+
+
+# Singleton instance
+_search_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """Get or create the search cache singleton (None when disabled)."""
+    global _search_cache
+    if not settings.SEARCH_CACHE_ENABLED:
+        return None
+    if _search_cache is None:
+        _search_cache = SearchCache(
+            maxsize=settings.SEARCH_CACHE_SIZE,
+            ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS,
+            embedding_maxsize=settings.SEARCH_CACHE_EMBEDDING_SIZE,
+            version_check_seconds=settings.SEARCH_CACHE_VERSION_CHECK_SECONDS,
+        )
+    return _search_cache
@@ -0,0 +1,201 @@
+"""
+Signed URLs for direct client uploads and cacheable downloads.
+
+Clients PUT files straight to Cloud Storage with a short-lived signed upload
+URL and send back only the object key, so upload bytes never pass through the
+API container. Generated files are served through V4 signed download URLs
+instead of per-object `make_public()` ACL changes; download URLs are reused for
+half their lifetime so clients and CDNs see a stable, cacheable URL.
+
+When STORAGE_EMULATOR_HOST is set (e.g. fake-gcs-server) URLs point at the
+emulator and are not signed, which makes the whole flow testable locally.
+"""
+
+import mimetypes
+import threading
+import time
+import uuid
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote, unquote, urlparse
+
+import google.auth
+import google.auth.transport.requests
+from google.oauth2 import service_account
+
+from config.settings import settings
+from services.storage_backend import LocalStorageClient, get_storage_client
+
+# Prefixes clients may upload to
+UPLOAD_PREFIXES = {
+    "image": "uploads/images",
+    "audio": "uploads/audio",
+}
+
+_download_urls: Dict[Tuple[str, str], Tuple[str, float]] = {}
+_download_urls_lock = threading.Lock()
+_upload_bucket = None
+_credentials = None
+_credentials_lock = threading.Lock()
+
+
+def _emulator_download_url(bucket_name: str, blob_name: str) -> str:
+    host = settings.STORAGE_EMULATOR_HOST.rstrip("/")
+    return f"{host}/storage/v1/b/{bucket_name}/o/{quote(blob_name, safe='')}?alt=media"
+
+
+def _emulator_upload_url(bucket_name: str, blob_name: str) -> str:
+    host = settings.STORAGE_EMULATOR_HOST.rstrip("/")
+    return f"{host}/upload/storage/v1/b/{bucket_name}/o?uploadType=media&name={quote(blob_name, safe='')}"
+
+
+def _signing_kwargs(client) -> Dict[str, Any]:
+    """
+    Extra arguments for generate_signed_url.
+
+    Key-file credentials sign locally. Metadata-server credentials (Cloud Run)
+    have no private key, so signing goes through the IAM signBlob API using the
+    service account email and access token of the application default
+    credentials (the ones the storage client is built with). The local backend
+    signs with LOCAL_STORAGE_SECRET.
+    """
+    if isinstance(client, LocalStorageClient):
+        return {}
+    credentials = _default_credentials()
+    if isinstance(credentials, service_account.Credentials):
+        return {}
+    with _credentials_lock:
+        if not credentials.valid:
+            credentials.refresh(google.auth.transport.requests.Request())
+    return {
+        "service_account_email": credentials.service_account_email,
+        "access_token": credentials.token,
+    }
+
+
+def _default_credentials():
+    """Application default credentials, loaded once."""
+    global _credentials
+    with _credentials_lock:
+        if _credentials is None:
+            _credentials, _ = google.auth.default(scopes=["https://www.googleapis.com/auth/cloud-platform"])
+        return _credentials
+
+
+def signed_download_url(blob, ttl_seconds: Optional[int] = None) -> str:
+    """
+    Return a signed GET URL for `blob`, reusing a cached URL while it is fresh.
+
+    Args:
+        blob: Cloud Storage blob
+        ttl_seconds: URL lifetime (default: settings.SIGNED_URL_TTL_SECONDS)
+
+    Returns:
+        Signed download URL
+    """
+    if settings.STORAGE_EMULATOR_HOST:
+        return _emulator_download_url(blob.bucket.name, blob.name)
+
+    ttl_seconds = ttl_seconds or settings.SIGNED_URL_TTL_SECONDS
+    key = (blob.bucket.name, blob.name)
+    now = time.time()
+    with _download_urls_lock:
+        cached = _download_urls.get(key)
+        if cached and cached[1] - now > ttl_seconds / 2:
+            return cached[0]
+
+    url = blob.generate_signed_url(
+        version="v4",
+        expiration=timedelta(seconds=ttl_seconds),
+        method="GET",
+        **_signing_kwargs(blob.client),
+    )
+    with _download_urls_lock:
+        _download_urls[key] = (url, now + ttl_seconds)
+    return url
+
+
+def signed_upload_url(blob, content_type: str, ttl_seconds: Optional[int] = None) -> str:
+    """
+    Return a signed PUT URL that accepts a single upload of `content_type`.
+
+    Against the emulator this is a JSON API media upload URL, which takes a POST.
+    """
+    if settings.STORAGE_EMULATOR_HOST:
+        return _emulator_upload_url(blob.bucket.name, blob.name)
+
+    return blob.generate_signed_url(
+        version="v4",
+        expiration=timedelta(seconds=ttl_seconds or settings.SIGNED_UPLOAD_TTL_SECONDS),
+        method="PUT",
+        content_type=content_type,
+        **_signing_kwargs(blob.client),
+    )
+
+
+def create_upload(bucket, kind: str, user_id: str, content_type: str) -> Dict[str, Any]:
+    """
+    Reserve an object key for a direct client upload.
+
+    Args:
+        bucket: Cloud Storage bucket
+        kind: "image" or "audio"
+        user_id: Uploading user
+        content_type: MIME type the client will upload
+
+    Returns:
+        Dict with the object key, the signed upload URL and the headers the
+        client must send with its PUT request
+    """
+    if kind not in UPLOAD_PREFIXES:
+        raise ValueError(f"Unsupported upload kind: {kind}")
+
+    extension = (mimetypes.guess_extension(content_type) or ".bin").lstrip(".")
+    safe_user_id = quote(user_id or "anonymous", safe="")
+    object_key = f"{UPLOAD_PREFIXES[kind]}/{safe_user_id}/{uuid.uuid4()}.{extension}"
+    blob = bucket.blob(object_key)
+
+    return {
+        "object_key": object_key,
+        "upload_url": signed_upload_url(blob, content_type),
+        "method": "POST" if settings.STORAGE_EMULATOR_HOST else "PUT",
+        "headers": {"Content-Type": content_type},
+        "expires_in": settings.SIGNED_UPLOAD_TTL_SECONDS,
+    }
+
+
+def validate_upload_key(object_key: str, kind: str) -> str:
+    """Ensure a client-supplied key lies inside the upload prefix for `kind`."""
+    prefix = UPLOAD_PREFIXES.get(kind)
+    if not prefix or not object_key.startswith(prefix + "/") or ".." in object_key:
+        raise ValueError(f"Invalid {kind} object key: {object_key}")
+    return object_key
+
+
+def gcs_uri(bucket_name: str, object_key: str) -> str:
+    """Return the gs:// URI for an object (accepted by Gemini and Speech-to-Text)."""
+    return f"gs://{bucket_name}/{object_key}"
+
+
+def blob_name_from_url(url: str, bucket_name: str) -> str:
+    """
+    Extract the object name from a public, signed, emulator or gs:// URL.
+
+    Signed URLs carry the signature in the query string, which is dropped.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "gs":
+        return parsed.path.lstrip("/")
+    path = unquote(parsed.path)
+    for marker in (f"/b/{bucket_name}/o/", f"/{bucket_name}/"):
+        if marker in path:
+            return path.split(marker, 1)[1]
+    return path.lstrip("/")
+
+
+def get_upload_bucket():
+    """Lazily create the bucket handle used by the API layer for upload signing."""
+    global _upload_bucket
+    if _upload_bucket is None:
+        _upload_bucket = get_storage_client().bucket(settings.UPLOAD_BUCKET)
+    return _upload_bucket
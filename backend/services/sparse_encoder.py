@@ -0,0 +1,83 @@
+"""
+BM25 sparse vectors for hybrid scheme search.
+
+Scheme questions hinge on exact tokens ("PM-KISAN", "KCC", "PMFBY", scheme
+codes) that dense embeddings represent poorly. Chunks get a sparse vector of
+BM25-saturated term frequencies, computed locally at ingestion; queries get
+weight 1 per distinct term. The collection's sparse field uses Qdrant's IDF
+modifier, so the IDF half of BM25 is maintained by Qdrant from the indexed
+corpus and the dot product of the two vectors is the BM25 score.
+
+Tokens are lower-cased runs between whitespace and punctuation (hyphens kept,
+so Devanagari/Kannada vowel signs stay attached); hyphenated tokens also
+contribute their parts. Terms are hashed to 32-bit indices.
+"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from config.settings import settings
+
+SPARSE_VECTOR_NAME = "bm25"
+
+_TOKEN_RE = re.compile(r"[^\s!\"#$%&'()*+,./:;<=>?@\[\\\]^_`{|}~।॥]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it its me my of on or "
+    "scheme schemes that the this to was what when where which who will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into BM25 terms."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        token = token.strip("-")
+        if not token or token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if "-" in token:
+            tokens.extend(part for part in token.split("-") if part and part not in STOPWORDS)
+    return tokens
+
+
+def term_index(term: str) -> int:
+    """Stable 32-bit index for a term."""
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=4).digest(), "big")
+
+
+def _to_sparse(weights: Dict[int, float]) -> Tuple[List[int], List[float]]:
+    indices = sorted(weights)
+    return indices, [weights[index] for index in indices]
+
+
+class BM25Encoder:
+    """Encodes documents and queries as BM25 sparse vectors (indices, values)."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_length: float = 80.0):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = avg_doc_length
+
+    def encode_document(self, text: str) -> Tuple[List[int], List[float]]:
+        tokens = tokenize(text)
+        length_norm = 1 - self.b + self.b * len(tokens) / self.avg_doc_length
+        weights: Dict[int, float] = {}
+        for term, tf in Counter(tokens).items():
+            index = term_index(term)
+            weights[index] = weights.get(index, 0.0) + tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+        return _to_sparse(weights)
+
+    def encode_query(self, text: str) -> Tuple[List[int], List[float]]:
+        return _to_sparse({term_index(term): 1.0 for term in set(tokenize(text))})
+
+
+def create_bm25_encoder() -> BM25Encoder:
+    """Create a BM25 encoder configured from settings."""
+    return BM25Encoder(
+        k1=settings.BM25_K1,
+        b=settings.BM25_B,
+        avg_doc_length=settings.BM25_AVG_DOC_LENGTH,
+    )
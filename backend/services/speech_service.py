@@ -1,20 +1,41 @@
 import asyncio
 import base64
 import io
-from typing import Optional
 from google.cloud import speech
 from google.cloud import texttospeech
-from google.cloud import storage
 from config.settings import settings
+from services.storage_backend import get_storage_client, is_local_backend
+from services.signed_urls import create_upload, gcs_uri, signed_download_url, validate_upload_key
+from services.audio_profiles import build_audio_config, content_type_for, profile_audio_params
+from services.tts_cache import (
+    DEFAULT_AUDIO_PARAMS,
+    get_or_upload_tts,
+    packed_audio_url,
+    tts_blob_name,
+)
 import logging
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Returned when recognition yields no results ("No speech detected" in Kannada)
+NO_SPEECH_DETECTED = "ಯಾವುದೇ ಮಾತು ಕೇಳಿಸಲಿಲ್ಲ"
+
+
+def service_voice_params(language_code: Optional[str] = None) -> dict:
+    """Voice of `SpeechService.text_to_speech`, shared with prewarm_tts.py for pack keys"""
+    return {
+        "language_code": language_code or settings.TTS_LANGUAGE,
+        "name": settings.TTS_VOICE,  # kn-IN-Standard-A (female voice)
+        "ssml_gender": "FEMALE",
+    }
+
+
 class SpeechService:
     def __init__(self):
         self.speech_client = speech.SpeechClient()
         self.tts_client = texttospeech.TextToSpeechClient()
-        self.storage_client = storage.Client()
+        self.storage_client = get_storage_client()
         self.bucket = self.storage_client.bucket(settings.UPLOAD_BUCKET)
     
     async def speech_to_text(self, audio_data: bytes, language_code: str = "kn-IN") -> str:
@@ -52,59 +73,63 @@ class SpeechService:
                 return transcript.strip()
             else:
                 logger.warning("No speech recognition results")
-                return "ಯಾವುದೇ ಮಾತು ಕೇಳಿಸಲಿಲ್ಲ"  # "No speech detected" in Kannada
+                return NO_SPEECH_DETECTED
                 
         except Exception as e:
             logger.error(f"Speech-to-text error: {str(e)}")
             raise Exception(f"Speech recognition failed: {str(e)}")
     
-    async def text_to_speech(self, text: str, language_code: str = "kn-IN") -> str:
+    async def text_to_speech(
+        self, text: str, language_code: Optional[str] = None, audio_profile: str = "standard"
+    ) -> str:
         """
         Convert text to speech using Google Cloud Text-to-Speech
         
         Args:
             text: Text to convert to speech
-            language_code: Language code (default: kn-IN for Kannada)
+            language_code: Language code (default: settings.TTS_LANGUAGE, kn-IN)
+            audio_profile: Audio profile name (see services.audio_profiles)
             
         Returns:
             URL of the generated audio file
         """
         try:
-            # Configure voice settings
-            voice = texttospeech.VoiceSelectionParams(
-                language_code=language_code,
-                name=settings.TTS_VOICE,  # kn-IN-Standard-A (female voice)
-                ssml_gender=texttospeech.SsmlVoiceGender.FEMALE
-            )
-            
-            # Configure audio format
-            audio_config = texttospeech.AudioConfig(
-                audio_encoding=texttospeech.AudioEncoding.MP3,
-                speaking_rate=0.9,  # Slightly slower for clarity
-                pitch=0.0,
-                volume_gain_db=0.0
-            )
-            
-            # Build synthesis input
-            synthesis_input = texttospeech.SynthesisInput(text=text)
-            
-            # Perform text-to-speech
-            response = self.tts_client.synthesize_speech(
-                input=synthesis_input, 
-                voice=voice, 
-                audio_config=audio_config
-            )
-            
-            # Save audio to Cloud Storage
-            audio_filename = f"tts/{hash(text)}.mp3"
-            blob = self.bucket.blob(audio_filename)
-            blob.upload_from_string(response.audio_content, content_type="audio/mpeg")
-            
-            # Make blob publicly accessible
-            blob.make_public()
-            
-            # Return public URL
-            audio_url = blob.public_url
+            voice_params = service_voice_params(language_code)
+            audio_params = profile_audio_params(audio_profile, DEFAULT_AUDIO_PARAMS)
+
+            def synthesize() -> bytes:
+                # Configure voice settings
+                voice = texttospeech.VoiceSelectionParams(
+                    language_code=voice_params["language_code"],
+                    name=voice_params["name"],
+                    ssml_gender=texttospeech.SsmlVoiceGender.FEMALE
+                )
+
+                # Configure audio format
+                audio_config = build_audio_config(audio_params)
+
+                # Build synthesis input
+                synthesis_input = texttospeech.SynthesisInput(text=text)
+
+                # Perform text-to-speech
+                response = self.tts_client.synthesize_speech(
+                    input=synthesis_input,
+                    voice=voice,
+                    audio_config=audio_config
+                )
+                return response.audio_content
+
+            # Serve prewarmed phrases from the audio pack, otherwise reuse the
+            # stored audio when this exact request was synthesized before
+            audio_url = packed_audio_url(text, voice_params, audio_params)
+            if audio_url is None:
+                audio_url = get_or_upload_tts(
+                    self.bucket,
+                    tts_blob_name(text, voice_params, audio_params),
+                    synthesize,
+                    content_type=content_type_for(audio_params),
+                    profile=audio_profile
+                )
             logger.info(f"TTS audio generated: {audio_url}")
             return audio_url
             
@@ -116,20 +141,72 @@ class SpeechService:
         """
         Upload audio file to Cloud Storage
         
+        Prefer `create_audio_upload` so clients upload directly to storage.
+        
         Args:
             audio_data: Raw audio bytes
             filename: Name for the audio file
             
         Returns:
-            Public URL of uploaded file
+            Signed download URL of uploaded file
         """
         try:
             blob = self.bucket.blob(f"uploads/audio/{filename}")
-            blob.upload_from_string(audio_data, content_type="audio/webm")
-            blob.make_public()
+            # Upload before returning the URL; the name is new, so create-only
+            await asyncio.to_thread(
+                blob.upload_from_string, audio_data, content_type="audio/webm", if_generation_match=0
+            )
             
-            return blob.public_url
+            return signed_download_url(blob)
             
         except Exception as e:
             logger.error(f"Audio upload error: {str(e)}")
             raise Exception(f"Audio upload failed: {str(e)}")
+    
+    def create_audio_upload(self, user_id: str, content_type: str = "audio/webm") -> dict:
+        """
+        Reserve an object key and signed URL for a direct client audio upload
+        
+        The client uploads the recording itself and sends back only the
+        `object_key`; `speech_to_text_from_key` then transcribes it in place.
+        """
+        return create_upload(self.bucket, "audio", user_id, content_type)
+    
+    async def speech_to_text_from_key(self, object_key: str, language_code: str = "kn-IN") -> str:
+        """
+        Transcribe a directly uploaded recording without downloading it
+        
+        Args:
+            object_key: Key returned by `create_audio_upload`
+            language_code: Language code (default: kn-IN for Kannada)
+            
+        Returns:
+            Transcribed text
+        """
+        try:
+            validate_upload_key(object_key, "audio")
+            if is_local_backend():
+                # Speech-to-Text can't read local storage; send the bytes inline
+                content = await asyncio.to_thread(self.bucket.blob(object_key).download_as_bytes)
+                audio = speech.RecognitionAudio(content=content)
+            else:
+                audio = speech.RecognitionAudio(uri=gcs_uri(settings.UPLOAD_BUCKET, object_key))
+            config = speech.RecognitionConfig(
+                encoding=speech.RecognitionConfig.AudioEncoding.WEBM_OPUS,
+                sample_rate_hertz=48000,
+                language_code=language_code,
+                enable_automatic_punctuation=True,
+                model="default",
+                use_enhanced=True
+            )
+            
+            response = self.speech_client.recognize(config=config, audio=audio)
+            
+            if response.results:
+                return response.results[0].alternatives[0].transcript.strip()
+            logger.warning("No speech recognition results")
+            return NO_SPEECH_DETECTED
+            
+        except Exception as e:
+            logger.error(f"Speech-to-text error: {str(e)}")
+            raise Exception(f"Speech recognition failed: {str(e)}")
@@ -3,13 +3,58 @@ Speech Tools for Kisan AI agents using Google Cloud APIs
 """
 
 from google.cloud import texttospeech, speech
-from google.cloud import storage
 import asyncio
 import io
-import uuid
-from typing import Optional
+from typing import Callable, Optional
 
 from config.settings import settings
+from services.audio_profiles import build_audio_config, content_type_for, profile_audio_params
+from services.storage_backend import get_storage_client
+from services.tts_cache import (
+    DEFAULT_AUDIO_PARAMS,
+    get_or_upload_tts,
+    packed_audio_url,
+    tts_blob_name,
+)
+
+
+# Voice configurations for different languages
+VOICE_CONFIGS = {
+    "kn": {
+        "language_code": "kn-IN",
+        "name": "kn-IN-Standard-A",
+        "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE
+    },
+    "hi": {
+        "language_code": "hi-IN", 
+        "name": "hi-IN-Standard-A",
+        "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE
+    },
+    "en": {
+        "language_code": "en-IN",
+        "name": "en-IN-Standard-A", 
+        "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE
+    },
+    "ta": {
+        "language_code": "ta-IN",
+        "name": "ta-IN-Standard-A",
+        "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE
+    },
+    "te": {
+        "language_code": "te-IN",
+        "name": "te-IN-Standard-A", 
+        "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE
+    }
+}
+
+
+def voice_params(voice_config: dict) -> dict:
+    """Plain-dict form of a voice configuration, used for content-addressed keys"""
+    return {
+        "language_code": voice_config["language_code"],
+        "name": voice_config["name"],
+        "ssml_gender": voice_config["ssml_gender"].name,
+    }
 
 
 class SpeechTools:
@@ -21,80 +66,63 @@ class SpeechTools:
         """Initialize Speech Tools with GCP clients"""
         self.tts_client = texttospeech.TextToSpeechClient()
         self.stt_client = speech.SpeechClient()
-        self.storage_client = storage.Client(project=settings.GCP_PROJECT_ID)
+        self.storage_client = get_storage_client()
         
         # Voice configurations for different languages
-        self.voice_configs = {
-            "kn": {
-                "language_code": "kn-IN",
-                "name": "kn-IN-Standard-A",
-                "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE
-            },
-            "hi": {
-                "language_code": "hi-IN", 
-                "name": "hi-IN-Standard-A",
-                "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE
-            },
-            "en": {
-                "language_code": "en-IN",
-                "name": "en-IN-Standard-A", 
-                "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE
-            },
-            "ta": {
-                "language_code": "ta-IN",
-                "name": "ta-IN-Standard-A",
-                "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE
-            },
-            "te": {
-                "language_code": "te-IN",
-                "name": "te-IN-Standard-A", 
-                "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE
-            }
-        }
+        self.voice_configs = VOICE_CONFIGS
     
     async def text_to_speech(
         self, 
         text: str, 
         language: str = "kn", 
-        user_id: str = None
+        user_id: str = None,
+        audio_profile: str = "standard"
     ) -> Optional[str]:
         """
         Convert text to speech and return audio URL
+        
+        `audio_profile` selects the encoding (see services.audio_profiles);
+        low-bandwidth profiles return Opus instead of MP3.
         """
         try:
             # Get voice configuration
             voice_config = self.voice_configs.get(language, self.voice_configs["kn"])
-            
-            # Prepare synthesis input
-            synthesis_input = texttospeech.SynthesisInput(text=text)
-            
-            # Configure voice
-            voice = texttospeech.VoiceSelectionParams(
-                language_code=voice_config["language_code"],
-                name=voice_config["name"],
-                ssml_gender=voice_config["ssml_gender"]
-            )
-            
-            # Configure audio
-            audio_config = texttospeech.AudioConfig(
-                audio_encoding=texttospeech.AudioEncoding.MP3,
-                speaking_rate=0.9,  # Slightly slower for clarity
-                pitch=0.0,
-                volume_gain_db=0.0
-            )
-            
-            # Generate speech
-            response = self.tts_client.synthesize_speech(
-                input=synthesis_input,
-                voice=voice,
-                audio_config=audio_config
-            )
-            
-            # Upload to Cloud Storage
+            voice = voice_params(voice_config)
+            audio_params = profile_audio_params(audio_profile, DEFAULT_AUDIO_PARAMS)
+            
+            def synthesize() -> bytes:
+                # Prepare synthesis input
+                synthesis_input = texttospeech.SynthesisInput(text=text)
+                
+                # Configure voice
+                voice_selection = texttospeech.VoiceSelectionParams(
+                    language_code=voice_config["language_code"],
+                    name=voice_config["name"],
+                    ssml_gender=voice_config["ssml_gender"]
+                )
+                
+                # Configure audio
+                audio_config = build_audio_config(audio_params)
+                
+                # Generate speech
+                response = self.tts_client.synthesize_speech(
+                    input=synthesis_input,
+                    voice=voice_selection,
+                    audio_config=audio_config
+                )
+                return response.audio_content
+            
+            # Prewarmed phrases are served from the audio pack without a storage lookup
+            audio_url = packed_audio_url(text, voice, audio_params)
+            if audio_url is not None:
+                return audio_url
+            
+            # Upload to Cloud Storage (skipped when the audio already exists)
             audio_url = await self._upload_audio_to_storage(
-                response.audio_content, 
-                user_id or "anonymous",
-                language
+                synthesize,
+                tts_blob_name(text, voice, audio_params),
+                content_type_for(audio_params),
+                audio_profile
             )
             
             return audio_url
@@ -141,34 +169,24 @@ class SpeechTools:
     
     async def _upload_audio_to_storage(
         self, 
-        audio_content: bytes, 
-        user_id: str, 
-        language: str
+        synthesize: Callable[[], bytes], 
+        blob_name: str,
+        content_type: str = "audio/mpeg",
+        audio_profile: str = "standard"
     ) -> Optional[str]:
         """
-        Upload audio to Google Cloud Storage
+        Upload audio to Google Cloud Storage under a content-addressed name.
+        
+        `synthesize` is only called when no object exists under `blob_name`,
+        so repeated phrases cost a single metadata lookup.
         """
         try:
-            # Generate unique filename
-            audio_id = str(uuid.uuid4())
-            blob_name = f"audio/{user_id}/{language}/{audio_id}.mp3"
-            
-            # Get bucket
             bucket = self.storage_client.bucket(settings.UPLOAD_BUCKET)
-            blob = bucket.blob(blob_name)
-            
-            # Upload audio
-            blob.upload_from_string(
-                audio_content,
-                content_type="audio/mpeg"
+            return get_or_upload_tts(
+                bucket, blob_name, synthesize,
+                content_type=content_type, profile=audio_profile
             )
             
-            # Make blob publicly readable (optional - depends on your security requirements)
-            blob.make_public()
-            
-            # Return public URL
-            return blob.public_url
-            
         except Exception as e:
             print(f"Storage upload error: {str(e)}")
             return None
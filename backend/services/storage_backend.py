@@ -0,0 +1,656 @@
+"""
+Pluggable storage backends.
+
+STORAGE_BACKEND selects where blobs and documents live:
+
+- ``gcp`` (default): Cloud Storage and Firestore clients.
+- ``local``: blobs on the filesystem under LOCAL_STORAGE_PATH and documents in
+  a SQLite database (WAL mode) at LOCAL_DOCUMENT_DB.
+
+The local classes implement the subset of the google-cloud-storage and
+google-cloud-firestore client APIs that the services use (buckets/blobs,
+conditional uploads, metadata patches, collections/documents, where/order_by/select/limit/
+start_after queries and write batches), with the same semantics: a document
+missing a filtered or ordered field is excluded, values of different types
+order like Firestore's (null < bool < number < timestamp < string < bytes <
+array < map) and range filters only match values of the filter's type,
+results end with a document-id tiebreak, `set(..., merge=True)` merges nested
+maps, and `if_generation_match=0` raises PreconditionFailed.
+Services get their clients from `get_storage_client()` and
+`get_firestore_client()` and stay backend-agnostic.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import mimetypes
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urlencode
+
+from google.api_core.exceptions import NotFound, PreconditionFailed
+
+from config.settings import settings
+
+_storage_client = None
+_firestore_client = None
+_clients_lock = threading.Lock()
+
+# Per-process fallback when LOCAL_STORAGE_SECRET is unset (single worker only)
+_local_secret = settings.LOCAL_STORAGE_SECRET or secrets.token_hex(32)
+
+
+def is_local_backend() -> bool:
+    return settings.STORAGE_BACKEND == "local"
+
+
+def get_storage_client():
+    """Return the shared blob storage client for the configured backend."""
+    global _storage_client
+    with _clients_lock:
+        if _storage_client is None:
+            if is_local_backend():
+                _storage_client = LocalStorageClient(settings.LOCAL_STORAGE_PATH)
+            else:
+                from google.cloud import storage
+                _storage_client = storage.Client(project=settings.GCP_PROJECT_ID or None)
+        return _storage_client
+
+
+def get_firestore_client():
+    """Return the shared document client for the configured backend."""
+    global _firestore_client
+    with _clients_lock:
+        if _firestore_client is None:
+            if is_local_backend():
+                _firestore_client = LocalDocumentClient(settings.LOCAL_DOCUMENT_DB)
+            else:
+                from google.cloud import firestore
+                _firestore_client = firestore.Client(project=settings.GCP_PROJECT_ID or None)
+        return _firestore_client
+
+
+# --- Blobs ---------------------------------------------------------------
+
+def sign_local_url(bucket_name: str, blob_name: str, method: str, expires: int) -> str:
+    """HMAC signature for a local storage URL."""
+    message = f"{method}\n{bucket_name}\n{blob_name}\n{expires}".encode("utf-8")
+    return hmac.new(_local_secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def verify_local_url(bucket_name: str, blob_name: str, method: str, expires: int, signature: str) -> bool:
+    """Check a local storage URL signature and expiry."""
+    if expires < time.time():
+        return False
+    expected = sign_local_url(bucket_name, blob_name, method, expires)
+    return hmac.compare_digest(expected, signature)
+
+
+class LocalStorageClient:
+    """Filesystem stand-in for google.cloud.storage.Client."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def bucket(self, name: str) -> "LocalBucket":
+        return LocalBucket(self, name)
+
+    def list_blobs(self, bucket_or_name, prefix: Optional[str] = None) -> Iterator["LocalBlob"]:
+        bucket = bucket_or_name if isinstance(bucket_or_name, LocalBucket) else self.bucket(bucket_or_name)
+        return bucket.list_blobs(prefix=prefix)
+
+
+class LocalBucket:
+    """A directory under the local storage root."""
+
+    location = "LOCAL"
+    storage_class = "STANDARD"
+
+    def __init__(self, client: LocalStorageClient, name: str):
+        if not name or "/" in name or name.startswith("."):
+            raise ValueError(f"Invalid bucket name: {name}")
+        self.client = client
+        self.name = name
+        self.path = client.root / name
+        self.meta_path = client.root / ".meta" / name
+
+    @property
+    def time_created(self) -> Optional[datetime]:
+        if not self.path.exists():
+            return None
+        return datetime.fromtimestamp(self.path.stat().st_ctime, tz=timezone.utc)
+
+    def blob(self, name: str) -> "LocalBlob":
+        return LocalBlob(name, self)
+
+    def get_blob(self, name: str) -> Optional["LocalBlob"]:
+        blob = self.blob(name)
+        if not blob.exists():
+            return None
+        blob.reload()
+        return blob
+
+    def list_blobs(self, prefix: Optional[str] = None) -> Iterator["LocalBlob"]:
+        if not self.path.exists():
+            return
+        for path in sorted(self.path.rglob("*")):
+            if not path.is_file() or path.name.startswith(".tmp-"):
+                continue
+            name = path.relative_to(self.path).as_posix()
+            if prefix and not name.startswith(prefix):
+                continue
+            blob = self.blob(name)
+            blob.reload()
+            yield blob
+
+    def delete_blobs(self, blobs: Sequence[Any], on_error=None):
+        for blob in blobs:
+            blob = blob if isinstance(blob, LocalBlob) else self.blob(blob)
+            try:
+                blob.delete()
+            except NotFound:
+                if on_error is None:
+                    raise
+                on_error(blob)
+
+
+class LocalBlob:
+    """A file plus a JSON metadata sidecar."""
+
+    def __init__(self, name: str, bucket: LocalBucket):
+        if ".." in Path(name).parts or name.startswith("/"):
+            raise ValueError(f"Invalid blob name: {name}")
+        self.name = name
+        self.bucket = bucket
+        self.content_type: Optional[str] = None
+        self.cache_control: Optional[str] = None
+        self.size: Optional[int] = None
+        self.updated: Optional[datetime] = None
+        self.custom_time: Optional[datetime] = None
+        self.generation: Optional[int] = None
+
+    @property
+    def client(self) -> LocalStorageClient:
+        return self.bucket.client
+
+    @property
+    def path(self) -> Path:
+        return self.bucket.path / self.name
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.bucket.meta_path / f"{self.name}.json"
+
+    @property
+    def time_created(self) -> Optional[datetime]:
+        return self.updated
+
+    def exists(self) -> bool:
+        return self.path.is_file()
+
+    def reload(self):
+        if not self.exists():
+            raise NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        stat = self.path.stat()
+        self.size = stat.st_size
+        self.updated = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+        self.generation = stat.st_mtime_ns
+        if self._meta_path.exists():
+            meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+            self.content_type = meta.get("content_type")
+            self.cache_control = meta.get("cache_control")
+            custom_time = meta.get("custom_time")
+            self.custom_time = datetime.fromisoformat(custom_time) if custom_time else None
+
+    def upload_from_string(
+        self,
+        data,
+        content_type: Optional[str] = None,
+        if_generation_match: Optional[int] = None,
+    ):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.parent / f".tmp-{uuid.uuid4().hex}"
+        tmp_path.write_bytes(data)
+
+        if if_generation_match == 0:
+            # Conditional create: link fails atomically if the object exists
+            try:
+                os.link(tmp_path, self.path)
+            except FileExistsError:
+                raise PreconditionFailed(f"Object exists: {self.bucket.name}/{self.name}")
+            finally:
+                tmp_path.unlink()
+        else:
+            os.replace(tmp_path, self.path)
+
+        self.content_type = content_type or mimetypes.guess_type(self.name)[0] or "application/octet-stream"
+        self._write_meta()
+        self.reload()
+
+    def patch(self):
+        """Persist metadata changes (cache_control, custom_time)."""
+        if not self.exists():
+            raise NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        self._write_meta()
+
+    def _write_meta(self):
+        self._meta_path.parent.mkdir(parents=True, exist_ok=True)
+        self._meta_path.write_text(
+            json.dumps({
+                "content_type": self.content_type,
+                "cache_control": self.cache_control,
+                "custom_time": self.custom_time.isoformat() if self.custom_time else None,
+            }),
+            encoding="utf-8",
+        )
+
+    def download_as_bytes(self) -> bytes:
+        if not self.exists():
+            raise NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        return self.path.read_bytes()
+
+    def delete(self):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            raise NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        self._meta_path.unlink(missing_ok=True)
+
+    def generate_signed_url(
+        self,
+        version: str = "v4",
+        expiration=None,
+        method: str = "GET",
+        content_type: Optional[str] = None,
+        **kwargs,
+    ) -> str:
+        """URL served by the API's /local-storage routes, signed with LOCAL_STORAGE_SECRET."""
+        seconds = int(expiration.total_seconds()) if expiration is not None else 3600
+        expires = int(time.time()) + seconds
+        query = urlencode({
+            "method": method,
+            "expires": expires,
+            "signature": sign_local_url(self.bucket.name, self.name, method, expires),
+        })
+        base_url = settings.LOCAL_STORAGE_BASE_URL.rstrip("/")
+        return f"{base_url}/local-storage/{self.bucket.name}/{quote(self.name)}?{query}"
+
+
+# --- Documents -----------------------------------------------------------
+
+DESCENDING = "DESCENDING"
+ASCENDING = "ASCENDING"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, dict):
+        return {k: _encode_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode_value(v) for v in value]
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if set(value) == {"__datetime__"}:
+            return datetime.fromisoformat(value["__datetime__"])
+        if set(value) == {"__bytes__"}:
+            return base64.b64decode(value["__bytes__"])
+        return {k: _decode_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode_value(v) for v in value]
+    return value
+
+
+def _type_rank(value: Any) -> int:
+    """Position of the value's type in Firestore's cross-type ordering."""
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, (list, tuple)):
+        return 7
+    if isinstance(value, dict):
+        return 8
+    return 6
+
+
+def _sortable(value: Any) -> Tuple[int, Any]:
+    """Key that orders any two values without comparing unrelated types."""
+    rank = _type_rank(value)
+    if rank == 0:
+        return rank, 0
+    if rank == 3 and value.tzinfo is None:
+        # Mixed naive/aware datetimes can't be compared; treat naive values as UTC
+        return rank, value.replace(tzinfo=timezone.utc)
+    if rank == 6:
+        return rank, str(value)
+    if rank == 7:
+        return rank, tuple(_sortable(v) for v in value)
+    if rank == 8:
+        return rank, tuple((k, _sortable(v)) for k, v in sorted(value.items()))
+    return rank, value
+
+
+def _equal(a: Any, b: Any) -> bool:
+    return _sortable(a) == _sortable(b)
+
+
+def _compare_values(a: Any, b: Any, compare) -> bool:
+    # Range filters only match values of the same type (ints and floats are both numbers)
+    left, right = _sortable(a), _sortable(b)
+    return left[0] == right[0] and compare(left, right)
+
+
+def _merge(existing: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge `data` into `existing` like Firestore: nested maps merge, other values replace."""
+    merged = dict(existing)
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _apply_update(existing: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply `update()` fields: dotted paths set nested fields, other keys replace."""
+    updated = dict(existing)
+    for field_path, value in data.items():
+        *parents, last = field_path.split(".")
+        target = updated
+        for part in parents:
+            child = target.get(part)
+            target[part] = dict(child) if isinstance(child, dict) else {}
+            target = target[part]
+        target[last] = value
+    return updated
+
+
+_MISSING = object()
+
+
+def _get_field(data: Dict[str, Any], field_path: str) -> Any:
+    value: Any = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+_OPERATORS = {
+    "==": _equal,
+    "!=": lambda a, b: not _equal(a, b),
+    "<": lambda a, b: _compare_values(a, b, lambda x, y: x < y),
+    "<=": lambda a, b: _compare_values(a, b, lambda x, y: x <= y),
+    ">": lambda a, b: _compare_values(a, b, lambda x, y: x > y),
+    ">=": lambda a, b: _compare_values(a, b, lambda x, y: x >= y),
+    "in": lambda a, b: any(_equal(a, v) for v in b),
+    "not-in": lambda a, b: not any(_equal(a, v) for v in b),
+    "array_contains": lambda a, b: isinstance(a, list) and any(_equal(v, b) for v in a),
+    "array_contains_any": lambda a, b: isinstance(a, list) and any(_equal(v, t) for v in a for t in b),
+}
+
+
+class LocalDocumentClient:
+    """SQLite (WAL) stand-in for google.cloud.firestore.Client."""
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " collection TEXT NOT NULL,"
+                " id TEXT NOT NULL,"
+                " data TEXT NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (collection, id))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def collection(self, name: str) -> "LocalCollection":
+        return LocalCollection(self, name)
+
+    def batch(self) -> "LocalWriteBatch":
+        return LocalWriteBatch(self)
+
+    def _load(self, collection: str, document_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT data FROM documents WHERE collection = ? AND id = ?", (collection, document_id)
+        ).fetchone()
+        return _decode_value(json.loads(row[0])) if row else None
+
+    def _write(self, ops: List[Tuple[str, "LocalDocumentReference", Optional[Dict[str, Any]], bool]]):
+        """Apply set/update/delete operations atomically."""
+        conn = self._connection()
+        with self._write_lock, conn:
+            for op, ref, data, merge in ops:
+                if op == "delete":
+                    conn.execute(
+                        "DELETE FROM documents WHERE collection = ? AND id = ?", (ref.collection, ref.id)
+                    )
+                    continue
+                if merge or op == "update":
+                    row = conn.execute(
+                        "SELECT data FROM documents WHERE collection = ? AND id = ?", (ref.collection, ref.id)
+                    ).fetchone()
+                    if row is None and op == "update":
+                        raise NotFound(f"No document to update: {ref.collection}/{ref.id}")
+                    existing = _decode_value(json.loads(row[0])) if row else {}
+                    data = _apply_update(existing, data) if op == "update" else _merge(existing, data)
+                conn.execute(
+                    "INSERT OR REPLACE INTO documents (collection, id, data, updated_at) VALUES (?, ?, ?, ?)",
+                    (ref.collection, ref.id, json.dumps(_encode_value(data), ensure_ascii=False), time.time()),
+                )
+
+    def _rows(self, collection: str, equality: List[Tuple[str, Any]]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        sql = "SELECT id, data FROM documents WHERE collection = ?"
+        params: List[Any] = [collection]
+        for field_path, value in equality:
+            # Push top-level scalar equality filters into SQLite
+            sql += " AND json_extract(data, ?) = ?"
+            params.extend([f"$.{field_path}", value])
+        for document_id, data in self._connection().execute(sql, params):
+            yield document_id, _decode_value(json.loads(data))
+
+
+class LocalDocumentSnapshot:
+    def __init__(self, reference: "LocalDocumentReference", data: Optional[Dict[str, Any]]):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        value = _get_field(self._data or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return value
+
+
+class LocalDocumentReference:
+    def __init__(self, client: LocalDocumentClient, collection: str, document_id: str):
+        self._client = client
+        self.collection = collection
+        self.id = document_id
+
+    def get(self) -> LocalDocumentSnapshot:
+        return LocalDocumentSnapshot(self, self._client._load(self.collection, self.id))
+
+    def set(self, data: Dict[str, Any], merge: bool = False):
+        self._client._write([("set", self, data, merge)])
+
+    def update(self, data: Dict[str, Any]):
+        self._client._write([("update", self, data, False)])
+
+    def delete(self):
+        self._client._write([("delete", self, None, False)])
+
+
+class LocalQuery:
+    """Immutable query; each builder method returns a new query."""
+
+    DESCENDING = DESCENDING
+    ASCENDING = ASCENDING
+
+    def __init__(self, client: LocalDocumentClient, collection: str, **state):
+        self._client = client
+        self._collection = collection
+        self._filters: List[Tuple[str, str, Any]] = state.get("filters", [])
+        self._orders: List[Tuple[str, str]] = state.get("orders", [])
+        self._limit: Optional[int] = state.get("limit")
+        self._fields: Optional[List[str]] = state.get("fields")
+        self._start_after = state.get("start_after")
+
+    def _copy(self, **changes) -> "LocalQuery":
+        state = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit": self._limit,
+            "fields": self._fields,
+            "start_after": self._start_after,
+        }
+        state.update(changes)
+        return LocalQuery(self._client, self._collection, **state)
+
+    def where(self, field_path: str, op_string: str, value: Any) -> "LocalQuery":
+        if op_string not in _OPERATORS:
+            raise ValueError(f"Unsupported operator: {op_string}")
+        return self._copy(filters=self._filters + [(field_path, op_string, value)])
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "LocalQuery":
+        return self._copy(orders=self._orders + [(field_path, direction)])
+
+    def limit(self, count: int) -> "LocalQuery":
+        return self._copy(limit=count)
+
+    def select(self, field_paths: Sequence[str]) -> "LocalQuery":
+        return self._copy(fields=list(field_paths))
+
+    def start_after(self, document_fields_or_snapshot) -> "LocalQuery":
+        return self._copy(start_after=document_fields_or_snapshot)
+
+    def _sort_key(self, document_id: str, data: Dict[str, Any]):
+        return [_sortable(_get_field(data, field)) for field, _ in self._orders] + [document_id]
+
+    def _compare(self, left: List[Any], right: List[Any]) -> int:
+        directions = [direction for _, direction in self._orders] + [ASCENDING]
+        for a, b, direction in zip(left, right, directions):
+            if a == b:
+                continue
+            result = -1 if a < b else 1
+            return -result if direction == DESCENDING else result
+        return 0
+
+    def _cursor(self) -> Optional[List[Any]]:
+        cursor = self._start_after
+        if cursor is None:
+            return None
+        if isinstance(cursor, LocalDocumentSnapshot):
+            return self._sort_key(cursor.id, cursor._data or {})
+        # Field-value cursors cover the order-by fields only
+        return [_sortable(cursor.get(field)) for field, _ in self._orders]
+
+    def stream(self) -> Iterator[LocalDocumentSnapshot]:
+        equality = [
+            (field, value) for field, op, value in self._filters
+            if op == "==" and "." not in field and isinstance(value, (str, int, float)) and not isinstance(value, bool)
+        ]
+        matches = []
+        for document_id, data in self._client._rows(self._collection, equality):
+            if any(_get_field(data, field) is _MISSING for field, _ in self._orders):
+                continue
+            if all(
+                (value := _get_field(data, field)) is not _MISSING and _OPERATORS[op](value, target)
+                for field, op, target in self._filters
+            ):
+                matches.append((self._sort_key(document_id, data), document_id, data))
+
+        # Stable multi-key sort honouring each field's direction
+        directions = [direction for _, direction in self._orders] + [ASCENDING]
+        for index in reversed(range(len(directions))):
+            matches.sort(key=lambda match: match[0][index], reverse=directions[index] == DESCENDING)
+
+        cursor = self._cursor()
+        if cursor is not None:
+            matches = [m for m in matches if self._compare(m[0][:len(cursor)], cursor) > 0]
+        if self._limit is not None:
+            matches = matches[:self._limit]
+
+        for _, document_id, data in matches:
+            if self._fields is not None:
+                data = _apply_update({}, {
+                    field: value for field in self._fields
+                    if (value := _get_field(data, field)) is not _MISSING
+                })
+            reference = LocalDocumentReference(self._client, self._collection, document_id)
+            yield LocalDocumentSnapshot(reference, data)
+
+    def get(self) -> List[LocalDocumentSnapshot]:
+        return list(self.stream())
+
+
+class LocalCollection(LocalQuery):
+    def __init__(self, client: LocalDocumentClient, name: str):
+        super().__init__(client, name)
+        self.id = name
+
+    def document(self, document_id: Optional[str] = None) -> LocalDocumentReference:
+        return LocalDocumentReference(self._client, self._collection, document_id or uuid.uuid4().hex[:20])
+
+
+class LocalWriteBatch:
+    def __init__(self, client: LocalDocumentClient):
+        self._client = client
+        self._ops = []
+
+    def set(self, reference: LocalDocumentReference, data: Dict[str, Any], merge: bool = False):
+        self._ops.append(("set", reference, data, merge))
+
+    def delete(self, reference: LocalDocumentReference):
+        self._ops.append(("delete", reference, None, False))
+
+    def commit(self):
+        self._client._write(self._ops)
+        self._ops = []
@@ -2,26 +2,109 @@
 Storage Tools for Kisan AI agents using Google Cloud Storage
 """
 
-from google.cloud import storage
-from google.cloud import firestore
 import uuid
 import asyncio
-from typing import Optional, Dict, Any
+import base64
+import json
+from typing import Optional, Dict, Any, AsyncIterator, List, Sequence
 from datetime import datetime
 
 from config.settings import settings
+from services.cache import MISSING, TTLCache, get_shared_cache
+from services.firestore_writer import get_write_behind_buffer, write_behind_enabled
+from services.image_processing import normalize_image
+from services.metrics import metrics
+from services.persistence_queue import defer_enabled, get_persistence_queue
+from services.retention import delete_blobs
+from services.storage_backend import DESCENDING, get_firestore_client, get_storage_client
+from services.signed_urls import blob_name_from_url, create_upload, signed_download_url
+
+DEFAULT_USER_CONTEXT = {
+    'location': 'Karnataka',
+    'language': 'kn',
+    'farming_type': 'mixed',
+    'land_size': 'small'
+}
+
+IMAGE_EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/webp': 'webp'
+}
+
+# Cached as {"exists": bool, "data": dict}; "exists": False caches the default-context case
+_user_context_cache = TTLCache(
+    "user_context",
+    maxsize=settings.USER_CONTEXT_CACHE_SIZE,
+    ttl_seconds=settings.USER_CONTEXT_CACHE_TTL_SECONDS
+)
+
+
+def encode_cursor(timestamp: datetime, conversation_id: str) -> str:
+    """Encode a page cursor (the last document's sort key) as an opaque string"""
+    payload = json.dumps({'timestamp': timestamp.isoformat(), 'conversation_id': conversation_id})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by `encode_cursor` into `start_after` field values"""
+    payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    return {
+        'timestamp': datetime.fromisoformat(payload['timestamp']),
+        'conversation_id': payload['conversation_id']
+    }
+
+
+async def invalidate_user_context(user_id: str):
+    """Drop a user's context from both cache tiers"""
+    _user_context_cache.invalidate(user_id)
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        await shared_cache.invalidate("user_context", user_id)
+
+
+def register_persistence_handlers(firestore_client):
+    """
+    Register the background persistence jobs backed by the given client.
+    
+    Jobs:
+        storage.set_document: write a Firestore document (a user context is
+            dropped from the caches once the write has landed)
+    
+    Uploads are never queued: their signed URLs go straight back to the
+    client, so the object has to exist before the URL is returned.
+    """
+    async def set_document(
+        collection: str,
+        document_id: str,
+        data: Dict[str, Any],
+        merge: bool = False
+    ):
+        doc_ref = firestore_client.collection(collection).document(document_id)
+        await asyncio.to_thread(doc_ref.set, data, merge=merge)
+        if collection == 'user_contexts':
+            # A read while the job waited may have cached the old document
+            await invalidate_user_context(document_id)
+    
+    get_persistence_queue().register("storage.set_document", set_document)
 
 
 class StorageTools:
     """
     Storage tools for file uploads and data persistence
+    
+    Document writes accept `defer`; when enabled (PERSISTENCE_DEFER_WRITES by
+    default) and the persistence queue is running, the write is queued and
+    runs after the response is sent. Uploads always run inline. Conversation and user-context writes go through the
+    write-behind buffer instead when FIRESTORE_WRITE_BEHIND is on, and are
+    committed as Firestore batches.
     """
     
     def __init__(self):
-        """Initialize Storage Tools with GCP clients"""
-        self.storage_client = storage.Client(project=settings.GCP_PROJECT_ID)
-        self.firestore_client = firestore.Client(project=settings.GCP_PROJECT_ID)
+        """Initialize Storage Tools with the configured storage backend"""
+        self.storage_client = get_storage_client()
+        self.firestore_client = get_firestore_client()
         self.bucket_name = settings.UPLOAD_BUCKET
+        register_persistence_handlers(self.firestore_client)
     
     async def upload_image(
         self, 
@@ -30,9 +113,19 @@ class StorageTools:
         file_extension: str = "jpg"
     ) -> Optional[str]:
         """
-        Upload image to Cloud Storage and return public URL
+        Upload image to Cloud Storage and return a signed download URL
+        
+        Prefer `create_image_upload` so clients upload directly to storage.
+        With NORMALIZE_IMAGES on, the stored copy is oriented, stripped of
+        metadata and downsized, and `file_extension` follows the output type.
         """
         try:
+            content_type = f"image/{file_extension}"
+            if settings.NORMALIZE_IMAGES:
+                normalized = await asyncio.to_thread(normalize_image, image_data)
+                image_data, content_type = normalized["data"], normalized["mime_type"]
+                file_extension = IMAGE_EXTENSIONS.get(content_type, file_extension)
+            
             # Generate unique filename
             image_id = str(uuid.uuid4())
             blob_name = f"images/{user_id}/{image_id}.{file_extension}"
@@ -41,25 +134,46 @@ class StorageTools:
             bucket = self.storage_client.bucket(self.bucket_name)
             blob = bucket.blob(blob_name)
             
-            # Upload image
-            blob.upload_from_string(
+            # Upload before returning the URL; the name is new, so create-only
+            await asyncio.to_thread(
+                blob.upload_from_string,
                 image_data,
-                content_type=f"image/{file_extension}"
+                content_type=content_type,
+                if_generation_match=0
             )
             
-            # Make blob publicly readable
-            blob.make_public()
-            
-            return blob.public_url
+            return signed_download_url(blob)
             
         except Exception as e:
             print(f"Image upload error: {str(e)}")
             return None
     
+    def create_image_upload(
+        self, 
+        user_id: str, 
+        content_type: str = "image/jpeg"
+    ) -> Dict[str, Any]:
+        """
+        Reserve an object key and signed URL for a direct client image upload
+        
+        The client PUTs the image to `upload_url` and sends back only the
+        `object_key`; the backend never proxies the bytes.
+        """
+        bucket = self.storage_client.bucket(self.bucket_name)
+        return create_upload(bucket, "image", user_id, content_type)
+    
+    def get_file_url(self, object_key: str) -> str:
+        """
+        Get a signed, cacheable download URL for a stored object
+        """
+        bucket = self.storage_client.bucket(self.bucket_name)
+        return signed_download_url(bucket.blob(object_key))
+    
     async def save_conversation(
         self, 
         user_id: str, 
-        conversation_data: Dict[str, Any]
+        conversation_data: Dict[str, Any],
+        defer: Optional[bool] = None
     ) -> bool:
         """
         Save conversation to Firestore
@@ -75,6 +189,18 @@ class StorageTools:
                 'conversation_id': doc_ref.id
             })
             
+            if defer is not False and write_behind_enabled():
+                get_write_behind_buffer().add('conversations', doc_ref.id, conversation_data)
+                return True
+            
+            if defer_enabled(defer):
+                get_persistence_queue().enqueue("storage.set_document", {
+                    "collection": "conversations",
+                    "document_id": doc_ref.id,
+                    "data": conversation_data
+                })
+                return True
+            
             # Save to Firestore
             doc_ref.set(conversation_data)
             
@@ -84,37 +210,121 @@ class StorageTools:
             print(f"Conversation save error: {str(e)}")
             return False
     
-    async def get_user_conversations(
+    def _conversations_query(
         self, 
         user_id: str, 
-        limit: int = 10
-    ) -> list:
+        page_size: int, 
+        fields: Optional[Sequence[str]] = None
+    ):
         """
-        Get user's recent conversations from Firestore
+        Newest-first conversations query, optionally projected to `fields`
+        
+        `conversation_id` breaks timestamp ties, so pages never skip or repeat
+        documents written at the same instant. Needs the composite index on
+        (user_id, timestamp desc, conversation_id desc) in firestore.indexes.json.
+        """
+        query = self.firestore_client.collection('conversations')\
+                                     .where('user_id', '==', user_id)\
+                                     .order_by('timestamp', direction=DESCENDING)\
+                                     .order_by('conversation_id', direction=DESCENDING)
+        if fields:
+            # The cursor needs the order-by fields, so always project them
+            query = query.select(list(dict.fromkeys([*fields, 'timestamp', 'conversation_id'])))
+        return query.limit(page_size)
+    
+    async def _fetch_page(self, query) -> List[Any]:
+        """Run a query off the event loop and count the documents read"""
+        docs = await asyncio.to_thread(lambda: list(query.stream()))
+        metrics.increment("firestore_reads_total", len(docs), collection="conversations")
+        return docs
+    
+    async def get_conversation_page(
+        self, 
+        user_id: str, 
+        page_size: int = 20, 
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Get one page of a user's conversations, newest first
+        
+        Args:
+            user_id: User whose conversations to read
+            page_size: Maximum documents in the page
+            cursor: `next_cursor` from the previous page, if any
+            fields: Fields to fetch (Firestore projection); all fields if None
+            
+        Returns:
+            Dict with `conversations` and an opaque `next_cursor` (None on the last page)
         """
         try:
-            # Query conversations
-            conversations_ref = self.firestore_client.collection('conversations')
-            query = conversations_ref.where('user_id', '==', user_id)\
-                                   .order_by('timestamp', direction=firestore.Query.DESCENDING)\
-                                   .limit(limit)
+            query = self._conversations_query(user_id, page_size, fields)
+            if cursor:
+                query = query.start_after(decode_cursor(cursor))
             
+            docs = await self._fetch_page(query)
             conversations = []
-            for doc in query.stream():
+            for doc in docs:
                 conversation_data = doc.to_dict()
                 conversation_data['id'] = doc.id
                 conversations.append(conversation_data)
             
-            return conversations
+            next_cursor = None
+            if len(docs) == page_size:
+                last = conversations[-1]
+                next_cursor = encode_cursor(last['timestamp'], last['conversation_id'])
+            
+            return {'conversations': conversations, 'next_cursor': next_cursor}
             
         except Exception as e:
-            print(f"Conversation retrieval error: {str(e)}")
-            return []
+            print(f"Conversation page retrieval error: {str(e)}")
+            return {'conversations': [], 'next_cursor': None}
+    
+    async def iter_conversations(
+        self, 
+        user_id: str, 
+        page_size: int = 50,
+        fields: Optional[Sequence[str]] = None,
+        max_items: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Walk a user's conversations newest first, fetching one page at a time
+        
+        Pages chain through Firestore `start_after` on the last snapshot, so
+        deep histories are read incrementally and iteration can stop early.
+        """
+        query = self._conversations_query(user_id, page_size, fields)
+        yielded = 0
+        while True:
+            docs = await self._fetch_page(query)
+            for doc in docs:
+                conversation_data = doc.to_dict()
+                conversation_data['id'] = doc.id
+                yield conversation_data
+                yielded += 1
+                if max_items is not None and yielded >= max_items:
+                    return
+            if len(docs) < page_size:
+                return
+            query = self._conversations_query(user_id, page_size, fields).start_after(docs[-1])
+    
+    async def get_user_conversations(
+        self, 
+        user_id: str, 
+        limit: int = 10,
+        fields: Optional[Sequence[str]] = None
+    ) -> list:
+        """
+        Get user's recent conversations from Firestore
+        """
+        page = await self.get_conversation_page(user_id, page_size=limit, fields=fields)
+        return page['conversations']
     
     async def save_user_context(
         self, 
         user_id: str, 
-        context_data: Dict[str, Any]
+        context_data: Dict[str, Any],
+        defer: Optional[bool] = None
     ) -> bool:
         """
         Save user context to Firestore
@@ -129,9 +339,27 @@ class StorageTools:
                 'last_updated': datetime.now()
             })
             
-            # Save to Firestore
-            doc_ref.set(context_data, merge=True)
+            if defer is not False and write_behind_enabled():
+                get_write_behind_buffer().add('user_contexts', user_id, context_data, merge=True)
+            elif defer_enabled(defer):
+                get_persistence_queue().enqueue("storage.set_document", {
+                    "collection": "user_contexts",
+                    "document_id": user_id,
+                    "data": context_data,
+                    "merge": True
+                })
+            else:
+                # Save to Firestore
+                doc_ref.set(context_data, merge=True)
             
+            # Write through when this worker holds the context; otherwise drop
+            # any shared copy rather than read the document back. Queued writes
+            # invalidate again once they land (register_persistence_handlers).
+            cached = _user_context_cache.peek(user_id)
+            if cached is not MISSING and cached["exists"]:
+                await self._cache_user_context(user_id, {"exists": True, "data": {**cached["data"], **context_data}})
+            else:
+                await invalidate_user_context(user_id)
             return True
             
         except Exception as e:
@@ -140,40 +368,75 @@ class StorageTools:
     
     async def get_user_context(self, user_id: str) -> Dict[str, Any]:
         """
-        Get user context from Firestore
+        Get user context, read through the local and shared caches
+        
+        Missing documents are cached too, so new farmers don't cost a
+        Firestore read per turn. `save_user_context` updates a context this
+        worker has cached and invalidates it otherwise. Cache hits count
+        towards `firestore_reads_avoided_total`; the hit ratio is the
+        `cache_hit_ratio{cache="user_context"}` gauge.
         """
         try:
-            # Get user context document
-            doc_ref = self.firestore_client.collection('user_contexts').document(user_id)
-            doc = doc_ref.get()
+            entry = await self._load_user_context(user_id)
             
-            if doc.exists:
-                return doc.to_dict()
+            if entry["exists"]:
+                return dict(entry["data"])
             else:
                 # Return default context
-                return {
-                    'location': 'Karnataka',
-                    'language': 'kn',
-                    'farming_type': 'mixed',
-                    'land_size': 'small'
-                }
+                return dict(DEFAULT_USER_CONTEXT)
                 
         except Exception as e:
             print(f"Context retrieval error: {str(e)}")
-            return {
-                'location': 'Karnataka',
-                'language': 'kn',
-                'farming_type': 'mixed',
-                'land_size': 'small'
-            }
+            return dict(DEFAULT_USER_CONTEXT)
+    
+    async def _load_user_context(self, user_id: str) -> Dict[str, Any]:
+        """Cached `{"exists", "data"}` entry for a user, reading Firestore on a miss"""
+        entry = _user_context_cache.get(user_id)
+        
+        shared_cache = get_shared_cache()
+        if entry is MISSING and shared_cache is not None:
+            entry = await shared_cache.get("user_context", user_id)
+            if entry is not MISSING:
+                _user_context_cache.set(user_id, entry)
+        
+        if entry is not MISSING:
+            metrics.increment("firestore_reads_avoided_total", collection="user_contexts")
+            return entry
+        
+        # Get user context document
+        doc_ref = self.firestore_client.collection('user_contexts').document(user_id)
+        doc = doc_ref.get()
+        metrics.increment("firestore_reads_total", collection="user_contexts")
+        
+        # Overlay writes still waiting in the write-behind buffer
+        pending = get_write_behind_buffer().pending_data('user_contexts', user_id)
+        
+        if doc.exists:
+            entry = {"exists": True, "data": {**doc.to_dict(), **(pending or {})}}
+        elif pending:
+            entry = {"exists": True, "data": pending}
+        else:
+            entry = {"exists": False, "data": {}}
+        
+        await self._cache_user_context(user_id, entry)
+        return entry
+    
+    async def _cache_user_context(self, user_id: str, entry: Dict[str, Any]):
+        """Store a user's context entry in both cache tiers"""
+        _user_context_cache.set(user_id, entry)
+        shared_cache = get_shared_cache()
+        if shared_cache is not None:
+            await shared_cache.set(
+                "user_context", user_id, entry, settings.USER_CONTEXT_CACHE_TTL_SECONDS
+            )
     
     async def delete_file(self, file_url: str) -> bool:
         """
         Delete file from Cloud Storage
         """
         try:
-            # Extract blob name from URL
-            blob_name = file_url.split(f"{self.bucket_name}/")[-1]
+            # Extract blob name from URL (public, signed or gs://)
+            blob_name = blob_name_from_url(file_url, self.bucket_name)
             
             # Get bucket and delete blob
             bucket = self.storage_client.bucket(self.bucket_name)
@@ -186,6 +449,25 @@ class StorageTools:
             print(f"File deletion error: {str(e)}")
             return False
     
+    async def delete_files(self, file_urls: List[str]) -> Dict[str, bool]:
+        """
+        Delete several files from Cloud Storage using batched requests
+        
+        Returns:
+            Dict mapping each URL to whether its object is gone
+        """
+        try:
+            blob_names = {url: blob_name_from_url(url, self.bucket_name) for url in file_urls}
+            bucket = self.storage_client.bucket(self.bucket_name)
+            results = await asyncio.to_thread(
+                delete_blobs, bucket, blob_names.values(), settings.BLOB_SWEEP_BATCH_SIZE
+            )
+            return {url: results.get(name, False) for url, name in blob_names.items()}
+            
+        except Exception as e:
+            print(f"Bulk file deletion error: {str(e)}")
+            return {url: False for url in file_urls}
+    
     def get_bucket_info(self) -> Dict[str, Any]:
         """
         Get bucket information
@@ -0,0 +1,177 @@
+"""
+Content-addressed storage for synthesized speech.
+
+TTS output is fully determined by the input text, the voice and the audio
+configuration, so the blob name is derived from a digest of those three.
+Identical requests map to the same object across processes and restarts,
+which lets callers skip synthesis entirely when the object already exists.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from google.api_core.exceptions import PreconditionFailed
+
+from config.settings import settings
+from services.audio_pack import get_audio_pack
+from services.audio_profiles import AUDIO_PROFILES
+from services.metrics import BYTE_BUCKETS, metrics
+from services.signed_urls import signed_download_url
+
+logger = logging.getLogger(__name__)
+
+TTS_PREFIX = "tts"
+
+# Content-addressed objects never change, so clients and CDNs may cache forever
+TTS_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Audio parameters shared by the SpeechService and SpeechTools TTS paths
+# (the encoding comes from the selected audio profile)
+DEFAULT_AUDIO_PARAMS = {
+    **AUDIO_PROFILES["standard"],
+    "speaking_rate": 0.9,  # Slightly slower for clarity
+    "pitch": 0.0,
+    "volume_gain_db": 0.0,
+}
+
+# File extension per audio encoding name
+AUDIO_EXTENSIONS = {
+    "MP3": "mp3",
+    "OGG_OPUS": "ogg",
+    "LINEAR16": "wav",
+}
+
+
+def tts_cache_key(text: str, voice: Dict[str, Any], audio_config: Dict[str, Any]) -> str:
+    """
+    Build a stable digest for a synthesis request.
+
+    Args:
+        text: Text to be synthesized
+        voice: Voice parameters (language_code, name, ssml_gender, ...)
+        audio_config: Audio parameters (audio_encoding, speaking_rate, ...)
+
+    Returns:
+        Hex SHA-256 digest of the canonicalized request
+    """
+    payload = json.dumps(
+        {"text": text, "voice": voice, "audio_config": audio_config},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def tts_blob_name(text: str, voice: Dict[str, Any], audio_config: Dict[str, Any]) -> str:
+    """Return the object name under which a synthesis result is stored."""
+    encoding = str(audio_config.get("audio_encoding", "MP3"))
+    extension = AUDIO_EXTENSIONS.get(encoding, "mp3")
+    return f"{TTS_PREFIX}/{tts_cache_key(text, voice, audio_config)}.{extension}"
+
+
+def packed_audio_url(text: str, voice: Dict[str, Any], audio_config: Dict[str, Any]) -> Optional[str]:
+    """
+    Return the URL this API serves a prewarmed phrase from, or None if it is not packed.
+
+    Checked before the Cloud Storage lookup, so fixed phrases cost no round-trip.
+    The pack version is part of the path, so the URL stays valid for caching.
+    """
+    pack = get_audio_pack()
+    if pack is None:
+        return None
+    key = tts_cache_key(text, voice, audio_config)
+    if key not in pack:
+        return None
+    metrics.increment("tts_audio_pack_hits_total")
+    return f"{settings.AUDIO_PACK_BASE_URL.rstrip('/')}/audio-pack/{pack.version}/{key}"
+
+
+def packed_or_synthesized(
+    text: str,
+    voice: Dict[str, Any],
+    audio_config: Dict[str, Any],
+    synthesize: Callable[[], bytes],
+) -> bytes:
+    """
+    Return prebuilt audio from the loaded audio pack, falling back to `synthesize`.
+
+    Fixed phrases prewarmed by ``prewarm_tts.py`` are served without a TTS call.
+    """
+    pack = get_audio_pack()
+    if pack is not None:
+        audio = pack.get(tts_cache_key(text, voice, audio_config))
+        if audio is not None:
+            return audio
+    return synthesize()
+
+
+def touch_blob(blob, now: Optional[datetime] = None):
+    """
+    Mark a reused object as recently used by advancing its `custom_time`.
+
+    The retention sweeper ages objects from `custom_time`, so hot phrases stay
+    stored. Patched at most once per TTS_TOUCH_INTERVAL_SECONDS per object.
+    """
+    now = now or datetime.now(timezone.utc)
+    if blob.custom_time is not None and now - blob.custom_time < timedelta(seconds=settings.TTS_TOUCH_INTERVAL_SECONDS):
+        return
+    try:
+        blob.custom_time = now
+        blob.patch()
+    except Exception as e:
+        logger.warning(f"Could not refresh custom_time of {blob.name}: {str(e)}")
+
+
+def get_or_upload_tts(
+    bucket,
+    blob_name: str,
+    synthesize: Callable[[], bytes],
+    content_type: str = "audio/mpeg",
+    profile: str = "standard",
+) -> str:
+    """
+    Return a signed URL for `blob_name`, synthesizing and uploading only on a miss.
+
+    The existence check is a single metadata request. The upload is conditional
+    on the object not existing yet (``if_generation_match=0``), so concurrent
+    workers racing on the same phrase never overwrite each other. The upload
+    always finishes before the URL is returned, since clients fetch it at once.
+
+    Args:
+        bucket: Cloud Storage bucket
+        blob_name: Content-addressed object name from `tts_blob_name`
+        synthesize: Callable returning the audio bytes, invoked only on a miss
+        content_type: MIME type of the audio
+        profile: Audio profile name, used as a metrics label
+
+    Returns:
+        Signed, cacheable download URL of the audio object
+    """
+    existing = bucket.get_blob(blob_name)
+    if existing is not None:
+        logger.info(f"TTS cache hit: {blob_name}")
+        metrics.observe("tts_audio_bytes", existing.size or 0, buckets=BYTE_BUCKETS,
+                        profile=profile, cache="hit")
+        touch_blob(existing)
+        return signed_download_url(existing)
+
+    blob = bucket.blob(blob_name)
+    audio_content = synthesize()
+    metrics.observe("tts_audio_bytes", len(audio_content), buckets=BYTE_BUCKETS,
+                    profile=profile, cache="miss")
+    blob.cache_control = TTS_CACHE_CONTROL
+    try:
+        blob.upload_from_string(
+            audio_content,
+            content_type=content_type,
+            if_generation_match=0,
+        )
+    except PreconditionFailed:
+        # Another worker uploaded the same content first
+        logger.info(f"TTS object already uploaded concurrently: {blob_name}")
+
+    return signed_download_url(blob)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Run the blob retention sweeper once.
+
+Lists every prefix in BLOB_RETENTION_DAYS (or --policy overrides) in the upload
+bucket and deletes objects older than their retention in batches. Use
+--dry-run (or BLOB_SWEEP_DRY_RUN) to report what would be deleted.
+
+The API does not sweep by itself; schedule this once per deployment (cron,
+Cloud Scheduler + Cloud Run job), not once per worker.
+
+Usage:
+    python sweep_blobs.py [--dry-run] [--policy tts/=30 --policy uploads/audio/=7]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add current directory to path to import our modules
+sys.path.append(str(Path(__file__).parent))
+
+from config.settings import settings
+from services.retention import BlobSweeper
+
+
+def parse_policy(value: str):
+    prefix, _, days = value.partition("=")
+    if not prefix or not days:
+        raise argparse.ArgumentTypeError(f"Expected PREFIX=DAYS, got {value!r}")
+    return prefix, float(days)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete expired objects from the upload bucket")
+    parser.add_argument("--dry-run", action="store_true", help="Report without deleting")
+    parser.add_argument("--policy", type=parse_policy, action="append", default=None,
+                        help="PREFIX=DAYS retention (repeatable; default: BLOB_RETENTION_DAYS)")
+    parser.add_argument("--batch-size", type=int, default=settings.BLOB_SWEEP_BATCH_SIZE,
+                        help="Objects per delete batch")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    policies = dict(args.policy) if args.policy else settings.BLOB_RETENTION_DAYS
+    sweeper = BlobSweeper(policies=policies, batch_size=args.batch_size,
+                          dry_run=args.dry_run or settings.BLOB_SWEEP_DRY_RUN)
+    report = sweeper.sweep()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Bucket {settings.UPLOAD_BUCKET} ({settings.STORAGE_BACKEND} backend)"
+          f"{' - dry run, nothing deleted' if report['dry_run'] else ''}")
+    print(f"{'prefix':<20}{'days':>6}{'scanned':>10}{'expired':>10}{'deleted':>10}{'failed':>8}{'MiB':>10}")
+    for prefix, stats in report["prefixes"].items():
+        print(
+            f"{prefix:<20}{stats['retention_days']:>6g}{stats['scanned']:>10}{stats['expired']:>10}"
+            f"{stats['deleted']:>10}{stats['failed']:>8}{stats['expired_bytes'] / 1048576:>10.2f}"
+        )
+    print(f"Finished in {report['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Audio pack: prewarmed phrases are served without TTS or storage round-trips."""
+
+import asyncio
+
+import pytest
+
+from services import audio_pack
+from services.audio_pack import write_audio_pack
+from services.audio_profiles import profile_audio_params
+from services.speech_service import SpeechService, service_voice_params
+from services.tts_cache import DEFAULT_AUDIO_PARAMS, packed_audio_url, tts_cache_key
+
+PHRASE = "ಯಾವುದೇ ಮಾತು ಕೇಳಿಸಲಿಲ್ಲ"
+
+
+class UnusedBucket:
+    """Bucket that fails the test if the storage path is taken."""
+
+    def get_blob(self, name):
+        raise AssertionError(f"unexpected storage lookup for {name}")
+
+
+@pytest.fixture
+def pack(tmp_path, monkeypatch):
+    key = tts_cache_key(PHRASE, service_voice_params(), profile_audio_params("standard", DEFAULT_AUDIO_PARAMS))
+    path = write_audio_pack(tmp_path, {key: (b"audio", "audio/mpeg")}, version="v1")
+    loaded = audio_pack.AudioPack(path)
+    monkeypatch.setattr(audio_pack, "_audio_pack", loaded)
+    monkeypatch.setattr(audio_pack, "_audio_pack_loaded", True)
+    yield loaded
+    loaded.close()
+
+
+def test_packed_audio_url(pack, monkeypatch):
+    monkeypatch.setattr("config.settings.settings.AUDIO_PACK_BASE_URL", "https://api.example/")
+    audio_params = profile_audio_params("standard", DEFAULT_AUDIO_PARAMS)
+    key = tts_cache_key(PHRASE, service_voice_params(), audio_params)
+
+    assert packed_audio_url(PHRASE, service_voice_params(), audio_params) == f"https://api.example/audio-pack/v1/{key}"
+    assert packed_audio_url("other", service_voice_params(), audio_params) is None
+
+
+def test_speech_service_serves_packed_phrase_without_storage(pack):
+    service = SpeechService.__new__(SpeechService)
+    service.bucket = UnusedBucket()
+
+    url = asyncio.run(service.text_to_speech(PHRASE))
+
+    key = tts_cache_key(PHRASE, service_voice_params(), profile_audio_params("standard", DEFAULT_AUDIO_PARAMS))
+    assert url.endswith(f"/audio-pack/v1/{key}")
+
+
+def test_service_voice_defaults_to_configured_language(monkeypatch):
+    monkeypatch.setattr("config.settings.settings.TTS_LANGUAGE", "hi-IN")
+
+    assert service_voice_params()["language_code"] == "hi-IN"
+    assert service_voice_params("en-IN")["language_code"] == "en-IN"
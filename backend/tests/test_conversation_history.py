@@ -0,0 +1,73 @@
+"""Cursor-paged, projected conversation history."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.storage_backend import LocalDocumentClient
+from services.storage_tools import StorageTools, decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def tools(tmp_path):
+    tools = StorageTools.__new__(StorageTools)
+    tools.firestore_client = LocalDocumentClient(str(tmp_path / "documents.db"))
+    conversations = tools.firestore_client.collection("conversations")
+    started = datetime(2024, 5, 1, 9, 0)
+    for i in range(7):
+        # Pairs of turns share a timestamp, so pages must break ties by id
+        timestamp = started + timedelta(minutes=i // 2)
+        conversations.document(f"c{i}").set({
+            "user_id": "u1",
+            "timestamp": timestamp,
+            "conversation_id": f"c{i}",
+            "user_message": f"question {i}",
+            "ai_response": f"answer {i}",
+        })
+    conversations.document("other").set({"user_id": "u2", "timestamp": started, "conversation_id": "other"})
+    return tools
+
+
+def test_cursor_round_trip():
+    timestamp = datetime(2024, 5, 1, 9, 30)
+    assert decode_cursor(encode_cursor(timestamp, "c3")) == {"timestamp": timestamp, "conversation_id": "c3"}
+
+
+def test_pages_cross_boundaries_without_skips_or_repeats(tools):
+    async def run():
+        seen = []
+        pages = 0
+        cursor = None
+        while True:
+            page = await tools.get_conversation_page("u1", page_size=3, cursor=cursor)
+            seen.extend(conversation["id"] for conversation in page["conversations"])
+            pages += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return seen, pages
+
+    seen, pages = asyncio.run(run())
+    assert seen == ["c6", "c5", "c4", "c3", "c2", "c1", "c0"]
+    assert pages == 3
+
+
+def test_projection_fetches_only_requested_fields(tools):
+    page = asyncio.run(tools.get_conversation_page("u1", page_size=2, fields=["user_message"]))
+    assert [sorted(conversation) for conversation in page["conversations"]] == [
+        ["conversation_id", "id", "timestamp", "user_message"]
+    ] * 2
+    assert page["next_cursor"] is not None
+
+
+def test_iterator_walks_pages_and_stops_early(tools):
+    async def collect(**kwargs):
+        return [conversation["id"] async for conversation in tools.iter_conversations("u1", **kwargs)]
+
+    assert asyncio.run(collect(page_size=2)) == ["c6", "c5", "c4", "c3", "c2", "c1", "c0"]
+    assert asyncio.run(collect(page_size=2, max_items=3)) == ["c6", "c5", "c4"]
+
+
+def test_recent_conversations(tools):
+    conversations = asyncio.run(tools.get_user_conversations("u1", limit=2))
+    assert [conversation["ai_response"] for conversation in conversations] == ["answer 6", "answer 5"]
@@ -0,0 +1,49 @@
+"""Embedding query log: queries are written off the caller's thread."""
+
+import threading
+
+from services import embedding_cache
+from services.embedding_cache import flush_query_log, log_query, read_query_log
+
+
+def test_query_log_round_trip(tmp_path, monkeypatch):
+    path = tmp_path / "queries.jsonl"
+    monkeypatch.setattr("config.settings.settings.EMBEDDING_QUERY_LOG", str(path))
+
+    log_query("tomato leaf curl")
+    log_query("ಬೆಳೆ ವಿಮೆ")
+    flush_query_log()
+
+    assert list(read_query_log(str(path))) == ["tomato leaf curl", "ಬೆಳೆ ವಿಮೆ"]
+
+
+def test_query_log_file_is_written_by_listener_thread(tmp_path, monkeypatch):
+    path = tmp_path / "queries.jsonl"
+    monkeypatch.setattr("config.settings.settings.EMBEDDING_QUERY_LOG", str(path))
+    writers = []
+    emit = embedding_cache._QueryLogHandler.emit
+
+    def recording_emit(handler, record):
+        writers.append(threading.current_thread())
+        emit(handler, record)
+
+    monkeypatch.setattr(embedding_cache._QueryLogHandler, "emit", recording_emit)
+
+    log_query("rice blast")
+    flush_query_log()
+
+    assert writers and threading.current_thread() not in writers
+
+
+def test_query_log_errors_do_not_reach_caller(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.settings.settings.EMBEDDING_QUERY_LOG", str(tmp_path / "missing" / "q.jsonl"))
+
+    log_query("wheat rust")
+    flush_query_log()
+
+    # The listener survived the failed write and later queries still go through
+    path = tmp_path / "queries.jsonl"
+    monkeypatch.setattr("config.settings.settings.EMBEDDING_QUERY_LOG", str(path))
+    log_query("rice blast")
+    flush_query_log()
+    assert list(read_query_log(str(path))) == ["rice blast"]
@@ -0,0 +1,77 @@
+"""Write-behind buffer: coalescing and read-your-writes across a flush."""
+
+import asyncio
+import threading
+
+from services.firestore_writer import WriteBehindBuffer
+from services.storage_backend import LocalDocumentClient
+
+
+class BlockingClient:
+    """Document client whose batch commits wait for `release`."""
+
+    def __init__(self, client):
+        self._client = client
+        self.committing = threading.Event()
+        self.release = threading.Event()
+
+    def collection(self, name):
+        return self._client.collection(name)
+
+    def batch(self):
+        batch = self._client.batch()
+        commit = batch.commit
+
+        def blocking_commit():
+            self.committing.set()
+            self.release.wait(5)
+            commit()
+
+        batch.commit = blocking_commit
+        return batch
+
+
+def test_coalesces_writes_to_the_same_document(tmp_path):
+    client = LocalDocumentClient(str(tmp_path / "documents.db"))
+    buffer = WriteBehindBuffer(client)
+    buffer.add("user_contexts", "u1", {"name": "Asha"}, merge=True)
+    buffer.add("user_contexts", "u1", {"city": "Mysuru"}, merge=True)
+    buffer.add("conversations", "c1", {"turn": 1})
+    buffer.add("conversations", "c1", {"turn": 2})
+    assert len(buffer) == 2
+
+    assert asyncio.run(buffer.flush()) == 2
+    assert client.collection("user_contexts").document("u1").get().to_dict() == {"name": "Asha", "city": "Mysuru"}
+    assert client.collection("conversations").document("c1").get().to_dict() == {"turn": 2}
+    assert buffer.pending_data("user_contexts", "u1") is None
+
+
+def test_writes_stay_readable_while_their_batch_commits(tmp_path):
+    client = BlockingClient(LocalDocumentClient(str(tmp_path / "documents.db")))
+    buffer = WriteBehindBuffer(client)
+
+    async def run():
+        buffer.add("user_contexts", "u1", {"name": "Asha", "city": "Mysuru"}, merge=True)
+        flush = asyncio.create_task(buffer.flush())
+        await asyncio.to_thread(client.committing.wait, 5)
+
+        # Popped from the buffer but not committed yet
+        assert len(buffer) == 0
+        assert client.collection("user_contexts").document("u1").get().to_dict() is None
+        assert buffer.pending_data("user_contexts", "u1") == {"name": "Asha", "city": "Mysuru"}
+
+        # A newer merge write overlays the committing one
+        buffer.add("user_contexts", "u1", {"city": "Mandya"}, merge=True)
+        assert buffer.pending_data("user_contexts", "u1") == {"name": "Asha", "city": "Mandya"}
+        # A newer full set replaces it
+        buffer.add("conversations", "c1", {"turn": 1})
+        assert buffer.pending_data("conversations", "c1") == {"turn": 1}
+
+        client.release.set()
+        assert await flush == 1
+        assert buffer.pending_data("user_contexts", "u1") == {"city": "Mandya"}
+        await buffer.flush()
+
+    asyncio.run(run())
+    assert buffer.pending_data("user_contexts", "u1") is None
+    assert client.collection("user_contexts").document("u1").get().to_dict() == {"name": "Asha", "city": "Mandya"}
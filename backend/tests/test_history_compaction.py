@@ -0,0 +1,111 @@
+"""History compaction: summaries keep role alternation and per-agent state."""
+
+import asyncio
+import os
+
+import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from agents.kisan_agent import callbacks
+from services.history_compactor import HistoryCompactor
+
+
+class FakeCallbackContext:
+    def __init__(self, agent_name, state=None):
+        self.agent_name = agent_name
+        self.state = state if state is not None else {}
+
+
+def turn(role, text):
+    return types.Content(role=role, parts=[types.Part(text=text)])
+
+
+def conversation(turns):
+    return [turn("user" if i % 2 == 0 else "model", f"message {i} " + "x" * 40) for i in range(turns)]
+
+
+def assert_alternates(contents):
+    roles = [content.role for content in contents]
+    assert roles[0] == "user"
+    assert all(a != b for a, b in zip(roles, roles[1:])), roles
+
+
+@pytest.fixture
+def compaction(monkeypatch):
+    prompts = []
+
+    async def summarize(prompt):
+        prompts.append(prompt)
+        return f"summary {len(prompts)}"
+
+    monkeypatch.setattr("config.settings.settings.HISTORY_COMPACTION_ENABLED", True)
+    monkeypatch.setattr(callbacks, "gemini_summarize", summarize)
+    monkeypatch.setattr(callbacks, "get_history_compactor", lambda: HistoryCompactor(keep_messages=3, trigger_tokens=1))
+    return prompts
+
+
+def test_disabled_by_default():
+    from config.settings import Settings
+
+    if "HISTORY_COMPACTION_ENABLED" in os.environ:
+        pytest.skip("HISTORY_COMPACTION_ENABLED is set in the environment")
+    assert Settings.HISTORY_COMPACTION_ENABLED is False
+
+
+def test_compaction_keeps_role_alternation(compaction):
+    context = FakeCallbackContext("weather_agent")
+    contents = conversation(9)
+    request = LlmRequest(contents=list(contents))
+
+    asyncio.run(callbacks.compact_history(context, request))
+
+    assert_alternates(request.contents)
+    # The summary is folded into the first kept user turn, not a turn of its own
+    first = request.contents[0]
+    assert first.parts[0].text.endswith("summary 1")
+    assert first.parts[1:] == contents[6].parts
+    assert request.contents[1:] == contents[7:]
+
+
+def test_summary_before_model_turn_stays_alternating(compaction):
+    context = FakeCallbackContext("weather_agent")
+    contents = conversation(8)
+    context.state["history_summary:weather_agent"] = {"summary": "earlier", "summarized_count": 5}
+    request = LlmRequest(contents=list(contents))
+
+    asyncio.run(callbacks.compact_history(context, request))
+
+    assert_alternates(request.contents)
+    assert request.contents[0].parts[0].text.endswith("earlier")
+    assert request.contents[1:] == contents[5:]
+
+
+def test_state_is_kept_per_agent(compaction):
+    state = {"history_summary:market_agent": {"summary": "market talk", "summarized_count": 4}}
+    weather = FakeCallbackContext("weather_agent", state)
+    market = FakeCallbackContext("market_agent", state)
+    contents = conversation(9)
+
+    weather_request = LlmRequest(contents=list(contents))
+    asyncio.run(callbacks.compact_history(weather, weather_request))
+    assert state["history_summary:weather_agent"] == {"summary": "summary 1", "summarized_count": 6}
+    assert state["history_summary:market_agent"] == {"summary": "market talk", "summarized_count": 4}
+
+    # The market agent folds only its own unsummarized messages, on top of its own summary
+    market_request = LlmRequest(contents=list(contents))
+    asyncio.run(callbacks.compact_history(market, market_request))
+    assert "market talk" in compaction[1]
+    assert "message 3" not in compaction[1] and "message 4" in compaction[1]
+    assert market_request.contents[0].parts[0].text.endswith("summary 2")
+    assert_alternates(market_request.contents)
+
+
+def test_compactor_merges_summary_into_user_message():
+    compactor = HistoryCompactor(keep_messages=2, trigger_tokens=1)
+    messages = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}"} for i in range(6)]
+
+    compacted, _ = compactor.compact(messages, {"summary": "s", "summarized_count": 4})
+
+    assert [m["role"] for m in compacted] == ["user", "assistant"]
+    assert compacted[0]["content"].endswith("\n\nm4")
@@ -0,0 +1,106 @@
+"""Image dedup index: hamming thresholds, expiry, prompt-key isolation."""
+
+import time
+
+import numpy as np
+import pytest
+
+from services.image_dedup import ImageDedupIndex, hamming_distances, prompt_key
+
+BASE = 0x0F0F0F0F0F0F0F0F
+
+
+def flip(value: int, bits: int) -> int:
+    """Flip the lowest `bits` bits of a signed 64-bit hash."""
+    flipped = (value ^ ((1 << bits) - 1)) & (2 ** 64 - 1)
+    return flipped - 2 ** 64 if flipped >= 2 ** 63 else flipped
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = ImageDedupIndex(str(tmp_path / "dedup.db"), max_distance=6, ttl_seconds=3600)
+    yield index
+    index._conn.close()
+
+
+def test_hamming_distances():
+    hashes = np.array([BASE, flip(BASE, 1), flip(BASE, 64)], dtype=np.int64)
+    assert hamming_distances(hashes, BASE).tolist() == [0, 1, 64]
+
+
+def test_lookup_respects_max_distance(index):
+    key = prompt_key("what is wrong with my leaf?")
+    index.add((BASE, BASE), key, {"answer": "blight"})
+
+    assert index.lookup((flip(BASE, 6), flip(BASE, 6)), key) == {"answer": "blight"}
+    assert index.lookup((flip(BASE, 7), BASE), key) is None
+    assert index.lookup((BASE, flip(BASE, 7)), key) is None
+
+
+def test_lookup_returns_closest_match(index):
+    key = prompt_key("leaf")
+    index.add((flip(BASE, 4), BASE), key, {"answer": "far"})
+    index.add((flip(BASE, 1), BASE), key, {"answer": "near"})
+
+    assert index.lookup((BASE, BASE), key) == {"answer": "near"}
+
+
+def test_prompt_keys_are_isolated(index):
+    index.add((BASE, BASE), prompt_key("leaf", "en", "alice"), {"answer": "alice"})
+
+    assert index.lookup((BASE, BASE), prompt_key("  LEAF ", "en", "alice")) == {"answer": "alice"}
+    assert index.lookup((BASE, BASE), prompt_key("leaf", "en", "bob")) is None
+    assert index.lookup((BASE, BASE), prompt_key("leaf", "hi", "alice")) is None
+    assert index.lookup((BASE, BASE), prompt_key("stem", "en", "alice")) is None
+
+
+def test_expired_closest_entry_falls_back_to_valid_candidate(index):
+    key = prompt_key("leaf")
+    index.add((BASE, BASE), key, {"answer": "stale"})
+    index.add((flip(BASE, 3), BASE), key, {"answer": "fresh"})
+    stale_id = int(index._ids[0])
+    index._conn.execute(
+        "UPDATE diagnoses SET created_at = ? WHERE id = ?", (time.time() - 7200, stale_id)
+    )
+    index._conn.commit()
+    index._load()
+
+    assert index.lookup((BASE, BASE), key) == {"answer": "fresh"}
+
+
+def test_expired_only_entry_is_a_miss(index):
+    key = prompt_key("leaf")
+    index.add((BASE, BASE), key, {"answer": "stale"})
+    index._conn.execute("UPDATE diagnoses SET created_at = ?", (time.time() - 7200,))
+    index._conn.commit()
+    index._load()
+
+    assert index.lookup((BASE, BASE), key) is None
+
+
+def test_lookup_sees_rows_added_by_another_worker(tmp_path):
+    path = str(tmp_path / "dedup.db")
+    reader = ImageDedupIndex(path)
+    writer = ImageDedupIndex(path)
+    key = prompt_key("leaf")
+
+    writer.add((BASE, BASE), key, {"answer": "shared"})
+
+    assert reader.lookup((BASE, BASE), key) == {"answer": "shared"}
+    assert len(reader) == 1
+
+
+def test_lookup_skips_rows_evicted_by_another_worker(tmp_path):
+    path = str(tmp_path / "dedup.db")
+    reader = ImageDedupIndex(path)
+    writer = ImageDedupIndex(path)
+    key = prompt_key("leaf")
+    writer.add((BASE, BASE), key, {"answer": "evicted"})
+    writer.add((flip(BASE, 2), BASE), key, {"answer": "kept"})
+    reader.lookup((BASE, BASE), key)
+
+    writer._conn.execute("DELETE FROM diagnoses WHERE id = ?", (int(writer._ids[0]),))
+    writer._conn.commit()
+
+    assert reader.lookup((BASE, BASE), key) == {"answer": "kept"}
+    assert len(reader) == 1
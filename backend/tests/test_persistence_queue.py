@@ -0,0 +1,157 @@
+"""Persistence queue: retries, dead letters, disk spill and replay."""
+
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+from services.persistence_queue import PersistenceQueue
+
+
+def make_queue(tmp_path, **kwargs):
+    options = {"retry_base_seconds": 0, "replay_interval_seconds": 3600}
+    options.update(kwargs)
+    return PersistenceQueue(spill_path=str(tmp_path / "spill.jsonl"), **options)
+
+
+def spilled(path):
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line]
+
+
+def test_retries_until_the_handler_succeeds(tmp_path):
+    calls = []
+
+    def handler(value):
+        calls.append(value)
+        if len(calls) < 3:
+            raise RuntimeError("transient")
+
+    async def run():
+        queue = make_queue(tmp_path, max_retries=3)
+        queue.register("job", handler)
+        await queue.start()
+        assert queue.enqueue("job", {"value": 1})
+        await queue.stop()
+
+    asyncio.run(run())
+    assert calls == [1, 1, 1]
+    assert spilled(tmp_path / "spill.jsonl") == []
+    assert spilled(tmp_path / "spill.failed.jsonl") == []
+
+
+def test_exhausted_retries_go_to_the_dead_letter_file(tmp_path):
+    def handler(value):
+        raise RuntimeError("permanent")
+
+    async def run():
+        queue = make_queue(tmp_path, max_retries=2)
+        queue.register("job", handler)
+        await queue.start()
+        queue.enqueue("job", {"value": 1})
+        await queue.stop()
+
+    asyncio.run(run())
+    [job] = spilled(tmp_path / "spill.failed.jsonl")
+    assert job["name"] == "job"
+    assert job["attempts"] == 3
+    assert spilled(tmp_path / "spill.jsonl") == []
+
+
+def test_full_queue_spills_and_replay_restores_payloads(tmp_path):
+    created = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+    async def run():
+        queue = make_queue(tmp_path, maxsize=1, workers=0)
+        queue.register("job", lambda **payload: None)
+        await queue.start()
+        # Let the startup replay pass finish
+        await asyncio.sleep(0.1)
+        assert queue.enqueue("job", {"n": 0})
+        assert not queue.enqueue("job", {"n": 1, "raw": b"\x00\xff", "created": created})
+        assert not queue.enqueue("job", {"n": 2})
+        queue.flush_spills()
+        assert [job["payload"]["n"] for job in spilled(tmp_path / "spill.jsonl")] == [1, 2]
+
+        # Still full: nothing moves
+        assert await queue.replay_spilled() == 0
+        queue._queue.get_nowait()
+        queue._queue.task_done()
+
+        assert await queue.replay_spilled() == 1
+        replayed = queue._queue.get_nowait()
+        queue._queue.task_done()
+        assert replayed["payload"] == {"n": 1, "raw": b"\x00\xff", "created": created}
+        assert [job["payload"]["n"] for job in spilled(tmp_path / "spill.jsonl")] == [2]
+
+        assert await queue.replay_spilled() == 1
+        assert not (tmp_path / "spill.jsonl").exists()
+        await queue.stop(timeout=0)
+
+    asyncio.run(run())
+
+
+def test_replay_keeps_jobs_without_a_handler(tmp_path):
+    async def run():
+        queue = make_queue(tmp_path, workers=0)
+        queue.enqueue("unknown", {"n": 1})
+        await queue.start()
+        queue.flush_spills()
+        assert await queue.replay_spilled() == 0
+        await queue.stop()
+
+    asyncio.run(run())
+    assert [job["name"] for job in spilled(tmp_path / "spill.jsonl")] == ["unknown"]
+
+
+def test_spill_writes_run_off_the_event_loop(tmp_path):
+    writers = []
+
+    async def run():
+        queue = make_queue(tmp_path, maxsize=1, workers=0)
+        original = queue._write_spilled
+
+        def slow_write(items):
+            writers.append(threading.current_thread().name)
+            time.sleep(0.3)
+            original(items)
+
+        queue._write_spilled = slow_write
+        await queue.start()
+        queue.enqueue("job", {"n": 0})
+        started = time.perf_counter()
+        for n in range(1, 4):
+            queue.enqueue("job", {"n": n})
+        assert time.perf_counter() - started < 0.1
+        await queue.stop(timeout=0)
+
+    asyncio.run(run())
+    assert writers and threading.main_thread().name not in writers
+    assert sorted(job["payload"]["n"] for job in spilled(tmp_path / "spill.jsonl")) == [0, 1, 2, 3]
+
+
+def test_stop_spills_queued_and_in_flight_jobs(tmp_path):
+    release = threading.Event()
+
+    async def run():
+        queue = make_queue(tmp_path, workers=1)
+        queue.register("job", lambda n: release.wait(5))
+        await queue.start()
+        for n in range(3):
+            queue.enqueue("job", {"n": n})
+        await asyncio.sleep(0.05)
+        try:
+            await queue.stop(timeout=0.05)
+        finally:
+            release.set()
+
+    asyncio.run(run())
+    assert sorted(job["payload"]["n"] for job in spilled(tmp_path / "spill.jsonl")) == [0, 1, 2]
+
+
+def test_spill_outside_an_event_loop_is_written_immediately(tmp_path):
+    queue = make_queue(tmp_path)
+    assert not queue.enqueue("job", {"n": 1})
+    assert [job["payload"] for job in spilled(tmp_path / "spill.jsonl")] == [{"n": 1}]
@@ -0,0 +1,153 @@
+"""Qdrant service: upsert retries, the shared embedded client and payload filters."""
+
+import pytest
+
+from services import qdrant_service
+from services.qdrant_service import QdrantService
+
+
+class FlakyClient:
+    """Client whose upserts fail `failures` times before succeeding."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def upsert(self, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("qdrant unavailable")
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = QdrantService.__new__(QdrantService)
+    service.use_memory = False
+    monkeypatch.setattr(service, "_build_points", lambda documents, hybrid: list(documents), raising=False)
+    monkeypatch.setattr(service, "_is_hybrid", lambda collection_name: False, raising=False)
+    return service
+
+
+def test_upsert_backoff_is_jittered_and_capped(service, monkeypatch):
+    monkeypatch.setattr("config.settings.settings.QDRANT_UPSERT_RETRY_BASE_SECONDS", 1.0)
+    monkeypatch.setattr("config.settings.settings.QDRANT_UPSERT_RETRY_MAX_SECONDS", 5.0)
+    delays = []
+    monkeypatch.setattr(qdrant_service.time, "sleep", delays.append)
+    service.client = FlakyClient(failures=5)
+
+    assert service._upload_batch([{"id": 1}], "schemes", max_retries=5) == 1
+
+    assert service.client.calls == 6
+    assert 1.0 <= delays[0] <= 1.5 and 2.0 <= delays[1] <= 3.0 and 4.0 <= delays[2] <= 5.0
+    assert delays[3:] == [5.0, 5.0]
+
+
+def test_upsert_gives_up_after_max_retries(service, monkeypatch):
+    monkeypatch.setattr(qdrant_service.time, "sleep", lambda delay: None)
+    service.client = FlakyClient(failures=10)
+
+    with pytest.raises(ConnectionError):
+        service._upload_batch([{"id": 1}], "schemes", max_retries=2)
+    assert service.client.calls == 3
+
+
+class FakeEmbedder:
+    model = "fake"
+    dimension = 4
+
+
+@pytest.fixture
+def embedded(tmp_path, monkeypatch):
+    """Embedded Qdrant at a temporary path, with fresh singletons."""
+    monkeypatch.setattr("config.settings.settings.QDRANT_EMBEDDED", True)
+    monkeypatch.setattr("config.settings.settings.QDRANT_LOCAL_PATH", str(tmp_path / "qdrant"))
+    monkeypatch.setattr(qdrant_service, "_embedded", None)
+    monkeypatch.setattr(qdrant_service, "_qdrant_service", None)
+    monkeypatch.setattr(qdrant_service, "_async_qdrant_service", None)
+    monkeypatch.setattr(qdrant_service, "create_batch_embedder", lambda: FakeEmbedder())
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    opened = []
+    client_class = qdrant_service.QdrantClient
+
+    def counting_client(*args, **kwargs):
+        opened.append(kwargs)
+        return client_class(*args, **kwargs)
+
+    monkeypatch.setattr(qdrant_service, "QdrantClient", counting_client)
+    yield opened
+    qdrant_service._close_embedded_client(str(tmp_path / "qdrant"))
+
+
+def test_one_embedded_client_per_process(embedded, tmp_path):
+    snapshot = tmp_path / "schemes.snapshot"
+    snapshot.write_bytes(b"")
+
+    qdrant_service.bootstrap_from_snapshot(str(snapshot))
+    sync_service = qdrant_service.get_qdrant_service()
+    async_service = qdrant_service.get_async_qdrant_service()
+    other = QdrantService(embedder=FakeEmbedder(), local_path=str(tmp_path / "qdrant"))
+
+    assert len(embedded) == 1
+    assert sync_service.client is async_service.client.client is other.client
+
+
+def test_bootstrap_skips_locked_embedded_storage(embedded, tmp_path, monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    snapshot = tmp_path / "schemes.snapshot"
+    snapshot.write_bytes(b"")
+
+    assert qdrant_service.bootstrap_from_snapshot(str(snapshot)) is False
+    assert embedded == []
+
+
+def test_server_probe_client_is_closed(monkeypatch):
+    probes = []
+
+    class UnreachableClient:
+        def __init__(self, **kwargs):
+            self.closed = False
+            probes.append(self)
+
+        def get_collections(self):
+            raise ConnectionError("refused")
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr("config.settings.settings.QDRANT_EMBEDDED", False)
+    monkeypatch.setattr(qdrant_service, "_embedded", None)
+    monkeypatch.setattr(qdrant_service, "QdrantClient", UnreachableClient)
+
+    assert qdrant_service._use_embedded() is True
+    assert len(probes) == 1 and probes[0].closed
+
+
+def test_build_filter_against_in_memory_client():
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Distance, PointStruct, VectorParams
+
+    from services.qdrant_service import build_filter
+
+    client = QdrantClient(":memory:")
+    client.create_collection("schemes", vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+    payloads = {
+        1: {"state": "Karnataka", "categories": ["insurance"]},
+        2: {"state": "Tamil Nadu", "categories": ["insurance"]},
+        3: {"categories": ["credit", "insurance"]},
+        4: {"state": None, "categories": ["irrigation"]},
+        5: {"state": "Karnataka", "categories": ["credit"], "scope": "state"},
+    }
+    client.upsert("schemes", [PointStruct(id=i, vector=[1.0, 0.0], payload=p) for i, p in payloads.items()])
+
+    def matching(filters):
+        points, _ = client.scroll("schemes", scroll_filter=build_filter(filters), limit=10)
+        return sorted(point.id for point in points)
+
+    # The farmer's state, or schemes not tied to any state
+    assert matching({"state": "karnataka"}) == [1, 3, 4, 5]
+    # Any of the categories may match; unknown ones are ignored
+    assert matching({"categories": ["credit", "irrigation", "not-a-category"]}) == [3, 4, 5]
+    assert matching({"state": "Karnataka", "categories": "credit"}) == [3, 5]
+    assert matching({"state": "Karnataka", "scope": "state"}) == [5]
+    assert build_filter({"state": "Atlantis", "categories": ["not-a-category"]}) is None
+    client.close()
@@ -0,0 +1,174 @@
+"""Local storage backend: Firestore query/merge semantics and signed URLs."""
+
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from google.api_core.exceptions import NotFound, PreconditionFailed
+
+from services.storage_backend import (
+    LocalDocumentClient,
+    LocalQuery,
+    LocalStorageClient,
+    sign_local_url,
+    verify_local_url,
+)
+
+
+@pytest.fixture
+def client(tmp_path):
+    return LocalDocumentClient(str(tmp_path / "documents.db"))
+
+
+@pytest.fixture
+def crops(client):
+    collection = client.collection("crops")
+    collection.document("a").set({"name": "rice", "acres": 4, "state": "KA", "meta": {"season": "kharif"}})
+    collection.document("b").set({"name": "wheat", "acres": 2.5, "state": "PB"})
+    collection.document("c").set({"name": "ragi", "acres": 4, "state": "KA", "tags": ["millet", "dry"]})
+    collection.document("d").set({"name": "cotton", "state": "MH"})
+    return collection
+
+
+def ids(query):
+    return [snapshot.id for snapshot in query.stream()]
+
+
+def test_where_operators(crops):
+    assert ids(crops.where("state", "==", "KA")) == ["a", "c"]
+    assert ids(crops.where("acres", ">", 3)) == ["a", "c"]
+    assert ids(crops.where("acres", "<=", 2.5)) == ["b"]
+    assert ids(crops.where("state", "in", ["PB", "MH"])) == ["b", "d"]
+    assert ids(crops.where("tags", "array_contains", "millet")) == ["c"]
+    assert ids(crops.where("meta.season", "==", "kharif")) == ["a"]
+    # A document missing the filtered field never matches, not even "!="
+    assert ids(crops.where("acres", "!=", 4)) == ["b"]
+
+
+def test_where_only_matches_values_of_the_same_type(client):
+    collection = client.collection("mixed")
+    for document_id, value in [("n", 1), ("f", 1.0), ("s", "1"), ("t", True), ("z", None)]:
+        collection.document(document_id).set({"value": value})
+
+    assert ids(collection.where("value", "==", 1)) == ["f", "n"]
+    assert ids(collection.where("value", ">=", 0)) == ["f", "n"]
+    assert ids(collection.where("value", ">", "")) == ["s"]
+    assert ids(collection.where("value", "==", True)) == ["t"]
+
+
+def test_order_by_mixed_types_follows_firestore_type_order(client):
+    collection = client.collection("mixed")
+    values = {
+        "map": {"k": 1},
+        "list": [1, 2],
+        "bytes": b"x",
+        "str": "abc",
+        "time": datetime(2024, 1, 1),
+        "aware": datetime(2023, 1, 1, tzinfo=timezone.utc),
+        "float": 2.5,
+        "int": 3,
+        "bool": False,
+        "null": None,
+    }
+    for document_id, value in values.items():
+        collection.document(document_id).set({"value": value})
+
+    expected = ["null", "bool", "float", "int", "aware", "time", "str", "bytes", "list", "map"]
+    assert ids(collection.order_by("value")) == expected
+    assert ids(collection.order_by("value", direction=LocalQuery.DESCENDING)) == expected[::-1]
+
+
+def test_order_by_skips_missing_fields_and_breaks_ties_by_id(crops):
+    assert ids(crops.order_by("acres", direction=LocalQuery.DESCENDING)) == ["a", "c", "b"]
+    assert ids(crops.order_by("state").order_by("acres")) == ["a", "c", "b"]
+
+
+def test_select_returns_only_requested_fields(crops):
+    snapshot = next(crops.where("name", "==", "rice").select(["name", "meta.season", "missing"]).stream())
+    assert snapshot.to_dict() == {"name": "rice", "meta": {"season": "kharif"}}
+
+
+def test_limit_and_start_after(crops):
+    query = crops.order_by("acres").limit(2)
+    first = query.get()
+    assert [snapshot.id for snapshot in first] == ["b", "a"]
+    assert ids(query.start_after(first[-1])) == ["c"]
+    # Field-value cursors only cover the order-by fields
+    assert ids(crops.order_by("acres").start_after({"acres": 2.5})) == ["a", "c"]
+
+
+def test_merge_is_recursive(client):
+    reference = client.collection("users").document("u1")
+    reference.set({"profile": {"name": "Asha", "location": {"state": "KA", "city": "Mysuru"}}, "crops": ["rice"]})
+
+    reference.set({"profile": {"location": {"city": "Mandya"}}, "crops": ["ragi"]}, merge=True)
+
+    assert reference.get().to_dict() == {
+        "profile": {"name": "Asha", "location": {"state": "KA", "city": "Mandya"}},
+        "crops": ["ragi"],
+    }
+
+
+def test_merge_in_batch_and_set_without_merge(client):
+    reference = client.collection("users").document("u1")
+    reference.set({"profile": {"name": "Asha", "city": "Mysuru"}})
+
+    batch = client.batch()
+    batch.set(reference, {"profile": {"city": "Mandya"}}, merge=True)
+    batch.commit()
+    assert reference.get().to_dict() == {"profile": {"name": "Asha", "city": "Mandya"}}
+
+    reference.set({"profile": {"city": "Hassan"}})
+    assert reference.get().to_dict() == {"profile": {"city": "Hassan"}}
+
+
+def test_update_replaces_maps_and_sets_dotted_paths(client):
+    reference = client.collection("users").document("u1")
+    with pytest.raises(NotFound):
+        reference.update({"name": "Asha"})
+
+    reference.set({"profile": {"name": "Asha", "city": "Mysuru"}, "count": 1})
+    reference.update({"profile.city": "Mandya", "count": 2})
+    assert reference.get().to_dict() == {"profile": {"name": "Asha", "city": "Mandya"}, "count": 2}
+
+    reference.update({"profile": {"city": "Hassan"}})
+    assert reference.get().to_dict() == {"profile": {"city": "Hassan"}, "count": 2}
+
+
+def test_values_round_trip(client):
+    reference = client.collection("blobs").document("x")
+    created = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    reference.set({"created": created, "raw": b"\x00\x01", "nested": {"when": created}})
+    assert reference.get().to_dict() == {"created": created, "raw": b"\x00\x01", "nested": {"when": created}}
+
+
+def test_signed_url_verification():
+    expires = int(time.time()) + 60
+    signature = sign_local_url("bucket", "uploads/a.jpg", "GET", expires)
+
+    assert verify_local_url("bucket", "uploads/a.jpg", "GET", expires, signature)
+    assert not verify_local_url("bucket", "uploads/a.jpg", "PUT", expires, signature)
+    assert not verify_local_url("bucket", "uploads/b.jpg", "GET", expires, signature)
+    assert not verify_local_url("bucket", "uploads/a.jpg", "GET", expires + 1, signature)
+    assert not verify_local_url("bucket", "uploads/a.jpg", "GET", int(time.time()) - 1,
+                                sign_local_url("bucket", "uploads/a.jpg", "GET", int(time.time()) - 1))
+
+
+def test_generated_signed_url_verifies(tmp_path):
+    blob = LocalStorageClient(str(tmp_path)).bucket("bucket").blob("uploads/audio/a b.wav")
+    url = urlparse(blob.generate_signed_url(expiration=timedelta(minutes=5), method="PUT"))
+    query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+    assert url.path == "/local-storage/bucket/uploads/audio/a%20b.wav"
+    assert query["method"] == "PUT"
+    assert verify_local_url("bucket", blob.name, "PUT", int(query["expires"]), query["signature"])
+
+
+def test_conditional_upload(tmp_path):
+    blob = LocalStorageClient(str(tmp_path)).bucket("bucket").blob("tts/a.mp3")
+    blob.upload_from_string(b"one", content_type="audio/mpeg", if_generation_match=0)
+    with pytest.raises(PreconditionFailed):
+        blob.upload_from_string(b"two", if_generation_match=0)
+    assert blob.download_as_bytes() == b"one"
+    assert blob.content_type == "audio/mpeg"
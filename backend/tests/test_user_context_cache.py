@@ -0,0 +1,113 @@
+"""User-context read-through cache: hits, negative caching and writes."""
+
+import asyncio
+
+import pytest
+
+from services import storage_tools
+from services.metrics import metrics
+from services.storage_backend import LocalDocumentClient
+from services.storage_tools import DEFAULT_USER_CONTEXT, StorageTools
+
+
+class CountingClient:
+    """Document client that counts document reads."""
+
+    def __init__(self, client):
+        self._client = client
+        self.reads = 0
+
+    def collection(self, name):
+        collection = self._client.collection(name)
+        document = collection.document
+
+        def counted_document(document_id=None):
+            reference = document(document_id)
+            get = reference.get
+
+            def counted_get():
+                self.reads += 1
+                return get()
+
+            reference.get = counted_get
+            return reference
+
+        collection.document = counted_document
+        return collection
+
+
+@pytest.fixture
+def tools(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage_tools.settings, "REDIS_URL", "")
+    monkeypatch.setattr(storage_tools.settings, "FIRESTORE_WRITE_BEHIND", False)
+    storage_tools._user_context_cache.clear()
+    tools = StorageTools.__new__(StorageTools)
+    tools.firestore_client = CountingClient(LocalDocumentClient(str(tmp_path / "documents.db")))
+    return tools
+
+
+def avoided():
+    return metrics.get("firestore_reads_avoided_total", collection="user_contexts")
+
+
+def test_repeated_reads_hit_the_cache(tools):
+    tools.firestore_client._client.collection("user_contexts").document("u1").set({"location": "Mandya"})
+    before = avoided()
+
+    async def run():
+        return [await tools.get_user_context("u1") for _ in range(3)]
+
+    assert asyncio.run(run()) == [{"location": "Mandya"}] * 3
+    assert tools.firestore_client.reads == 1
+    assert avoided() - before == 2
+    assert storage_tools._user_context_cache.hit_rate > 0
+
+
+def test_missing_context_is_cached(tools):
+    async def run():
+        return [await tools.get_user_context("new-farmer") for _ in range(3)]
+
+    assert asyncio.run(run()) == [DEFAULT_USER_CONTEXT] * 3
+    assert tools.firestore_client.reads == 1
+
+
+def test_save_does_not_read_and_updates_a_cached_context(tools):
+    tools.firestore_client._client.collection("user_contexts").document("u1").set({"location": "Mandya", "language": "kn"})
+
+    async def run():
+        await tools.get_user_context("u1")
+        assert await tools.save_user_context("u1", {"location": "Hassan"}, defer=False)
+        return await tools.get_user_context("u1")
+
+    context = asyncio.run(run())
+    assert tools.firestore_client.reads == 1
+    assert context["location"] == "Hassan"
+    assert context["language"] == "kn"
+
+
+def test_save_without_a_cached_context_invalidates_instead_of_reading(tools):
+    async def run():
+        # Negative entry for a new farmer
+        assert await tools.get_user_context("u2") == DEFAULT_USER_CONTEXT
+        assert await tools.save_user_context("u2", {"location": "Mysuru"}, defer=False)
+        assert tools.firestore_client.reads == 1
+        return await tools.get_user_context("u2")
+
+    context = asyncio.run(run())
+    assert context["location"] == "Mysuru"
+    assert tools.firestore_client.reads == 2
+
+
+def test_queued_write_invalidates_once_it_lands(tools):
+    reference = tools.firestore_client._client.collection("user_contexts").document("u3")
+    reference.set({"location": "Mandya"})
+    storage_tools.register_persistence_handlers(tools.firestore_client._client)
+    handler = storage_tools.get_persistence_queue()._handlers["storage.set_document"]
+
+    async def run():
+        # Cached before the queued write lands
+        storage_tools._user_context_cache.set("u3", {"exists": True, "data": {"location": "Mandya"}})
+        await handler(collection="user_contexts", document_id="u3", data={"location": "Hassan"}, merge=True)
+        return await tools.get_user_context("u3")
+
+    assert asyncio.run(run()) == {"location": "Hassan"}
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Warm the embedding cache from a query log.
+
+Reads search queries from EMBEDDING_QUERY_LOG (or --log), keeps the most
+frequent distinct ones and embeds any that are not cached yet as
+`retrieval_query`, so repeated farmer questions are answered without an
+embedding call after a deploy or cache reset.
+
+Usage:
+    python warm_embedding_cache.py [--log queries.jsonl] [--top 5000]
+"""
+
+import argparse
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+
+# Add current directory to path to import our modules
+sys.path.append(str(Path(__file__).parent))
+
+import google.generativeai as genai
+
+from config.settings import settings
+from services.embedding_cache import read_query_log
+from services.embeddings import create_batch_embedder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-compute query embeddings from a query log")
+    parser.add_argument("--log", default=settings.EMBEDDING_QUERY_LOG, help="JSON-lines query log")
+    parser.add_argument("--top", type=int, default=5000, help="Most frequent distinct queries to warm")
+    args = parser.parse_args()
+
+    if not args.log:
+        parser.error("No query log: pass --log or set EMBEDDING_QUERY_LOG")
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        parser.error("EMBEDDING_CACHE_ENABLED is false; nothing to warm")
+
+    google_api_key = os.getenv("GOOGLE_API_KEY")
+    if google_api_key:
+        genai.configure(api_key=google_api_key)
+
+    counts = Counter(read_query_log(args.log))
+    queries = [query for query, _ in counts.most_common(args.top)]
+    print(f"{sum(counts.values())} logged queries, {len(counts)} distinct, warming {len(queries)}")
+
+    embedder = create_batch_embedder()
+    embedder.embed(queries, task_type="retrieval_query")
+
+    stats = embedder.cache.stats()
+    print(f"Already cached: {stats['memory_hits'] + stats['disk_hits']}, embedded: {stats['misses']}, "
+          f"hit rate {stats['hit_rate']:.1%}, {stats['entries']} embeddings in {settings.EMBEDDING_CACHE_DB}")
+
+
+if __name__ == "__main__":
+    main()